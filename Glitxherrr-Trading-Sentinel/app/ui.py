@@ -11,26 +11,15 @@ from datetime import datetime
 
 from core.config import DEFAULT_EXCHANGE
 from core.ollama_agent import OllamaAgent
-from core.multi_asset import compare_assets
 from core.plan_formatter import format_trade_plan
+from core.scheduler import start_scheduler
+from core.scanner import scan_watchlist, rank_rows
+from data.stream import start_stream, stop_stream
 
-from data.dxy import dxy_detector
-from data.news import fetch_important_news
 from data.macro_calendar import upcoming_events
-from data.gold_news import fetch_gold_news
 from core.market_state import build_market_state
-from core.constraints import build_constraints
-from core.state_diff import diff_market_state
-from core.snapshot_store import load_snapshot, save_snapshot
 from core.snapshot_store import format_ist_time
-from data.macro_data import fetch_dxy_ohlcv
-from core.structure_engine import detect_structure_state
-from core.derivatives_bias import compute_derivatives_bias
-from core.dxy_bias import compute_dxy_bias
 from data.macro_calendar import fetch_macro_events
-import copy
-from core.macro_impact import macro_tailwind
-from core.exhaustion import detect_exhaustion
 import sys
 
 
@@ -54,7 +43,20 @@ st.set_page_config(
 st.title("Glitxher’s Trading Sentinel")
 st.caption("(Deterministic Trading Engine).")
 
-agent = OllamaAgent(model="llama3.1:8b")
+# ---------------- Shared resources ----------------
+# One instance per server process, shared by every session and rerun.
+
+@st.cache_resource
+def load_agent(model: str):
+    return OllamaAgent(model=model)
+
+
+@st.cache_resource
+def load_scheduler(exchange: str, asset1: str, asset2: str):
+    return start_scheduler(exchange, asset1, asset2)
+
+
+agent = load_agent("llama3.1:8b")
 
 
 
@@ -69,11 +71,21 @@ with st.sidebar:
 
     st.write("Timeframes used internally: 15m / 1h / 4h")
 
+    st.divider()
+    st.subheader("Watchlist")
+
+    watchlist = st.text_area(
+        "Symbols (one per line)",
+        "BTC/USDT\nETH/USDT\nSOL/USDT\nBNB/USDT\nXRP/USDT\nPAXG/USDT",
+        height=160,
+    )
+
     st.divider()
     st.subheader("Refresh")
 
-    if st.button("🔄 Refresh Now"):
-        st.rerun()
+    refresh = st.button("🔄 Refresh Now")
+
+    live = st.toggle("⚡ Live WebSocket data", value=False)
 
 
 # ---------------- Helpers ----------------
@@ -284,50 +296,50 @@ def rolling_correlation(df_a, df_b, window=50):
 
 
 # ----------- Sentiment Classifiers -----------
-def label_funding(fbps):
-    fbps = safe_float(fbps, None)
-    if fbps is None:
-        return "NA", "🟡 Medium"
-    if fbps > 8:
-        return f"{fbps:.3f}", "⚠️ Crowded longs"
-    if fbps < -8:
-        return f"{fbps:.3f}", "⚠️ Crowded shorts"
-    if fbps > 0:
-        return f"{fbps:.3f}", "🟡 Longs paying"
-    if fbps < 0:
-        return f"{fbps:.3f}", "🟡 Shorts paying"
-    return f"{fbps:.3f}", "🟡 Neutral"
-
-
-def label_oi(oi):
-    oi = safe_float(oi, None)
-    if oi is None:
-        return "NA", "🟡 Medium"
-    return f"{oi:.3f}", "🟡 Open interest present"
-
-
-def label_lsr(ratio):
-    ratio = safe_float(ratio, None)
-    if ratio is None:
-        return "NA", "🟡 Medium"
-    if ratio >= 2.0:
-        return f"{ratio:.3f}", "⚠️ Crowded longs"
-    if ratio <= 0.6:
-        return f"{ratio:.3f}", "⚠️ Crowded shorts"
-    if 0.95 <= ratio <= 1.05:
-        return f"{ratio:.3f}", "🟡 Medium (balanced)"
-    return f"{ratio:.3f}", "🟡 Medium"
-
-
-def label_atr(atrp):
-    atrp = safe_float(atrp, None)
-    if atrp is None:
-        return "NA", "🟡 Medium"
-    if atrp >= 0.30:
-        return f"{atrp:.4f}", "🟡 Expanding volatility"
-    if atrp < 0.18:
-        return f"{atrp:.4f}", "🟡 Contracting volatility"
-    return f"{atrp:.4f}", "🟡 Normal"
+def label_funding(fbps):
+    fbps = safe_float(fbps, None)
+    if fbps is None:
+        return "NA", "🟡 Medium"
+    if fbps > 8:
+        return f"{fbps:.3f}", "⚠️ Crowded longs"
+    if fbps < -8:
+        return f"{fbps:.3f}", "⚠️ Crowded shorts"
+    if fbps > 0:
+        return f"{fbps:.3f}", "🟡 Longs paying"
+    if fbps < 0:
+        return f"{fbps:.3f}", "🟡 Shorts paying"
+    return f"{fbps:.3f}", "🟡 Neutral"
+
+
+def label_oi(oi):
+    oi = safe_float(oi, None)
+    if oi is None:
+        return "NA", "🟡 Medium"
+    return f"{oi:.3f}", "🟡 Open interest present"
+
+
+def label_lsr(ratio):
+    ratio = safe_float(ratio, None)
+    if ratio is None:
+        return "NA", "🟡 Medium"
+    if ratio >= 2.0:
+        return f"{ratio:.3f}", "⚠️ Crowded longs"
+    if ratio <= 0.6:
+        return f"{ratio:.3f}", "⚠️ Crowded shorts"
+    if 0.95 <= ratio <= 1.05:
+        return f"{ratio:.3f}", "🟡 Medium (balanced)"
+    return f"{ratio:.3f}", "🟡 Medium"
+
+
+def label_atr(atrp):
+    atrp = safe_float(atrp, None)
+    if atrp is None:
+        return "NA", "🟡 Medium"
+    if atrp >= 0.30:
+        return f"{atrp:.4f}", "🟡 Expanding volatility"
+    if atrp < 0.18:
+        return f"{atrp:.4f}", "🟡 Contracting volatility"
+    return f"{atrp:.4f}", "🟡 Normal"
 
 
 def label_vol_spike(vs):
@@ -391,25 +403,60 @@ def overall_outlook(plan: dict):
     return "🟡 Medium"
 
 
-# ---------------- Macro (DXY) ----------------
-st.divider()
-st.subheader("🌍 Macro Filter — DXY")
+# ---------------- Market Snapshot ----------------
+# A background scheduler (core.scheduler) keeps candles, derivatives and
+# macro sources warm and publishes versioned snapshots. Every session and
+# rerun just reads the latest one; Refresh asks for a new version.
+FIRST_LOAD_TIMEOUT = 90
 
-try:
-    # ---- Macro momentum / pressure ----
-    dxy = dxy_detector(interval="1h")
+scheduler = load_scheduler(exchange, asset1, asset2)
+
+# data.stream keeps one stream per asset pair across sessions and reruns;
+# turning the toggle off stops it and the assets go back to REST polling.
+if live:
+    # Streamed candles / funding replace REST polling for both assets
+    try:
+        stream = start_stream(exchange, [asset1, asset2])
+        st.sidebar.caption(
+            "Stream: " + ("connected" if stream.connected["klines"] else "reconnecting…")
+        )
+    except (RuntimeError, ValueError) as e:
+        st.sidebar.warning(str(e))
+else:
+    stop_stream(exchange, [asset1, asset2])
+
+generation = scheduler.request_refresh() if refresh else 0
 
-    if not isinstance(dxy, dict):
-        raise ValueError("Invalid DXY detector output")
+with st.spinner("Fetching + derivatives data..."):
+    snapshot = scheduler.wait_for(refresh=generation, timeout=FIRST_LOAD_TIMEOUT)
 
-    # ---- Real OHLC for structure (4H) ----
-    df_dxy_4h = fetch_dxy_ohlcv(interval="4h")
+if snapshot is None:
+    st.info("Market data is still warming up — try again in a moment.")
+    st.stop()
+
+st.caption(
+    f"Snapshot v{snapshot.version} · "
+    f"{datetime.fromtimestamp(snapshot.published_at).strftime('%H:%M:%S')}"
+)
+
+result = snapshot.result
+
+cmp = result["cmp"]
+dxy = result["dxy"]
+dxy_structure = result["dxy_structure"]
+btc_news = result["btc_news"]
+gold_news = result["gold_news"]
+market_state = result["market_state"]
 
-    # Clean inputs for structure engine
-    df_dxy_4h = df_dxy_4h[["open", "high", "low", "close", "volume"]]
 
-    # ---- Detect structure ----
-    dxy_structure = detect_structure_state(df_dxy_4h)
+# ---------------- Macro (DXY) ----------------
+st.divider()
+st.subheader("🌍 Macro Filter — DXY")
+
+if result["dxy_error"]:
+    st.warning(f"DXY data unavailable: {result['dxy_error']}")
+
+if isinstance(dxy, dict):
 
     # ---- Macro metrics ----
     col1, col2, col3 = st.columns(3)
@@ -420,34 +467,15 @@ try:
 
     st.info(dxy.get("note", "No macro note available"))
 
-    # ---- Save structure for unified panel ----
-    dxy_struct = dxy_structure if isinstance(dxy_structure, dict) else None
-
-except Exception as e:
-    st.warning(f"DXY data unavailable: {e}")
-    dxy_struct = None
+# ---- Structure for unified panel ----
+dxy_struct = dxy_structure
 
 
+# ================= NEWS (fetched by the scheduler) =================
 
+for msg in result["news_errors"]:
+    st.warning(msg)
 
- 
-      # ================= SAFE NEWS FETCH =================
-
-try:
-    btc_news = fetch_important_news(limit=8)
-    if not isinstance(btc_news, list):
-        btc_news = []
-except Exception:
-    btc_news = []
-    st.warning("BTC news temporarily unavailable")
-
-try:
-    gold_news = fetch_gold_news(limit=8)
-    if not isinstance(gold_news, list):
-        gold_news = []
-except Exception:
-    gold_news = []
-    st.warning("Gold news temporarily unavailable")
 
 
 # ================= NEWS DASHBOARD =================
@@ -564,11 +592,9 @@ with col2:
 st.divider()
 st.subheader("")
 
-cmp = None
-
 try:
-    with st.spinner("Fetching + derivatives data..."):
-        cmp = compare_assets(exchange, asset1, asset2)
+    if cmp is None:
+        raise RuntimeError(result["analysis_error"])
 
     plan_a = cmp["plan_a"]
     plan_b = cmp["plan_b"]
@@ -785,18 +811,69 @@ else:
             if sym.upper().startswith("BTC"):
                 st.info("BTC reacts to ETF flows, regulation, liquidity news")
 
+# ---------------- Watchlist Scanner ----------------
+st.divider()
+st.subheader("🔭 Watchlist Scanner")
+
+WATCHLIST_COLUMNS = {
+    "symbol": "Asset",
+    "score": "Score",
+    "decision": "Decision",
+    "direction": "Direction",
+    "bias_4h": "4H Bias",
+    "bias_1h": "1H Bias",
+    "rr": "RR",
+    "momentum_score": "Momentum",
+    "funding_bps": "Funding (bps)",
+    "long_short_ratio": "Long/Short Ratio",
+    "error": "Error",
+}
+
+
+def watchlist_frame(rows: list) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=list(WATCHLIST_COLUMNS))
+    return df.rename(columns=WATCHLIST_COLUMNS)
+
+
+watch_symbols = list(dict.fromkeys(
+    line.strip().upper() for line in watchlist.splitlines() if line.strip()
+))
+
+if st.button(f"Scan {len(watch_symbols)} symbols", disabled=not watch_symbols):
+
+    progress = st.progress(0.0)
+    table = st.empty()
+
+    # Rows stream in as each symbol finishes; the table is re-ranked each time
+    def show_rows(row, rows):
+        progress.progress(len(rows) / len(watch_symbols))
+        table.dataframe(watchlist_frame(rank_rows(rows)), use_container_width=True, hide_index=True)
+
+    st.session_state["watchlist_rows"] = scan_watchlist(exchange, watch_symbols, on_row=show_rows)
+    progress.empty()
+
+elif st.session_state.get("watchlist_rows"):
+    st.dataframe(
+        watchlist_frame(st.session_state["watchlist_rows"]),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+else:
+    st.info("Scan the sidebar watchlist to rank every symbol.")
+
+
             # ================= MARKET STRUCTURE (4H) =================
+if market_state is None:
+    st.stop()
+
 st.divider()
 st.subheader("📐 Market Structure (4H)")
 
-# ---- Identify BTC & PAXG plans safely ----
-
-btc_plan  = cmp["plan_a"] if "BTC" in cmp["asset_a"] else cmp["plan_b"]
-paxg_plan = cmp["plan_b"] if btc_plan == cmp["plan_a"] else cmp["plan_a"]
+# ---- Structure comes from the pipeline's market state ----
 
-btc_struct  = btc_plan.get("structure_state") if isinstance(btc_plan, dict) else None
-paxg_struct = paxg_plan.get("structure_state") if isinstance(paxg_plan, dict) else None
-dxy_struct = dxy_structure if "dxy_structure" in locals() else None
+btc_struct  = market_state["btc"]["structure"]
+paxg_struct = market_state["paxg"]["structure"]
 
 
 
@@ -850,123 +927,6 @@ with col_dxy:
 
 
 
-
-def build_asset_state(plan, asset_name, dxy_state):
-
-    # ---- Core price context ----
-    structure = plan.get("structure_state") if isinstance(plan, dict) else None
-    momentum  = plan.get("momentum") if isinstance(plan, dict) else None
-
-    # ---- Derivatives context ----
-    derivatives = {
-        "funding": plan.get("funding"),
-        "open_interest": plan.get("open_interest"),
-        "long_short_ratio": plan.get("long_short_ratio"),
-    }
-
-    # ---- Trend exhaustion ----
-    exhaustion = detect_exhaustion(momentum, structure, derivatives)
-
-    # ---- Macro tailwind / headwind ----
-    dxy_trend = None
-    dxy_strength = None
-
-    if isinstance(dxy_state, dict):
-        dxy_trend = dxy_state.get("trend")
-        dxy_strength = dxy_state.get("strength")
-
-    macro_effect = macro_tailwind(
-        asset_name,
-        dxy_trend,
-        dxy_strength
-    )
-
-    # ---- Build final asset state ----
-    return {
-        "structure": structure,
-        "momentum": momentum,
-        "derivatives": derivatives,
-        "exhaustion": exhaustion,
-
-        # ---- Combined derivatives pressure ----
-        "derivatives_bias": compute_derivatives_bias(
-            structure,
-            momentum,
-            derivatives
-        ),
-
-        # ---- Macro context (tailwind / headwind / neutral) ----
-        "macro_effect": macro_effect,
-
-        # ---- Timeframe bias ----
-        "bias": {
-            "htf": plan.get("bias_4h"),
-            "ltf": plan.get("bias_1h"),
-        }
-    }
-
-
-def build_dxy_state(dxy_data, dxy_structure):
-
-    if not isinstance(dxy_data, dict):
-        return None
-
-    trend = (
-        dxy_data.get("trend").upper()
-        if dxy_data.get("trend")
-        else None
-    )
-
-    strength = (
-        dxy_data.get("strength").upper()
-        if dxy_data.get("strength")
-        else None
-    )
-
-    return {
-        "structure": dxy_structure,
-        "trend": trend,
-        "strength": strength,
-
-        # ---- Synthesized macro bias ----
-        "bias": compute_dxy_bias(
-            dxy_structure,
-            trend,
-            strength
-        )
-    }
-
-
-# ================= BUILD MARKET STATE =================
-
-dxy_state = build_dxy_state(
-    dxy,
-    dxy_structure if "dxy_structure" in locals() else None
-)
-
-market_state = {
-    "dxy": dxy_state,
-
-    "btc": build_asset_state(
-        btc_plan,
-        "BTC",
-        dxy_state
-    ),
-
-    "paxg": build_asset_state(
-        paxg_plan,
-        "PAXG",
-        dxy_state
-    )
-}
-
-# ================= CONSTRAINTS =================
-
-constraints = build_constraints(market_state)
-market_state["constraints"] = constraints
-
-last_state = st.session_state.get("last_market_state")
-
 # ================= SMART EXHAUSTION ALERTS =================
 
 for asset in ["btc", "paxg"]:
@@ -974,37 +934,20 @@ for asset in ["btc", "paxg"]:
     ex = market_state[asset]["exhaustion"]
     macro = market_state[asset]["macro_effect"]
 
-    if ex == "WEAKENING":
-        st.warning(f"⚠️ {asset.upper()} trend weakening — pullback risk rising")
-
-    if ex == "EXHAUSTED":
-        st.error(f"🚨 {asset.upper()} trend exhausted — reversal risk elevated")
-
-    if ex == "COMPRESSION":
-        st.info(f"⚡ {asset.upper()} volatility compression — breakout or reversal soon")
-
-    if macro == "HEADWIND":
-        st.warning(f"🌪 {asset.upper()} facing macro pressure")
-
-
+    if ex == "WEAKENING":
+        st.warning(f"⚠️ {asset.upper()} trend weakening — pullback risk rising")
 
+    if ex == "EXHAUSTED":
+        st.error(f"🚨 {asset.upper()} trend exhausted — reversal risk elevated")
 
-# ================= SNAPSHOT + DIFF =================
+    if ex == "COMPRESSION":
+        st.info(f"⚡ {asset.upper()} volatility compression — breakout or reversal soon")
 
-last_state = st.session_state.get("last_market_state")
-last_timestamp = None
+    if macro == "HEADWIND":
+        st.warning(f"🌪 {asset.upper()} facing macro pressure")
 
-if last_state is None:
-    snapshot_payload = load_snapshot()
-    if snapshot_payload:
-        last_state = snapshot_payload.get("state")
-        last_timestamp = snapshot_payload.get("timestamp")
 
-st.session_state["last_market_state"] = copy.deepcopy(market_state)
-save_snapshot(market_state)
 
-market_state["last_snapshot_time"] = last_timestamp
-market_state["state_diff"] = diff_market_state(last_state, market_state)
 
 
 
@@ -1084,9 +1027,6 @@ if user_input:
     with st.chat_message("assistant"):
         with st.spinner("Analyzing assets..."):
 
-            if cmp is None:
-                cmp = compare_assets(exchange, asset1, asset2)
-
             mentor = agent.think(user_input, market_state)
 
             st.markdown(mentor)
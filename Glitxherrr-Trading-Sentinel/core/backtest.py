@@ -0,0 +1,414 @@
+# ============================================
+# backtest.py
+# Bar-by-bar replay of the trade planner over archived candles
+# ============================================
+
+import numpy as np
+import pandas as pd
+
+from core.constraints import build_constraints
+from core.indicator_state import IndicatorState
+from core.multi_asset import CANDLE_LIMIT, finish_plan, score_plan
+from core.parallel import get_process_pool
+from core.structure_engine import detect_structure_arrays
+from core.trade_planner import plan_context, plan_from_context
+from data.candle_archive import OHLCV, read_arrays
+from data.timeframes import timeframe_ms
+
+
+# No lookahead: one step per closed 15m bar, and at that step the 1H / 4H
+# frames only hold bars whose period had fully elapsed (open + period <=
+# 15m close). Orders from a step can only fill from the next 15m bar on,
+# and only on that bar: a limit order the next bar doesn't reach expires
+# unfilled, and the plan is evaluated again at that bar's close.
+#
+# This differs from the live planner on purpose: live plans read the
+# forming 1H / 4H candle (build_asset_plan, core.pipeline), while a
+# replay step can only know the bars that had closed. Live results are
+# therefore not reproduced bar for bar while an HTF candle is forming.
+#
+# Per step only the price-dependent half of the plan is rebuilt
+# (plan_from_context). The 1H context, 4H structure and both momentum
+# engines (IndicatorState) only advance when one of their bars closes,
+# and the frames handed to the planner are iloc windows over one
+# DataFrame per timeframe, not copies.
+#
+# Derivatives history isn't archived, so plans carry no funding / OI /
+# long-short data; score_plan() simply skips those terms.
+
+WINDOW = CANDLE_LIMIT      # bars per HTF frame, same as the live planner
+MIN_BARS = 30              # HTF bars required before the first step
+
+TARGET1_SHARE = 0.5        # closed at target1, the rest runs to target2
+FEE_BPS = 4.0              # per side, taken off pnl_pct
+
+
+# ============================================================
+# Data
+# ============================================================
+
+def load_history(exchange: str, symbol: str, start=None, end=None, root=None) -> dict:
+    """
+    {tf: (ts int64[n], ohlcv float64[5, n])} from the candle archive.
+    1H / 4H start WINDOW 4H-bars earlier so the first step has full frames.
+    """
+    warm_start = None
+    if start is not None:
+        warm_start = pd.Timestamp(start) - pd.Timedelta(milliseconds=WINDOW * timeframe_ms("4h"))
+
+    history = {
+        "15m": read_arrays(exchange, symbol, "15m", start, end, root=root),
+        "1h": read_arrays(exchange, symbol, "1h", warm_start, end, root=root),
+        "4h": read_arrays(exchange, symbol, "4h", warm_start, end, root=root),
+    }
+
+    for tf, (ts, _) in history.items():
+        if len(ts) == 0:
+            raise ValueError(f"No archived {tf} candles for {symbol} (run data.backfill first)")
+
+    return history
+
+
+def _frame(ts: np.ndarray, ohlcv: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame(ohlcv.T, columns=OHLCV, copy=False)
+    df.insert(0, "timestamp", ts.view("datetime64[ms]"))
+    return df
+
+
+def _bars(ts: np.ndarray, ohlcv: np.ndarray) -> list:
+    return list(zip(ts.tolist(), *(row.tolist() for row in ohlcv)))
+
+
+# ============================================================
+# Fills
+# ============================================================
+
+def _open_position(order: dict, i: int, open_: float) -> dict:
+    long = order["direction"] == "LONG"
+
+    # Limit order: a gap through the entry fills at the open
+    fill = min(open_, order["entry"]) if long else max(open_, order["entry"])
+
+    return {
+        **order,
+        "sign": 1.0 if long else -1.0,
+        "fill": fill,
+        "active_stop": order["stop"],
+        "entry_bar": i,
+        "remaining": 1.0,
+        "realized": 0.0,
+        "hit_target1": False,
+    }
+
+
+def _exit(pos: dict, share: float, price: float):
+    pos["realized"] += share * (price - pos["fill"]) * pos["sign"]
+    pos["remaining"] -= share
+
+
+def _reached(pos: dict, level: float, high: float, low: float) -> bool:
+    return high >= level if pos["sign"] > 0 else low <= level
+
+
+def _manage(pos: dict, open_: float, high: float, low: float, fill_bar: bool) -> str:
+    """
+    Applies one bar to an open position. Returns the exit reason once the
+    position is flat, else None. Inside a bar the stop is assumed to trade
+    first, and on the fill bar only the stop is checked (both pessimistic).
+    An open beyond the stop exits at the open, including on the fill bar,
+    where a limit order gapped through fills there as well.
+    """
+    stop = pos["active_stop"]
+    long = pos["sign"] > 0
+
+    if (low <= stop) if long else (high >= stop):
+        gapped = (open_ <= stop) if long else (open_ >= stop)
+        _exit(pos, pos["remaining"], open_ if gapped else stop)
+        return "breakeven" if pos["hit_target1"] and stop == pos["fill"] else "stop"
+
+    if fill_bar:
+        return None
+
+    if not pos["hit_target1"] and _reached(pos, pos["target1"], high, low):
+        pos["hit_target1"] = True
+        _exit(pos, TARGET1_SHARE, pos["target1"])
+        pos["active_stop"] = pos["fill"]
+
+    if pos["hit_target1"] and _reached(pos, pos["target2"], high, low):
+        _exit(pos, pos["remaining"], pos["target2"])
+        return "target2"
+
+    return None
+
+
+def _close_trade(pos: dict, reason: str, exit_bar: int, ts15: np.ndarray, fee_bps: float) -> dict:
+    risk = abs(pos["fill"] - pos["stop"])
+
+    return {
+        "symbol": pos["symbol"],
+        "direction": pos["direction"],
+        "decision": pos["decision"],
+        "score": pos["score"],
+        "signal_time": pd.Timestamp(int(ts15[pos["signal_bar"]]), unit="ms"),
+        "entry_time": pd.Timestamp(int(ts15[pos["entry_bar"]]), unit="ms"),
+        "exit_time": pd.Timestamp(int(ts15[exit_bar]), unit="ms"),
+        "bars_held": exit_bar - pos["entry_bar"] + 1,
+        "entry": pos["entry"],
+        "fill": pos["fill"],
+        "stop": pos["stop"],
+        "target1": pos["target1"],
+        "target2": pos["target2"],
+        "planned_rr": pos["rr"],
+        "hit_target1": pos["hit_target1"],
+        "outcome": reason,
+        "r": round(pos["realized"] / risk, 4) if risk else 0.0,
+        "pnl_pct": round(pos["realized"] / pos["fill"] * 100 - 2 * fee_bps / 100, 4),
+    }
+
+
+# ============================================================
+# Replay
+# ============================================================
+
+def replay(
+    symbol: str,
+    history: dict,
+    start=None,
+    decisions=("TRADE",),
+    min_score: float = None,
+    use_constraints: bool = True,
+    fee_bps: float = FEE_BPS,
+) -> dict:
+    """
+    Walks history["15m"] bar by bar, evaluating the full plan (trade plan,
+    momentum layers, 4H structure, decision, score, constraints) at every
+    close while flat, and simulating entry / stop / target1 / target2.
+
+    history: load_history() output. Only orders whose decision is in
+    `decisions` (and score >= min_score) are placed; with use_constraints,
+    shorts also need build_constraints()["allow_shorts"]. An order is good
+    for the next 15m bar only.
+    """
+    ts15, px15 = history["15m"]
+    ts1, px1 = history["1h"]
+    ts4, px4 = history["4h"]
+
+    open15, high15, low15, close15 = (px15[k].tolist() for k in range(4))
+
+    frame_1h = _frame(ts1, px1)
+    frame_4h = _frame(ts4, px4)
+    high4, low4, close4 = px4[1], px4[2], px4[3]
+
+    # HTF bars closed by each 15m close
+    close_at = ts15 + timeframe_ms("15m")
+    seen_1h = np.searchsorted(ts1 + timeframe_ms("1h"), close_at, side="right").tolist()
+    seen_4h = np.searchsorted(ts4 + timeframe_ms("4h"), close_at, side="right").tolist()
+
+    bars_1h = _bars(ts1, px1)
+    bars_4h = _bars(ts4, px4)
+
+    fast = IndicatorState("fast")
+    slow = IndicatorState("slow")
+
+    first = 0 if start is None else int(np.searchsorted(ts15, pd.Timestamp(start).value // 1_000_000))
+
+    pushed_1h = pushed_4h = 0
+    context_key = None
+    context = structure = mom_fast = mom_slow = None
+    allow_shorts = True
+
+    order = None
+    position = None
+    trades = []
+    steps = 0
+
+    for i in range(first, len(ts15)):
+
+        # ---------------- Orders / positions on this bar ----------------
+
+        if position is not None:
+            reason = _manage(position, open15[i], high15[i], low15[i], fill_bar=False)
+            if reason:
+                trades.append(_close_trade(position, reason, i, ts15, fee_bps))
+                position = None
+
+        elif order is not None:
+            long = order["direction"] == "LONG"
+            if (low15[i] <= order["entry"]) if long else (high15[i] >= order["entry"]):
+                position = _open_position(order, i, open15[i])
+                reason = _manage(position, open15[i], high15[i], low15[i], fill_bar=True)
+                if reason:
+                    trades.append(_close_trade(position, reason, i, ts15, fee_bps))
+                    position = None
+            order = None
+
+        if position is not None:
+            continue
+
+        # ---------------- Plan at this close ----------------
+
+        k1, k4 = seen_1h[i], seen_4h[i]
+        if k1 < MIN_BARS or k4 < MIN_BARS:
+            continue
+
+        steps += 1
+
+        if (k1, k4) != context_key:
+
+            if k1 > pushed_1h:
+                fast.extend(bars_1h[pushed_1h:k1])
+                pushed_1h = k1
+                mom_fast = fast.result()
+
+            if k4 > pushed_4h:
+                slow.extend(bars_4h[pushed_4h:k4])
+                pushed_4h = k4
+                mom_slow = slow.result()
+
+                lo = max(0, k4 - WINDOW)
+                structure = detect_structure_arrays(high4[lo:k4], low4[lo:k4], close4[lo:k4])
+
+            context = plan_context(
+                frame_1h.iloc[max(0, k1 - WINDOW):k1],
+                frame_4h.iloc[max(0, k4 - WINDOW):k4],
+            )
+
+            allow_shorts = build_constraints({
+                "btc": {"structure": structure, "momentum": mom_fast, "derivatives": {}},
+            })["allow_shorts"]
+
+            context_key = (k1, k4)
+
+        plan = plan_from_context(symbol, close15[i], context, {})
+        plan = finish_plan(plan, mom_fast, mom_slow, structure)
+
+        if plan["decision"] not in decisions or plan["direction"] not in ("LONG", "SHORT"):
+            continue
+        if plan["entry"] is None or plan["stop"] is None or plan["target1"] is None:
+            continue
+        if use_constraints and plan["direction"] == "SHORT" and not allow_shorts:
+            continue
+
+        score = score_plan(plan)
+        if min_score is not None and score < min_score:
+            continue
+
+        order = {
+            "symbol": symbol,
+            "direction": plan["direction"],
+            "decision": plan["decision"],
+            "score": score,
+            "entry": plan["entry"],
+            "stop": plan["stop"],
+            "target1": plan["target1"],
+            "target2": plan["target2"] if plan["target2"] is not None else plan["target1"],
+            "rr": plan["rr"],
+            "signal_bar": i,
+        }
+
+    if position is not None:
+        _exit(position, position["remaining"], close15[-1])
+        trades.append(_close_trade(position, "end", len(ts15) - 1, ts15, fee_bps))
+
+    return {
+        "symbol": symbol,
+        "bars": len(ts15) - first,
+        "steps": steps,
+        **summarize(trades),
+        "trade_log": trades,
+    }
+
+
+# ============================================================
+# Reporting
+# ============================================================
+
+def summarize(trades: list) -> dict:
+    """
+    PnL, hit rate (target1 reached) and RR over a list of trades.
+    """
+    n = len(trades)
+
+    if not n:
+        return {
+            "trades": 0, "wins": 0, "losses": 0,
+            "hit_rate": None, "win_rate": None,
+            "total_r": 0.0, "avg_r": None,
+            "avg_planned_rr": None, "payoff_ratio": None,
+            "pnl_pct": 0.0, "max_drawdown_r": 0.0,
+        }
+
+    r = np.array([t["r"] for t in trades], dtype=float)
+    wins, losses = r[r > 0], r[r < 0]
+
+    planned = [t["planned_rr"] for t in trades if t["planned_rr"] is not None]
+
+    equity = np.cumsum(r)
+    drawdown = np.maximum.accumulate(np.r_[0.0, equity])[1:] - equity
+
+    return {
+        "trades": n,
+        "wins": int(len(wins)),
+        "losses": int(len(losses)),
+        "hit_rate": round(sum(t["hit_target1"] for t in trades) / n, 4),
+        "win_rate": round(len(wins) / n, 4),
+        "total_r": round(float(r.sum()), 2),
+        "avg_r": round(float(r.mean()), 3),
+        "avg_planned_rr": round(float(np.mean(planned)), 2) if planned else None,
+        "payoff_ratio": (
+            round(float(wins.mean() / -losses.mean()), 2)
+            if len(wins) and len(losses) else None
+        ),
+        "pnl_pct": round(float(sum(t["pnl_pct"] for t in trades)), 2),
+        "max_drawdown_r": round(float(drawdown.max()), 2),
+    }
+
+
+# ============================================================
+# Entry points
+# ============================================================
+
+def backtest_symbol(exchange: str, symbol: str, start=None, end=None, root=None, **options) -> dict:
+    history = load_history(exchange, symbol, start, end, root)
+    return replay(symbol, history, start=start, **options)
+
+
+def backtest(
+    exchange: str,
+    symbols: list,
+    start=None,
+    end=None,
+    processes: int = 0,
+    root=None,
+    **options,
+) -> dict:
+    """
+    Replays every symbol (on the shared process pool when processes > 0)
+    and aggregates the trades. A failing symbol is reported, not raised.
+    """
+    symbols = list(dict.fromkeys(symbols))
+
+    if processes:
+        pool = get_process_pool(processes)
+        jobs = {
+            symbol: pool.submit(backtest_symbol, exchange, symbol, start, end, root, **options)
+            for symbol in symbols
+        }
+        run = lambda symbol: jobs[symbol].result()
+    else:
+        run = lambda symbol: backtest_symbol(exchange, symbol, start, end, root, **options)
+
+    results = {}
+
+    for symbol in symbols:
+        try:
+            results[symbol] = run(symbol)
+        except Exception as e:
+            results[symbol] = {"symbol": symbol, "error": str(e), "trade_log": []}
+
+    trades = [t for res in results.values() for t in res["trade_log"]]
+
+    return {
+        "symbols": results,
+        "summary": summarize(trades),
+    }
@@ -0,0 +1,501 @@
+# ============================================
+# batch.py
+# Vectorized momentum / exhaustion / decision over (symbols x bars)
+# ============================================
+
+import itertools
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core.indicator_state import ENGINES, ATR_PERIOD, BB_PERIOD, BB_MULT, MA_PERIOD, PERSISTENCE, SQUEEZE_MIN_HIST
+from data.timeframes import timeframe_ms
+
+
+# Every function here takes 2-D float arrays shaped (symbols, bars) and
+# returns arrays of the same shape, one value per bar with no lookahead.
+# Indicators are computed once (fast_indicators / slow_indicators);
+# the thresholds are applied afterwards (fast_regime, slow_regime,
+# decision_codes, exhaustion_codes) and may be arrays with extra leading
+# axes, so a whole parameter grid is evaluated as one broadcast
+# (see param_grid / sweep).
+#
+# Every bar is evaluated the way momentum_score_1h / momentum_score would
+# have been at its close: bandwidths are ranked against the window that
+# precedes the bar, and the squeeze persistence re-ranks the previous
+# bars against that same window too (squeeze_percentile_lag1, _lag2, ...),
+# as those engines do. The squeeze therefore matches them on every bar,
+# for a persistence of up to PERSISTENCE bars.
+
+PARAMS = {
+    # core.momentum
+    "squeeze_pctile": 15.0,       # bandwidth percentile <= this is a squeeze
+    "persistence": 3,             # bars a squeeze must last
+    "sideways_atr": 0.25,         # ATR% below this is sideways (fast + slow)
+    "sideways_vol": 0.85,         # fast: volume spike below this is sideways
+    "sideways_energy": 35.0,      # slow: OBV energy percentile below this
+    "breakout_energy": 55.0,      # slow: squeeze + energy above this = breakout watch
+
+    # core.multi_asset.decision_label
+    "dead_vol": 0.9,
+    "trend_atr": 0.12,
+    "trend_vol": 1.1,
+
+    # core.exhaustion
+    "exhaustion_atr": 0.30,
+    "exhaustion_vol": 1.0,
+    "drive_atr": 0.35,
+    "drive_vol": 1.1,
+    "crowded_funding_bps": 8.0,
+    "crowded_long_ratio": 1.8,
+    "crowded_short_ratio": 0.6,
+
+    # core.constraints volume states
+    "ignition_vol": 1.6,
+    "building_vol": 1.2,
+    "thin_vol": 0.7,
+}
+
+DECISIONS = np.array(["AVOID", "WATCH", "TRADE"])
+AVOID, WATCH, TRADE = 0, 1, 2
+
+EXHAUSTION = np.array(["HEALTHY", "WEAKENING", "EXHAUSTED", "COMPRESSION"])
+HEALTHY, WEAKENING, EXHAUSTED, COMPRESSION = 0, 1, 2, 3
+
+VOLUME_STATES = np.array(["dead", "thin", "building", "ignition"])
+
+LONG, SHORT = 1, -1
+
+
+# ============================================================
+# Array helpers (all along the last axis)
+# ============================================================
+
+def _param(params: dict, name: str):
+    return (params or {}).get(name, PARAMS[name])
+
+
+def _shift(x: np.ndarray, k: int, fill=np.nan) -> np.ndarray:
+    out = np.full_like(x, fill, dtype=float)
+    out[..., k:] = x[..., :x.shape[-1] - k]
+    return out
+
+
+def _rolling(x: np.ndarray, window: int, reduce) -> np.ndarray:
+    """
+    reduce() over the trailing `window` bars; NaN until the window is full.
+    """
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= window:
+        out[..., window - 1:] = reduce(sliding_window_view(x, window, axis=-1), axis=-1)
+    return out
+
+
+def _rolling_rank(values: np.ndarray, window: int, min_hist: int, fill: float, lags: int = 1):
+    """
+    Percent of the previous `window` non-NaN values strictly below each
+    value; `fill` where fewer than `min_hist` exist. Row by row to bound
+    memory at bars x window.
+
+    lags > 1 returns a list: entry k ranks the value k bars back against
+    the same window (the one preceding the current bar).
+    """
+    outs = [np.full(values.shape, fill) for _ in range(lags)]
+    flat = values.reshape(-1, values.shape[-1])
+
+    for r, vals in enumerate(flat):
+        padded = np.concatenate([np.full(window, np.nan), vals[:-1]])
+        hist = sliding_window_view(padded, window)
+
+        valid = (~np.isnan(hist)).sum(axis=1)
+        enough = valid >= max(min_hist, 1)
+
+        for k, out in enumerate(outs):
+            lagged = _shift(vals, k) if k else vals
+
+            below = (hist < lagged[:, None]).sum(axis=1)
+
+            ok = enough & ~np.isnan(lagged)
+            out.reshape(flat.shape)[r, ok] = below[ok] / valid[ok] * 100
+
+    return outs if lags > 1 else outs[0]
+
+
+def _pandas_rolling(x: np.ndarray, window: int, reduce: str, **kwargs) -> np.ndarray:
+    """
+    pandas rolling `reduce` along the last axis. Same running sums as the
+    Series.rolling() calls in core.momentum, so the values match bit for bit.
+    """
+    frame = pd.DataFrame(x.reshape(-1, x.shape[-1]).T)
+    out = getattr(frame.rolling(window), reduce)(**kwargs)
+    return out.to_numpy().T.reshape(x.shape)
+
+
+def _bar_count(close: np.ndarray) -> np.ndarray:
+    return np.cumsum(~np.isnan(close), axis=-1)
+
+
+# ============================================================
+# Stacking
+# ============================================================
+
+def stack_frames(frames: dict) -> tuple:
+    """
+    {symbol: fetch_ohlcv()-style df} of one timeframe ->
+    (symbols, ts int64[bars], {"open"...: float64[symbols, bars]})
+    on the union of timestamps; missing bars are NaN.
+    """
+    symbols = list(frames)
+
+    stamps = [
+        frames[s]["timestamp"].to_numpy().astype("datetime64[ms]").view(np.int64)
+        for s in symbols
+    ]
+    ts = np.unique(np.concatenate(stamps)) if stamps else np.empty(0, dtype=np.int64)
+
+    columns = {c: np.full((len(symbols), len(ts)), np.nan) for c in ("open", "high", "low", "close", "volume")}
+
+    for row, (symbol, stamp) in enumerate(zip(symbols, stamps)):
+        pos = np.searchsorted(ts, stamp)
+        for c, arr in columns.items():
+            arr[row, pos] = frames[symbol][c].to_numpy(dtype=float)
+
+    return symbols, ts, columns
+
+
+def align(values: np.ndarray, ts_src: np.ndarray, tf_src: str, ts_dst: np.ndarray, tf_dst: str) -> np.ndarray:
+    """
+    Maps per-bar values of a higher timeframe onto a lower one: each
+    destination bar gets the last source bar closed by its own close.
+    """
+    closed = np.searchsorted(ts_src + timeframe_ms(tf_src), ts_dst + timeframe_ms(tf_dst), side="right") - 1
+
+    out = np.take(values, np.maximum(closed, 0), axis=-1)
+
+    if out.dtype == bool:
+        out[..., closed < 0] = False
+    else:
+        out = out.astype(float)
+        out[..., closed < 0] = np.nan
+
+    return out
+
+
+def align_indicators(ind: dict, ts_src: np.ndarray, tf_src: str, ts_dst: np.ndarray, tf_dst: str) -> dict:
+    """
+    align() for every array of a slow_indicators() / fast_indicators() dict.
+    """
+    return {name: align(values, ts_src, tf_src, ts_dst, tf_dst) for name, values in ind.items()}
+
+
+# ============================================================
+# Indicators
+# ============================================================
+
+def _common(high, low, close, volume, engine: str) -> dict:
+    p = ENGINES[engine]
+    count = _bar_count(close)
+
+    prev_close = _shift(close, 1)
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    atr = _pandas_rolling(tr, ATR_PERIOD, "mean")
+
+    moves = np.nan_to_num(np.sign(close - prev_close) * volume)
+    obv = np.cumsum(moves, axis=-1)
+
+    window = p["slope_window"]
+    slope = np.where(count >= window + 1, (obv - _shift(obv, window - 1)) / window, 0.0)
+
+    ma = _pandas_rolling(close, BB_PERIOD, "mean")
+    std = _pandas_rolling(close, BB_PERIOD, "std", ddof=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bandwidth = ((ma + BB_MULT * std) - (ma - BB_MULT * std)) / ma
+    ranks = _rolling_rank(bandwidth, p["squeeze_lookback"], SQUEEZE_MIN_HIST, 100.0, lags=PERSISTENCE)
+
+    out = {
+        "close": close,
+        "valid": count >= p["min_bars"],
+        "atr_pct": atr / close * 100,
+        "obv": obv,
+        "obv_slope": np.nan_to_num(slope),
+        "squeeze_percentile": ranks[0],
+    }
+
+    for k in range(1, PERSISTENCE):
+        out[f"squeeze_percentile_lag{k}"] = ranks[k]
+
+    return out
+
+
+def fast_indicators(high, low, close, volume) -> dict:
+    """
+    Raw 1H engine inputs (momentum_score_1h) per bar.
+    """
+    out = _common(high, low, close, volume, "fast")
+
+    median = _rolling(volume, ENGINES["fast"]["volume_window"], np.median)
+    spike = np.where(median > 0, volume / np.where(median > 0, median, 1.0), 1.0)
+    out["vol_spike"] = np.clip(np.nan_to_num(spike, nan=1.0), 0.0, 5.0)
+
+    return out
+
+
+def slow_indicators(high, low, close, volume) -> dict:
+    """
+    Raw 4H engine inputs (momentum_score) per bar.
+    """
+    p = ENGINES["slow"]
+    out = _common(high, low, close, volume, "slow")
+
+    moves = np.abs(out["obv"] - _shift(out["obv"], 1))
+    moves[..., 0] = np.nan
+    energy = _rolling(moves, p["energy_window"], np.sum)
+
+    out["energy_pctile"] = _rolling_rank(energy, p["energy_lookback"], 1, 50.0)
+    out["ma20"] = _pandas_rolling(close, MA_PERIOD, "mean")
+
+    return out
+
+
+# ============================================================
+# Regimes (thresholds broadcast against the indicator arrays)
+# ============================================================
+
+def _squeeze(ind: dict, params: dict) -> np.ndarray:
+    """
+    The current bar and the `persistence` - 1 before it all rank at or
+    below squeeze_pctile against the current bar's window.
+    """
+    pctile = _param(params, "squeeze_pctile")
+    persistence = _param(params, "persistence")
+
+    if np.ndim(persistence):
+        raise ValueError("persistence can't be swept; run one sweep per value")
+
+    persistence = int(persistence)
+    if persistence > PERSISTENCE:
+        raise ValueError(f"persistence above {PERSISTENCE} bars isn't precomputed")
+
+    squeeze = ind["squeeze_percentile"] <= pctile
+    for k in range(1, persistence):
+        squeeze = squeeze & (ind[f"squeeze_percentile_lag{k}"] <= pctile)
+
+    return squeeze
+
+
+def fast_regime(ind: dict, params: dict = None) -> dict:
+    """
+    _fast_regime() per bar: flow, squeeze, sideways.
+    """
+    squeeze = _squeeze(ind, params)
+
+    sideways = (
+        (ind["atr_pct"] < _param(params, "sideways_atr"))
+        & (ind["vol_spike"] < _param(params, "sideways_vol"))
+        & ~squeeze
+    )
+
+    return {
+        "atr_pct": ind["atr_pct"],
+        "vol_spike": ind["vol_spike"],
+        "flow": np.sign(ind["obv_slope"]),
+        "bb_squeeze": squeeze,
+        "sideways": sideways | ~ind["valid"],
+    }
+
+
+def slow_regime(ind: dict, params: dict = None) -> dict:
+    """
+    _slow_regime() per bar: sideways, breakout watch / direction, score.
+    """
+    squeeze = _squeeze(ind, params)
+    energy = ind["energy_pctile"]
+    slope = ind["obv_slope"]
+
+    sideways = (
+        (ind["atr_pct"] < _param(params, "sideways_atr"))
+        & (energy < _param(params, "sideways_energy"))
+        & ~squeeze
+    )
+
+    breakout_watch = squeeze & (energy > _param(params, "breakout_energy"))
+
+    trend = np.where(ind["close"] > ind["ma20"], 1, -1)
+    flow = np.sign(slope)
+    breakout_direction = np.where(squeeze, np.where(flow != 0, flow, trend), 0)
+
+    score = (
+        (energy - 50) / 50 * 4.0
+        + np.sign(slope) * 1.5
+        - 4.5 * sideways
+        + 1.5 * squeeze
+        + 4.0 * breakout_watch
+    )
+    score = np.clip(score, -10.0, 10.0)
+
+    valid = ind["valid"]
+
+    return {
+        "bb_squeeze": squeeze & valid,
+        "sideways_regime": sideways | ~valid,
+        "breakout_watch": breakout_watch & valid,
+        "breakout_direction": np.where(valid, breakout_direction, 0),
+        "momentum_score": np.where(valid, score, -5.0),
+    }
+
+
+def volume_states(vol_spike: np.ndarray, params: dict = None) -> np.ndarray:
+    """
+    Index into VOLUME_STATES (core.constraints._volume_state).
+    """
+    return (
+        (vol_spike >= _param(params, "thin_vol")).astype(np.int8)
+        + (vol_spike >= _param(params, "building_vol"))
+        + (vol_spike >= _param(params, "ignition_vol"))
+    )
+
+
+# ============================================================
+# Direction / Decision / Exhaustion
+# ============================================================
+
+def plan_direction(bias_4h: np.ndarray, bias_1h: np.ndarray) -> np.ndarray:
+    """
+    build_trade_plan()'s HTF direction (LONG / SHORT / 0 = WAIT), before
+    its zone checks.
+    """
+    return np.where(
+        (bias_4h == 1) & (bias_1h >= 0), LONG,
+        np.where((bias_4h == -1) & (bias_1h <= 0), SHORT, 0),
+    )
+
+
+def decision_codes(fast: dict, slow: dict, direction: np.ndarray, params: dict = None) -> np.ndarray:
+    """
+    decision_label() per bar, as indices into DECISIONS.
+    """
+    squeeze = fast["bb_squeeze"]
+    spike = fast["vol_spike"]
+    breakout = slow["breakout_watch"]
+
+    avoid = fast["sideways"] & (spike < _param(params, "dead_vol")) & ~squeeze
+    compression = squeeze & ~breakout
+    trend = (direction != 0) & (fast["atr_pct"] >= _param(params, "trend_atr")) & (spike >= _param(params, "trend_vol"))
+
+    return np.where(
+        avoid, AVOID,
+        np.where(compression, WATCH, np.where(breakout | trend, TRADE, WATCH)),
+    ).astype(np.int8)
+
+
+def exhaustion_codes(
+    fast: dict,
+    trend: np.ndarray = None,
+    extended: np.ndarray = None,
+    funding_bps: np.ndarray = None,
+    long_short_ratio: np.ndarray = None,
+    params: dict = None,
+) -> np.ndarray:
+    """
+    detect_exhaustion() per bar, as indices into EXHAUSTION.
+
+    Live callers hand detect_exhaustion() one momentum dict at a time, so
+    its 3-bar persistence never completes there: COMPRESSION is never
+    returned and EXHAUSTED needs a weakness score of 3. Bars are scored
+    on their own here the same way.
+
+    trend: 1 Uptrend / -1 Downtrend / 0; extended: structure state is
+    Higher Highs / Lower Lows. Both default to neutral. The derivatives
+    arrays are optional (NaN = unknown).
+    """
+    atr = fast["atr_pct"]
+    vol = fast["vol_spike"]
+
+    compression = fast["bb_squeeze"] | fast["sideways"]
+    weak_atr = atr < _param(params, "exhaustion_atr")
+    weak_vol = vol < _param(params, "exhaustion_vol")
+
+    weakness = compression.astype(np.int8) + weak_atr + weak_vol
+
+    if trend is not None:
+        trending = trend != 0
+
+        if extended is not None:
+            losing = trending & extended & (
+                (atr < _param(params, "drive_atr")) | (vol < _param(params, "drive_vol"))
+            )
+            weakness = weakness + losing
+
+        crowded = _param(params, "crowded_funding_bps")
+
+        if funding_bps is not None:
+            weakness = weakness + ((trend == 1) & (funding_bps >= crowded))
+            weakness = weakness + ((trend == -1) & (funding_bps <= -crowded))
+
+        if long_short_ratio is not None:
+            weakness = weakness + ((trend == 1) & (long_short_ratio >= _param(params, "crowded_long_ratio")))
+            weakness = weakness + ((trend == -1) & (long_short_ratio <= _param(params, "crowded_short_ratio")))
+
+    return np.where(
+        weakness >= 3, EXHAUSTED,
+        np.where(weakness >= 2, WEAKENING, HEALTHY),
+    ).astype(np.int8)
+
+
+# ============================================================
+# Parameter sweeps
+# ============================================================
+
+def param_grid(**axes) -> tuple:
+    """
+    param_grid(squeeze_pctile=[10, 15, 20], trend_vol=[1.0, 1.1, 1.2])
+    -> (params, combos): params maps each name to an array shaped
+    (combinations, 1, 1) that broadcasts against (symbols, bars);
+    combos is the matching DataFrame, one row per combination.
+    """
+    names = list(axes)
+    combos = pd.DataFrame(list(itertools.product(*axes.values())), columns=names)
+
+    params = {name: combos[name].to_numpy()[:, None, None] for name in names}
+    return params, combos
+
+
+def sweep(
+    fast_ind: dict,
+    slow_ind: dict,
+    direction: np.ndarray,
+    forward_returns: np.ndarray = None,
+    **axes,
+) -> pd.DataFrame:
+    """
+    Decision mix (and, given forward_returns shaped like direction, the
+    mean direction-signed forward return of TRADE bars) for every
+    combination of the swept thresholds, in one broadcast per stage.
+
+    slow_ind must already be aligned onto the fast bars (align()).
+    """
+    params, combos = param_grid(**axes)
+
+    fast = fast_regime(fast_ind, params)
+    slow = slow_regime(slow_ind, params)
+    codes = decision_codes(fast, slow, direction, params)
+
+    usable = fast_ind["valid"] & slow_ind["valid"]
+    bars = max(int(usable.sum()), 1)
+
+    trade = (codes == TRADE) & usable
+
+    combos["trade_share"] = trade.sum(axis=(-2, -1)) / bars
+    combos["watch_share"] = ((codes == WATCH) & usable).sum(axis=(-2, -1)) / bars
+    combos["avoid_share"] = ((codes == AVOID) & usable).sum(axis=(-2, -1)) / bars
+
+    if forward_returns is not None:
+        signed = np.where(trade & (direction != 0) & ~np.isnan(forward_returns), direction * forward_returns, np.nan)
+        n = (~np.isnan(signed)).sum(axis=(-2, -1))
+
+        combos["trade_bars"] = n
+        combos["avg_forward_return"] = np.where(n > 0, np.nansum(signed, axis=(-2, -1)) / np.maximum(n, 1), np.nan)
+        combos["forward_hit_rate"] = np.where(n > 0, (signed > 0).sum(axis=(-2, -1)) / np.maximum(n, 1), np.nan)
+
+    return combos
@@ -0,0 +1,166 @@
+# ============================================
+# graph.py
+# Dependency-tracked recompute: a node only re-runs when an input changed
+# ============================================
+
+import threading
+
+
+# Inputs are set from outside with set(); computed nodes are plain
+# functions of their dependencies' values. Every node carries a version
+# that only moves when its value *changes*:
+#
+# - an input compares fingerprint(value) with the previous one, so e.g. a
+#   refetched 4H frame whose last bar is the same doesn't count as new;
+# - a computed node re-runs when any dependency version moved, and then
+#   compares its result (or its fingerprint) with the previous result, so
+#   an unchanged result stops the change from spreading downstream.
+#
+# A failing node raises out of get() and keeps its previous state, so the
+# next get() simply tries again.
+
+_PLAIN = (dict, list, tuple, str, int, float, bool, type(None))
+
+
+def same(a, b) -> bool:
+    """
+    Value equality for plain data, identity for anything else
+    (DataFrames, arrays) unless a fingerprint says otherwise.
+    """
+    if a is b:
+        return True
+    if not isinstance(a, _PLAIN) or type(a) is not type(b):
+        return False
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+class Node:
+
+    __slots__ = ("name", "func", "deps", "fingerprint", "value", "print", "version", "seen")
+
+    def __init__(self, name: str, func=None, deps=(), fingerprint=None):
+        self.name = name
+        self.func = func               # None for inputs
+        self.deps = tuple(deps)
+        self.fingerprint = fingerprint
+
+        self.value = None
+        self.print = None
+        self.version = 0               # 0 = never set / computed
+        self.seen = None               # dependency versions of the last run
+
+
+class ComputeGraph:
+
+    def __init__(self):
+        self._nodes = {}
+        self._lock = threading.RLock()
+
+        self.recomputed = []           # node names re-run by the last get()
+        self.runs = {}                 # node name -> total runs
+
+    # ---------------- Definition ----------------
+
+    def input(self, name: str, fingerprint=None):
+        return self._add(Node(name, fingerprint=fingerprint))
+
+    def node(self, name: str, func, deps=(), fingerprint=None):
+        missing = [d for d in deps if d not in self._nodes]
+        if missing:
+            raise KeyError(f"Node '{name}' depends on unknown nodes {missing}")
+        return self._add(Node(name, func, deps, fingerprint))
+
+    def _add(self, node: Node):
+        with self._lock:
+            if node.name in self._nodes:
+                raise ValueError(f"Node '{node.name}' already defined")
+            self._nodes[node.name] = node
+        return node
+
+    # ---------------- Inputs ----------------
+
+    def set(self, name: str, value) -> bool:
+        """
+        Returns True when the input counts as changed.
+        """
+        with self._lock:
+            node = self._nodes[name]
+            if node.func is not None:
+                raise ValueError(f"'{name}' is computed, not an input")
+            return self._store(node, value)
+
+    def update(self, values: dict) -> list:
+        """
+        set() for several inputs; returns the names that changed.
+        """
+        with self._lock:
+            return [name for name, value in values.items() if self.set(name, value)]
+
+    # ---------------- Evaluation ----------------
+
+    def get(self, *names):
+        """
+        Value of one node, or a tuple for several, recomputing only
+        what is stale.
+        """
+        with self._lock:
+            self.recomputed = []
+            done = set()
+
+            for name in names:
+                self._evaluate(name, done)
+
+            values = tuple(self._nodes[name].value for name in names)
+
+        return values[0] if len(values) == 1 else values
+
+    def version(self, name: str) -> int:
+        return self._nodes[name].version
+
+    def _evaluate(self, name: str, done: set) -> int:
+        node = self._nodes[name]
+
+        if name in done:
+            return node.version
+
+        if node.func is None:
+            if node.version == 0:
+                raise KeyError(f"Input '{name}' has not been set")
+            done.add(name)
+            return node.version
+
+        seen = tuple(self._evaluate(dep, done) for dep in node.deps)
+
+        if seen != node.seen:
+            value = node.func(*(self._nodes[dep].value for dep in node.deps))
+            node.seen = seen
+            self._store(node, value)
+
+            self.recomputed.append(name)
+            self.runs[name] = self.runs.get(name, 0) + 1
+
+        done.add(name)
+        return node.version
+
+    def _store(self, node: Node, value) -> bool:
+        fp = node.fingerprint(value) if node.fingerprint is not None else value
+
+        if node.version and same(fp, node.print):
+            return False
+
+        node.value = value
+        node.print = fp
+        node.version += 1
+        return True
+
+    def invalidate(self):
+        """
+        Forgets every computed result (inputs are kept).
+        """
+        with self._lock:
+            for node in self._nodes.values():
+                if node.func is not None:
+                    node.seen = None
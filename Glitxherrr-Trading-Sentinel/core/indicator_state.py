@@ -0,0 +1,452 @@
+# ============================================
+# indicator_state.py
+# Streaming (per-bar) momentum indicators
+# ============================================
+
+import bisect
+import math
+from collections import deque
+
+import pandas as pd
+
+from core.momentum import (
+    _fast_regime,
+    _slow_regime,
+    _safe_float,
+    FAST_DEFAULTS,
+    SLOW_DEFAULTS,
+    FAST_MIN_BARS,
+    SLOW_MIN_BARS,
+)
+
+
+# Same parameters the batch engines use
+ENGINES = {
+    "fast": {
+        "min_bars": FAST_MIN_BARS,
+        "squeeze_lookback": 80,
+        "slope_window": 20,
+        "volume_window": 30,
+    },
+    "slow": {
+        "min_bars": SLOW_MIN_BARS,
+        "squeeze_lookback": 140,
+        "slope_window": 40,
+        "energy_window": 40,
+        "energy_lookback": 180,
+    },
+}
+
+ATR_PERIOD = 14
+BB_PERIOD = 20
+BB_MULT = 2.0
+MA_PERIOD = 20
+
+SQUEEZE_PCTILE = 15.0
+SQUEEZE_MIN_HIST = 30
+PERSISTENCE = 3
+
+
+class _RankWindow:
+    """
+    Last `size` values in arrival order plus a sorted copy for
+    "percent strictly below" queries. NaNs occupy a slot but are not ranked.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.ranked = []
+
+    def append(self, x: float):
+        self.values.append(x)
+        if not math.isnan(x):
+            bisect.insort(self.ranked, x)
+
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            if not math.isnan(old):
+                del self.ranked[bisect.bisect_left(self.ranked, old)]
+
+    def __len__(self):
+        return len(self.ranked)
+
+    def copy(self) -> "_RankWindow":
+        out = _RankWindow(self.size)
+        out.values = deque(self.values)
+        out.ranked = list(self.ranked)
+        return out
+
+    def rank(self, x: float) -> float:
+        return bisect.bisect_left(self.ranked, x) / len(self.ranked) * 100
+
+
+class _RollingMoments:
+    """
+    Series.rolling(size).mean() / .var(ddof=0) of the pushed values, kept
+    the way pandas computes them: running Kahan sums (mean) and Welford
+    updates (variance) that add the new value and remove the one leaving
+    the window. The result depends on every value pushed so far, exactly
+    as pandas' does on a frame starting at the first push.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.window = deque()
+
+        self.nobs = 0
+        self.sum = 0.0
+        self.neg_ct = 0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_ct = 0
+        self.prev = None
+
+        self.mean_x = 0.0
+        self.ssqdm = 0.0
+        self.var_add = 0.0
+        self.var_remove = 0.0
+
+    def copy(self) -> "_RollingMoments":
+        out = _RollingMoments.__new__(_RollingMoments)
+        out.__dict__.update(self.__dict__)
+        out.window = deque(self.window)
+        return out
+
+    def append(self, x: float):
+        if len(self.window) == self.size:
+            self._remove(self.window.popleft())
+        self.window.append(x)
+
+        if self.prev is None:
+            self.prev = x
+        self._add(x)
+
+    def _add(self, x: float):
+        if math.isnan(x):
+            return
+
+        self.nobs += 1
+
+        y = x - self.comp_add
+        t = self.sum + y
+        self.comp_add = t - self.sum - y
+        self.sum = t
+
+        if math.copysign(1.0, x) < 0:
+            self.neg_ct += 1
+
+        # pandas snaps runs of one repeated value to that value
+        self.same_ct = self.same_ct + 1 if x == self.prev else 1
+        self.prev = x
+
+        prev_mean = self.mean_x - self.var_add
+        y = x - self.var_add
+        t = y - self.mean_x
+        self.var_add = t + self.mean_x - y
+        self.mean_x = self.mean_x + t / self.nobs
+        self.ssqdm = self.ssqdm + (x - prev_mean) * (x - self.mean_x)
+
+    def _remove(self, x: float):
+        if math.isnan(x):
+            return
+
+        self.nobs -= 1
+
+        y = -x - self.comp_remove
+        t = self.sum + y
+        self.comp_remove = t - self.sum - y
+        self.sum = t
+
+        if math.copysign(1.0, x) < 0:
+            self.neg_ct -= 1
+
+        if self.nobs:
+            prev_mean = self.mean_x - self.var_remove
+            y = x - self.var_remove
+            t = y - self.mean_x
+            self.var_remove = t + self.mean_x - y
+            self.mean_x = self.mean_x - t / self.nobs
+            self.ssqdm = self.ssqdm - (x - prev_mean) * (x - self.mean_x)
+        else:
+            self.mean_x = 0.0
+            self.ssqdm = 0.0
+
+    def mean(self) -> float:
+        if self.nobs < self.size:
+            return math.nan
+
+        if self.same_ct >= self.nobs:
+            return self.prev
+
+        out = self.sum / self.nobs
+        if self.neg_ct == 0 and out < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and out > 0:
+            return 0.0
+        return out
+
+    def std(self) -> float:
+        if self.nobs < self.size:
+            return math.nan
+        if self.nobs == 1 or self.same_ct >= self.nobs:
+            return 0.0
+
+        var = self.ssqdm / self.nobs
+        return math.sqrt(var) if var > 0 else 0.0
+
+
+def _copy_fields(fields: dict) -> dict:
+    """
+    Copy of the mutable per-bar state (bounded containers only).
+    """
+    out = {}
+
+    for key, value in fields.items():
+        if key == "_checkpoint":
+            continue
+        if isinstance(value, deque):
+            out[key] = deque(value, value.maxlen)
+        elif isinstance(value, (list, _RankWindow, _RollingMoments)):
+            out[key] = value.copy()
+        else:
+            out[key] = value
+
+    return out
+
+
+class IndicatorState:
+    """
+    Incremental equivalent of momentum_score (engine="slow") and
+    momentum_score_1h (engine="fast").
+
+    update() costs a bounded amount of work per bar (window sizes only),
+    independent of how much history has been pushed. Pushing a bar with
+    the same timestamp as the last one replaces it (forming candle).
+
+    Rolling means / bandwidths carry pandas' running sums from the first
+    pushed bar, so result() matches the engines bit for bit on a frame
+    holding the same bars.
+    """
+
+    def __init__(self, engine: str = "fast"):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'")
+
+        self.engine = engine
+        self.params = ENGINES[engine]
+
+        self.count = 0
+        self.last_ts = None
+        self.prev_close = None
+        self.obv = 0.0
+
+        self.bb = _RollingMoments(BB_PERIOD)
+        self.ma = _RollingMoments(MA_PERIOD)
+        self.atr = _RollingMoments(ATR_PERIOD)
+        self.obv_tail = deque(maxlen=self.params["slope_window"])
+
+        self.bw_recent = deque(maxlen=PERSISTENCE)
+        self.bw_hist = _RankWindow(self.params["squeeze_lookback"])
+
+        if engine == "fast":
+            self.volumes = deque(maxlen=self.params["volume_window"])
+            self.volumes_sorted = []
+        else:
+            self.obv_moves = deque(maxlen=self.params["energy_window"])
+            self.energy = math.nan
+            self.energy_hist = _RankWindow(self.params["energy_lookback"])
+
+        self._checkpoint = None
+
+    # ---------------- Construction ----------------
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, engine: str = "fast") -> "IndicatorState":
+        state = cls(engine)
+        state.extend(_frame_bars(df))
+        return state
+
+    # ---------------- Updates ----------------
+
+    def update(self, bar):
+        """
+        bar: (timestamp, open, high, low, close, volume)
+        """
+        ts = bar[0]
+
+        if self._checkpoint is not None and ts == self.last_ts:
+            # Same candle again: roll back to before it, then re-apply
+            self.__dict__.update(_copy_fields(self._checkpoint))
+        else:
+            self._checkpoint = _copy_fields(self.__dict__)
+
+        self._push(bar)
+
+    def extend(self, bars: list):
+        """
+        Bulk update. Only the first bar (may replace the forming candle)
+        and the last bar (needs a rollback point) pay for a checkpoint.
+        """
+        for i, bar in enumerate(bars):
+            if i == 0 or i == len(bars) - 1:
+                self.update(bar)
+            else:
+                self._checkpoint = None
+                self._push(bar)
+
+    def _push(self, bar):
+        ts, _, high, low, close, volume = bar
+        high, low, close, volume = float(high), float(low), float(close), float(volume)
+
+        prev_close = self.prev_close
+
+        # ---- ATR ----
+        if prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.atr.append(tr)
+
+        # ---- OBV ----
+        prev_obv = self.obv
+        if prev_close is None:
+            direction = 0.0
+        else:
+            direction = float((close > prev_close) - (close < prev_close))
+        self.obv += direction * volume
+        self.obv_tail.append(self.obv)
+
+        # ---- Bollinger bandwidth ----
+        self.bb.append(close)
+        self.ma.append(close)
+
+        if self.bw_recent:
+            self.bw_hist.append(self.bw_recent[-1])
+        self.bw_recent.append(self._bandwidth())
+
+        # ---- Engine specific ----
+        if self.engine == "fast":
+            if len(self.volumes) == self.volumes.maxlen:
+                old = self.volumes[0]
+                del self.volumes_sorted[bisect.bisect_left(self.volumes_sorted, old)]
+            self.volumes.append(volume)
+            bisect.insort(self.volumes_sorted, volume)
+
+        else:
+            self.energy_hist.append(self.energy)
+            if prev_close is not None:
+                self.obv_moves.append(abs(self.obv - prev_obv))
+            if len(self.obv_moves) == self.obv_moves.maxlen:
+                self.energy = math.fsum(self.obv_moves)
+            else:
+                self.energy = math.nan
+
+        self.prev_close = close
+        self.last_ts = ts
+        self.count += 1
+
+    # ---------------- Indicator reads ----------------
+
+    def _bandwidth(self) -> float:
+        ma = self.bb.mean()
+        std = self.bb.std()
+
+        upper = ma + BB_MULT * std
+        lower = ma - BB_MULT * std
+
+        return (upper - lower) / ma if ma else math.nan
+
+    def _atr_pct(self, price: float) -> float:
+        atr_val = _safe_float(self.atr.mean(), 0.0)
+        return (atr_val / price) * 100 if price else 0.0
+
+    def _slope(self) -> float:
+        window = self.params["slope_window"]
+        if self.count < window + 1:
+            return 0.0
+        return float((self.obv_tail[-1] - self.obv_tail[0]) / window)
+
+    def _squeeze(self):
+        """
+        (persisted squeeze flag, current percentile or None)
+        """
+        if len(self.bw_hist) < SQUEEZE_MIN_HIST:
+            return False, None
+
+        percentiles = [
+            100 if math.isnan(bw) else self.bw_hist.rank(bw)
+            for bw in self.bw_recent
+        ]
+
+        squeeze = len(percentiles) == PERSISTENCE and all(p <= SQUEEZE_PCTILE for p in percentiles)
+        return squeeze, round(percentiles[-1], 2)
+
+    def _vol_spike(self) -> float:
+        vols = self.volumes_sorted
+        n = len(vols)
+        mid = n // 2
+        median = vols[mid] if n % 2 else (vols[mid - 1] + vols[mid]) / 2
+
+        baseline = _safe_float(median, 0.0)
+        now = _safe_float(self.volumes[-1], 0.0)
+
+        vs = now / baseline if baseline > 0 else 1.0
+        return float(max(0.0, min(5.0, vs)))
+
+    # ---------------- Output ----------------
+
+    def result(self) -> dict:
+        """
+        Same dict as momentum_score_1h / momentum_score on the pushed bars.
+        """
+        if self.engine == "fast":
+            return self._fast_result()
+        return self._slow_result()
+
+    def _fast_result(self) -> dict:
+        if self.count < self.params["min_bars"]:
+            return dict(FAST_DEFAULTS)
+
+        price = self.prev_close
+        squeeze, percentile = self._squeeze()
+
+        return _fast_regime(
+            self._atr_pct(price),
+            self._vol_spike(),
+            self._slope(),
+            squeeze,
+            percentile,
+        )
+
+    def _slow_result(self) -> dict:
+        if self.count < self.params["min_bars"]:
+            return dict(SLOW_DEFAULTS)
+
+        price = self.prev_close
+        squeeze, percentile = self._squeeze()
+
+        energy_now = _safe_float(self.energy, 0.0)
+        energy_pctile = self.energy_hist.rank(energy_now) if len(self.energy_hist) else 50.0
+
+        ma20 = self.ma.mean()
+        ma20 = _safe_float(ma20, price)
+
+        return _slow_regime(
+            price,
+            self._slope(),
+            energy_pctile,
+            self._atr_pct(price),
+            squeeze,
+            percentile,
+            ma20,
+        )
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def _frame_bars(df: pd.DataFrame, start: int = 0) -> list:
+    cols = [df[c].to_numpy()[start:] for c in ("timestamp", "open", "high", "low", "close", "volume")]
+    return list(zip(*cols))
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 
 # ============================================================
@@ -21,6 +22,36 @@ def _percentile_rank(hist: np.ndarray, x: float) -> float:
     return float((hist < x).mean() * 100)
 
 
+def _percentile_series(values: np.ndarray, hist: np.ndarray) -> np.ndarray:
+    """
+    Percent of `hist` strictly below each value, via one sort + searchsorted.
+    NaN values map to 100 (never a squeeze).
+    """
+    ranked = np.sort(hist)
+    below = np.searchsorted(ranked, values, side="left")
+
+    out = below / len(ranked) * 100
+    out[np.isnan(values)] = 100
+    return out
+
+
+def _rolling_percentile_series(values: np.ndarray, window: int, min_hist: int = 30) -> np.ndarray:
+    """
+    Percent of the previous `window` values strictly below each value.
+    Bars with fewer than `min_hist` valid predecessors map to 100.
+    """
+    padded = np.concatenate([np.full(window, np.nan), values[:-1]])
+    hist = sliding_window_view(padded, window)
+
+    below = (hist < values[:, None]).sum(axis=1)
+    valid = (~np.isnan(hist)).sum(axis=1)
+
+    out = np.full(len(values), 100.0)
+    ok = (valid >= min_hist) & ~np.isnan(values)
+    out[ok] = below[ok] / valid[ok] * 100
+    return out
+
+
 def _apply_persistence(flags, required=3):
     count = 0
     out = []
@@ -91,7 +122,14 @@ def bollinger_squeeze(
     period: int = 20,
     mult: float = 2.0,
     squeeze_lookback: int = 120,
+    rolling: bool = False,
 ):
+    """
+    rolling=False: every bar is ranked against the latest `squeeze_lookback`
+                   bandwidths (original behaviour).
+    rolling=True:  every bar is ranked against its own preceding
+                   `squeeze_lookback` bandwidths (no lookahead).
+    """
 
     close = df["close"]
 
@@ -115,15 +153,16 @@ def bollinger_squeeze(
             "squeeze_series": [False] * len(df),
         }
 
-    percentiles = [
-        float((bw_hist.values < bw).mean() * 100)
-        if not np.isnan(bw) else 100
-        for bw in bandwidth
-    ]
+    bw = bandwidth.to_numpy(dtype=float)
+
+    if rolling:
+        percentiles = _rolling_percentile_series(bw, squeeze_lookback)
+    else:
+        percentiles = _percentile_series(bw, bw_hist.to_numpy(dtype=float))
 
-    squeeze_series = [p <= 15.0 for p in percentiles]
+    squeeze_series = (percentiles <= 15.0).tolist()
 
-    percentile_now = percentiles[-1]
+    percentile_now = 100 if np.isnan(bw_now) else float(percentiles[-1])
 
     return {
         "bb_width": round(float(bw_now), 6),
@@ -138,21 +177,26 @@ def bollinger_squeeze(
 # Regime, trend health, compression
 # ============================================================
 
+SLOW_MIN_BARS = 120
+
+SLOW_DEFAULTS = {
+    "trend_energy_pctile": 50.0,
+    "trend_slope": 0.0,
+    "bb_squeeze": False,
+    "bb_squeeze_percentile": None,
+    "sideways_regime": True,
+    "breakout_watch": False,
+    "breakout_direction": "NEUTRAL",
+    "momentum_score": -5.0,
+}
+
+
 def momentum_score(df_4h: pd.DataFrame) -> dict:
 
     df = df_4h.copy()
 
-    if len(df) < 120:
-        return {
-            "trend_energy_pctile": 50.0,
-            "trend_slope": 0.0,
-            "bb_squeeze": False,
-            "bb_squeeze_percentile": None,
-            "sideways_regime": True,
-            "breakout_watch": False,
-            "breakout_direction": "NEUTRAL",
-            "momentum_score": -5.0,
-        }
+    if len(df) < SLOW_MIN_BARS:
+        return dict(SLOW_DEFAULTS)
 
     price = float(df["close"].iloc[-1])
 
@@ -183,6 +227,23 @@ def momentum_score(df_4h: pd.DataFrame) -> dict:
 
     squeeze = squeeze_persisted[-1]
 
+    # ---------- Trend context ----------
+
+    ma20 = df["close"].rolling(20).mean().iloc[-1]
+    ma20 = _safe_float(ma20, price)
+
+    return _slow_regime(
+        price, obv_slope, energy_pctile, atr_pct,
+        squeeze, bb["squeeze_percentile"], ma20,
+    )
+
+
+def _slow_regime(price, obv_slope, energy_pctile, atr_pct, squeeze, squeeze_percentile, ma20) -> dict:
+    """
+    4H regime synthesis from already-computed indicators
+    (shared by the batch engine and core.indicator_state).
+    """
+
     # ---------- Sideways regime ----------
 
     sideways_regime = (
@@ -193,9 +254,6 @@ def momentum_score(df_4h: pd.DataFrame) -> dict:
 
     # ---------- Trend context ----------
 
-    ma20 = df["close"].rolling(20).mean().iloc[-1]
-    ma20 = _safe_float(ma20, price)
-
     trend_context = "UP" if price > ma20 else "DOWN"
 
     if obv_slope > 0:
@@ -245,7 +303,7 @@ def momentum_score(df_4h: pd.DataFrame) -> dict:
         "trend_energy_pctile": round(float(energy_pctile), 2),
         "trend_slope": round(float(obv_slope), 3),
         "bb_squeeze": squeeze,
-        "bb_squeeze_percentile": bb["squeeze_percentile"],
+        "bb_squeeze_percentile": squeeze_percentile,
         "sideways_regime": sideways_regime,
         "breakout_watch": breakout_watch,
         "breakout_direction": breakout_direction,
@@ -258,20 +316,25 @@ def momentum_score(df_4h: pd.DataFrame) -> dict:
 # Pressure & ignition
 # ============================================================
 
+FAST_MIN_BARS = 60
+
+FAST_DEFAULTS = {
+    "atr_pct": 0.0,
+    "vol_spike": 1.0,
+    "obv_slope": 0.0,
+    "flow_state": "NEUTRAL",
+    "bb_squeeze": False,
+    "bb_squeeze_percentile": None,
+    "sideways": True,
+}
+
+
 def momentum_score_1h(df_1h: pd.DataFrame) -> dict:
 
     df = df_1h.copy()
 
-    if len(df) < 60:
-        return {
-            "atr_pct": 0.0,
-            "vol_spike": 1.0,
-            "obv_slope": 0.0,
-            "flow_state": "NEUTRAL",
-            "bb_squeeze": False,
-            "bb_squeeze_percentile": None,
-            "sideways": True,
-        }
+    if len(df) < FAST_MIN_BARS:
+        return dict(FAST_DEFAULTS)
 
     price = float(df["close"].iloc[-1])
 
@@ -291,13 +354,6 @@ def momentum_score_1h(df_1h: pd.DataFrame) -> dict:
     obv = compute_obv(df)
     slope = fast_slope(obv, window=20)
 
-    if slope > 0:
-        flow = "UP"
-    elif slope < 0:
-        flow = "DOWN"
-    else:
-        flow = "NEUTRAL"
-
     # ---------- Fast compression (with persistence) ----------
 
     bb = bollinger_squeeze(df, squeeze_lookback=80)
@@ -307,6 +363,22 @@ def momentum_score_1h(df_1h: pd.DataFrame) -> dict:
 
     squeeze = squeeze_persisted[-1]
 
+    return _fast_regime(atr_pct, vs, slope, squeeze, bb["squeeze_percentile"])
+
+
+def _fast_regime(atr_pct, vs, slope, squeeze, squeeze_percentile) -> dict:
+    """
+    1H pressure synthesis from already-computed indicators
+    (shared by the batch engine and core.indicator_state).
+    """
+
+    if slope > 0:
+        flow = "UP"
+    elif slope < 0:
+        flow = "DOWN"
+    else:
+        flow = "NEUTRAL"
+
     # ---------- Fast sideways ----------
 
     sideways = (
@@ -321,6 +393,6 @@ def momentum_score_1h(df_1h: pd.DataFrame) -> dict:
         "obv_slope": round(float(slope), 3),
         "flow_state": flow,
         "bb_squeeze": squeeze,
-        "bb_squeeze_percentile": bb["squeeze_percentile"],
+        "bb_squeeze_percentile": squeeze_percentile,
         "sideways": sideways,
     }
@@ -1,4 +1,6 @@
-from data.market_data import fetch_ohlcv
+from concurrent.futures import ThreadPoolExecutor
+
+from data.candle_store import get_candles
 from core.trade_planner import build_trade_plan
 
 from core.momentum import (
@@ -6,7 +8,7 @@ from core.momentum import (
     momentum_score_1h        # 1H fast ignition + chop
 )
 
-from data.derivatives import fetch_derivatives_snapshot
+from data.derivatives import derivatives_calls, snapshot_field, LSR_PERIOD
 from core.structure_engine import detect_structure_state
 
 
@@ -65,64 +67,147 @@ def decision_label(plan: dict) -> str:
     return "WATCH"
 
 
+# ============================================================
+# Fetch Stage (concurrent)
+# ============================================================
+
+TIMEFRAMES = ("15m", "1h", "4h")
+CANDLE_LIMIT = 400
+
+# Bounded so a long symbol list can't open unlimited sockets;
+# ccxt calls are additionally spaced by the shared per-exchange RateLimiter.
+FETCH_WORKERS = 8
+
+
+def submit_asset_inputs(pool, exchange: str, symbol: str) -> dict:
+    """
+    Queues every timeframe + derivatives fetch of one symbol on `pool`.
+    Returns {tf: future, ("derivatives", key): future}.
+    """
+    jobs = {
+        tf: pool.submit(get_candles, exchange, symbol, tf, limit=CANDLE_LIMIT)
+        for tf in TIMEFRAMES
+    }
+
+    for key, empty, call in derivatives_calls(symbol, period=LSR_PERIOD):
+        jobs[("derivatives", key)] = pool.submit(snapshot_field, empty, call)
+
+    return jobs
+
+
+def collect_asset_inputs(jobs: dict) -> dict:
+    """
+    Waits for submit_asset_inputs() futures and assembles the inputs dict.
+    Candle errors propagate; derivatives errors are already folded in.
+    """
+    inputs = {"derivatives": {}}
+
+    for name, job in jobs.items():
+        if isinstance(name, tuple):
+            inputs["derivatives"][name[1]] = job.result()
+        else:
+            inputs[name] = job.result()
+
+    return inputs
+
+
+def fetch_asset_inputs(exchange: str, symbols: list) -> dict:
+    """
+    Fetches every timeframe + derivatives endpoint for all symbols at once.
+
+    Returns:
+    {
+        symbol: {
+            "15m": df, "1h": df, "4h": df,
+            "derivatives": {funding, open_interest, long_short_ratio}
+        }
+    }
+    """
+
+    symbols = list(dict.fromkeys(symbols))
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+
+        jobs = {
+            symbol: submit_asset_inputs(pool, exchange, symbol)
+            for symbol in symbols
+        }
+
+        return {
+            symbol: collect_asset_inputs(symbol_jobs)
+            for symbol, symbol_jobs in jobs.items()
+        }
+
+
 # ============================================================
 # Asset Analyzer
 # ============================================================
 
-def analyze_asset(exchange: str, symbol: str):
+def build_asset_plan(symbol: str, inputs: dict) -> dict:
 
-    # ---------------- Fetch candles ----------------
+    df_15m = inputs["15m"]
+    df_1h  = inputs["1h"]
+    df_4h  = inputs["4h"]
 
-    df_15m = fetch_ohlcv(exchange, symbol, "15m", limit=400)
-    df_1h  = fetch_ohlcv(exchange, symbol, "1h",  limit=400)
-    df_4h  = fetch_ohlcv(exchange, symbol, "4h",  limit=400)
+    snap = inputs.get("derivatives")
 
     # ---------------- Core trade plan ----------------
 
-    plan = build_trade_plan(symbol, df_15m, df_1h, df_4h)
+    plan = build_trade_plan(
+        symbol, df_15m, df_1h, df_4h,
+        derivatives=snap if isinstance(snap, dict) else None,
+    )
+
+    mom_fast = momentum_score_1h(df_1h)
+    mom_slow = momentum_score(df_4h)
+
+    try:
+        structure_state = detect_structure_state(df_4h)
+    except Exception as e:
+        structure_state = None
+        plan["structure_state_error"] = str(e)
+
+    return finish_plan(plan, mom_fast, mom_slow, structure_state, snap)
+
+
+def finish_plan(plan: dict, mom_fast: dict, mom_slow: dict, structure_state=None, snap=None) -> dict:
+    """
+    Attaches the momentum / structure / derivatives layers to a
+    build_trade_plan() result and labels it. Shared with core.backtest,
+    which computes the layers incrementally.
+    """
 
     # =================================================
     # FAST LAYER (1H) — pressure & ignition
     # =================================================
 
-    mom_fast = momentum_score_1h(df_1h)
-
     plan["momentum_fast"] = mom_fast
 
     # =================================================
     # SLOW LAYER (4H) — regime & health
     # =================================================
 
-    mom_slow = momentum_score(df_4h)
-
     plan["momentum_slow"] = mom_slow
 
     # =================================================
     # Market Structure (4H only)
     # =================================================
 
-    try:
-        structure_state = detect_structure_state(df_4h)
+    if structure_state is not None:
         plan["structure_state"] = structure_state
-    except Exception as e:
-        plan["structure_state_error"] = str(e)
 
     # =================================================
     # Derivatives (fast pressure by nature)
     # =================================================
 
-    try:
-        snap = fetch_derivatives_snapshot(symbol)
-        if isinstance(snap, dict):
-            plan.update(snap)
-
-            plan["derivatives_fast"] = {
-                "funding": snap.get("funding"),
-                "open_interest": snap.get("open_interest"),
-                "long_short_ratio": snap.get("long_short_ratio"),
-            }
-    except Exception as e:
-        plan["derivatives_error"] = str(e)
+    if isinstance(snap, dict):
+        plan.update(snap)
+
+        plan["derivatives_fast"] = {
+            "funding": snap.get("funding"),
+            "open_interest": snap.get("open_interest"),
+            "long_short_ratio": snap.get("long_short_ratio"),
+        }
 
     # =================================================
     # Compatibility layer (for UI + older logic)
@@ -143,6 +228,20 @@ def analyze_asset(exchange: str, symbol: str):
     return plan
 
 
+def analyze_assets(exchange: str, symbols: list) -> dict:
+
+    inputs = fetch_asset_inputs(exchange, symbols)
+
+    return {
+        symbol: build_asset_plan(symbol, data)
+        for symbol, data in inputs.items()
+    }
+
+
+def analyze_asset(exchange: str, symbol: str):
+    return analyze_assets(exchange, [symbol])[symbol]
+
+
 # ============================================================
 # Scoring Engine
 # ============================================================
@@ -223,8 +322,10 @@ def score_plan(plan: dict) -> float:
 
 def compare_assets(exchange: str, a: str, b: str):
 
-    plan_a = analyze_asset(exchange, a)
-    plan_b = analyze_asset(exchange, b)
+    plans = analyze_assets(exchange, [a, b])
+
+    plan_a = plans[a]
+    plan_b = plans[b]
 
     score_a = score_plan(plan_a)
     score_b = score_plan(plan_b)
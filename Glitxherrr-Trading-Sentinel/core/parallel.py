@@ -0,0 +1,111 @@
+# ============================================
+# parallel.py
+# Process-pool execution for CPU-bound per-symbol analysis
+# ============================================
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from core.multi_asset import TIMEFRAMES, build_asset_plan
+from core.records import TradePlan
+from data.shared_candles import share_frames, shared_frame
+
+
+# Candle data crosses the process boundary as a data.shared_candles
+# block built from the frames the caller fetched (the same ones an
+# in-process build_asset_plan() would read). Workers attach to it, so a
+# task only carries the block handle and its derivatives dict, never a
+# pickled DataFrame.
+#
+# Plans travel back as core.records.TradePlan records, which pickle to
+# about half the bytes of the nested plan dict.
+
+PROCESS_WORKERS = os.cpu_count() or 1
+
+_POOL = None
+_POOL_WORKERS = None
+_POOL_LOCK = threading.Lock()
+
+
+# ============================================================
+# Worker side
+# ============================================================
+
+def _warm_worker():
+    # Pay numpy/pandas + core import cost once per worker, not per task
+    import core.trade_planner  # noqa: F401
+    import core.momentum  # noqa: F401
+    import core.structure_engine  # noqa: F401
+
+
+def analyze_shared(symbol: str, handle: dict, derivatives: dict) -> dict:
+    """
+    Runs in a worker: build_asset_plan() as a TradePlan record, with
+    frames that are zero-copy views into the shared block.
+    """
+    inputs = {tf: shared_frame(handle, symbol, tf) for tf in TIMEFRAMES}
+    inputs["derivatives"] = derivatives
+    return TradePlan.from_dict(build_asset_plan(symbol, inputs))
+
+
+# ============================================================
+# Pool
+# ============================================================
+
+def get_process_pool(workers: int = None) -> ProcessPoolExecutor:
+    """
+    Process-wide pool, created on first use and kept warm.
+    Asking for a different size replaces it.
+    """
+    global _POOL, _POOL_WORKERS
+
+    workers = workers or PROCESS_WORKERS
+
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL_WORKERS != workers:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+        if _POOL is None:
+            # spawn: the parent runs scheduler / fetch threads, which
+            # fork() would copy in an undefined state
+            _POOL = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+            _POOL_WORKERS = workers
+
+        return _POOL
+
+
+def shutdown_process_pool():
+    global _POOL, _POOL_WORKERS
+
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=True, cancel_futures=True)
+        _POOL = None
+        _POOL_WORKERS = None
+
+
+def submit_analysis(symbol: str, inputs: dict, workers: int = None):
+    """
+    Queues build_asset_plan() for one symbol on the process pool; the
+    future resolves to a TradePlan record. The symbol's fetched frames
+    go through a shared block that is unlinked once the task is done.
+    """
+    block = share_frames({(symbol, tf): inputs[tf] for tf in TIMEFRAMES})
+
+    try:
+        future = get_process_pool(workers).submit(
+            analyze_shared, symbol, block.handle, inputs.get("derivatives"),
+        )
+    except BaseException:
+        block.close()
+        raise
+
+    future.add_done_callback(lambda _: block.close())
+    return future
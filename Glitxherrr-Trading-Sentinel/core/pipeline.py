@@ -0,0 +1,568 @@
+# ============================================
+# pipeline.py
+# Headless scan engine: builds the full market state
+# (plans, DXY, news, constraints, snapshot diff) without any UI.
+# ============================================
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from core.graph import ComputeGraph
+from core.momentum import momentum_score, momentum_score_1h
+from core.multi_asset import fetch_asset_inputs, finish_plan, score_plan
+from core.structure_engine import detect_structure_state
+from core.trade_planner import plan_context, plan_from_context
+from core.derivatives_bias import compute_derivatives_bias
+from core.dxy_bias import compute_dxy_bias
+from core.macro_impact import macro_tailwind
+from core.exhaustion import detect_exhaustion
+from core.constraints import build_constraints
+from core.state_diff import diff_market_state
+from core.snapshot_store import load_snapshot, save_snapshot
+from core.state_history import FrozenDict, StateHistory, freeze
+
+from data.dxy import dxy_detector
+from data.macro_data import fetch_dxy_ohlcv
+from data.news import fetch_important_news
+from data.gold_news import fetch_gold_news
+
+
+# Result reuse window: reruns (widgets, chat) inside it don't refetch
+PIPELINE_TTL = 60
+
+
+# ============================================================
+# State builders
+# ============================================================
+
+def plan_derivatives(plan) -> dict:
+    return {
+        "funding": plan.get("funding"),
+        "open_interest": plan.get("open_interest"),
+        "long_short_ratio": plan.get("long_short_ratio"),
+    }
+
+
+def asset_state(
+    asset_name,
+    dxy_state,
+    structure,
+    momentum,
+    derivatives,
+    exhaustion,
+    derivatives_bias,
+    bias_htf,
+    bias_ltf,
+):
+
+    # ---- Macro tailwind / headwind ----
+    dxy_trend = None
+    dxy_strength = None
+
+    if isinstance(dxy_state, dict):
+        dxy_trend = dxy_state.get("trend")
+        dxy_strength = dxy_state.get("strength")
+
+    macro_effect = macro_tailwind(
+        asset_name,
+        dxy_trend,
+        dxy_strength
+    )
+
+    # ---- Build final asset state ----
+    return {
+        "structure": structure,
+        "momentum": momentum,
+        "derivatives": derivatives,
+        "exhaustion": exhaustion,
+
+        # ---- Combined derivatives pressure ----
+        "derivatives_bias": derivatives_bias,
+
+        # ---- Macro context (tailwind / headwind / neutral) ----
+        "macro_effect": macro_effect,
+
+        # ---- Timeframe bias ----
+        "bias": {
+            "htf": bias_htf,
+            "ltf": bias_ltf,
+        }
+    }
+
+
+def build_asset_state(plan, asset_name, dxy_state):
+
+    # ---- Core price context ----
+    structure = plan.get("structure_state") if isinstance(plan, dict) else None
+    momentum  = plan.get("momentum") if isinstance(plan, dict) else None
+
+    # ---- Derivatives context ----
+    derivatives = plan_derivatives(plan)
+
+    return asset_state(
+        asset_name,
+        dxy_state,
+        structure,
+        momentum,
+        derivatives,
+        detect_exhaustion(momentum, structure, derivatives),
+        compute_derivatives_bias(structure, momentum, derivatives),
+        plan.get("bias_4h"),
+        plan.get("bias_1h"),
+    )
+
+
+def build_dxy_state(dxy_data, dxy_structure):
+
+    if not isinstance(dxy_data, dict):
+        return None
+
+    trend = (
+        dxy_data.get("trend").upper()
+        if dxy_data.get("trend")
+        else None
+    )
+
+    strength = (
+        dxy_data.get("strength").upper()
+        if dxy_data.get("strength")
+        else None
+    )
+
+    return {
+        "structure": dxy_structure,
+        "trend": trend,
+        "strength": strength,
+
+        # ---- Synthesized macro bias ----
+        "bias": compute_dxy_bias(
+            dxy_structure,
+            trend,
+            strength
+        )
+    }
+
+
+def btc_paxg(asset1: str, asset2: str) -> tuple:
+    """
+    (btc symbol, paxg symbol) of a pair, same roles as compare_assets()
+    results are split into everywhere else.
+    """
+    return (asset1, asset2) if "BTC" in asset1 else (asset2, asset1)
+
+
+# ============================================================
+# Stages
+# ============================================================
+
+def macro_stage() -> dict:
+
+    out = {"dxy": None, "dxy_structure": None, "error": None}
+
+    try:
+        # ---- Macro momentum / pressure ----
+        dxy = dxy_detector(interval="1h")
+
+        if not isinstance(dxy, dict):
+            raise ValueError("Invalid DXY detector output")
+
+        out["dxy"] = dxy
+
+        # ---- Real OHLC for structure (4H) ----
+        df_dxy_4h = fetch_dxy_ohlcv(interval="4h")
+        df_dxy_4h = df_dxy_4h[["open", "high", "low", "close", "volume"]]
+
+        structure = detect_structure_state(df_dxy_4h)
+        out["dxy_structure"] = structure if isinstance(structure, dict) else None
+
+    except Exception as e:
+        out["error"] = str(e)
+
+    return out
+
+
+def news_stage() -> dict:
+
+    out = {"btc_news": [], "gold_news": [], "errors": []}
+
+    try:
+        btc_news = fetch_important_news(limit=8)
+        out["btc_news"] = btc_news if isinstance(btc_news, list) else []
+    except Exception:
+        out["errors"].append("BTC news temporarily unavailable")
+
+    try:
+        gold_news = fetch_gold_news(limit=8)
+        out["gold_news"] = gold_news if isinstance(gold_news, list) else []
+    except Exception:
+        out["errors"].append("Gold news temporarily unavailable")
+
+    return out
+
+
+def inputs_stage(exchange: str, asset1: str, asset2: str) -> dict:
+
+    try:
+        return {"inputs": fetch_asset_inputs(exchange, [asset1, asset2]), "error": None}
+    except Exception as e:
+        return {"inputs": None, "error": str(e)}
+
+
+# ============================================================
+# Recompute graph
+# ============================================================
+
+# build_market_graph() wires the analysis and state stages into a
+# core.graph.ComputeGraph, so a run only recomputes what its new inputs
+# actually touch. Inputs per symbol are the three candle frames and the
+# derivatives snapshot; frames are fingerprinted by their last bar
+# (timestamp + its current OHLCV), the snapshot and DXY by value.
+#
+# Every stage reads the same frames build_asset_plan() does, forming
+# candle included, so the graph's plans match analyze_asset. The HTF
+# context (biases, zones, swing levels), the 4H structure and momentum
+# re-run only when the last 1H / 4H bar moves; a new 15m bar only re-runs
+# the price-dependent half of the plan.
+#
+# The state-level nodes return frozen values (core.state_history), so a
+# new market state shares every unchanged asset / DXY / constraints
+# subtree with the previous one and history keeps them without copies.
+
+def _timestamps_ms(df) -> np.ndarray:
+    return df["timestamp"].values.astype("datetime64[ms]").astype(np.int64)
+
+
+def last_bar_print(df):
+    if df is None or len(df) == 0:
+        return None
+    last = df.iloc[-1]
+    return (
+        int(_timestamps_ms(df.iloc[-1:])[0]),
+        float(last["open"]),
+        float(last["high"]),
+        float(last["low"]),
+        float(last["close"]),
+        float(last["volume"]),
+    )
+
+
+def _structure(df_4h) -> dict:
+    try:
+        return {"state": detect_structure_state(df_4h), "error": None}
+    except Exception as e:
+        return {"state": None, "error": str(e)}
+
+
+def _derivatives(snap) -> dict:
+    return plan_derivatives(snap if isinstance(snap, dict) else {})
+
+
+def _asset_nodes(graph: ComputeGraph, symbol: str):
+
+    def key(name):
+        return f"{symbol}:{name}"
+
+    for tf in ("15m", "1h", "4h"):
+        graph.input(key(tf), fingerprint=last_bar_print)
+    graph.input(key("snapshot"))
+
+    graph.node(key("price"), lambda df: float(df.iloc[-1]["close"]), [key("15m")])
+
+    # ---- HTF layers ----
+    graph.node(key("context"), plan_context, [key("1h"), key("4h")])
+    graph.node(key("structure"), _structure, [key("4h")])
+    graph.node(key("structure_state"), lambda s: s["state"], [key("structure")])
+
+    # ---- Momentum ----
+    graph.node(key("momentum_fast"), momentum_score_1h, [key("1h")])
+    graph.node(key("momentum_slow"), momentum_score, [key("4h")])
+    graph.node(
+        key("momentum"),
+        lambda fast, slow: {**slow, **fast},
+        [key("momentum_fast"), key("momentum_slow")],
+    )
+
+    # ---- Plan ----
+    def plan(price, context, fast, slow, structure, snap):
+        snap = snap if isinstance(snap, dict) else None
+        out = plan_from_context(symbol, price, context, snap)
+        if structure["error"] is not None:
+            out["structure_state_error"] = structure["error"]
+        return finish_plan(out, fast, slow, structure["state"], snap)
+
+    graph.node(
+        key("plan"),
+        plan,
+        [
+            key("price"), key("context"),
+            key("momentum_fast"), key("momentum_slow"),
+            key("structure"), key("snapshot"),
+        ],
+    )
+    graph.node(key("score"), score_plan, [key("plan")])
+
+    # ---- State layers ----
+    graph.node(key("derivatives"), _derivatives, [key("snapshot")])
+    graph.node(
+        key("exhaustion"),
+        detect_exhaustion,
+        [key("momentum"), key("structure_state"), key("derivatives")],
+    )
+    graph.node(
+        key("derivatives_bias"),
+        compute_derivatives_bias,
+        [key("structure_state"), key("momentum"), key("derivatives")],
+    )
+
+
+def build_market_graph(asset1: str, asset2: str) -> ComputeGraph:
+
+    graph = ComputeGraph()
+
+    for symbol in dict.fromkeys([asset1, asset2]):
+        _asset_nodes(graph, symbol)
+
+    # ---- Comparison ----
+    def compare(plan_a, plan_b, score_a, score_b):
+        return {
+            "asset_a": asset1,
+            "asset_b": asset2,
+            "plan_a": plan_a,
+            "plan_b": plan_b,
+            "score_a": score_a,
+            "score_b": score_b,
+            "winner": asset1 if score_a > score_b else asset2,
+        }
+
+    graph.node(
+        "cmp",
+        compare,
+        [f"{asset1}:plan", f"{asset2}:plan", f"{asset1}:score", f"{asset2}:score"],
+    )
+
+    # ---- Macro ----
+    graph.input("dxy")
+    graph.input("dxy_structure")
+    graph.node(
+        "dxy_state",
+        lambda dxy, structure: freeze(build_dxy_state(dxy, structure)),
+        ["dxy", "dxy_structure"],
+    )
+
+    # ---- Asset states ----
+    for name, symbol in zip(("btc", "paxg"), btc_paxg(asset1, asset2)):
+
+        def state(dxy_state, structure, momentum, derivatives, exhaustion, derivatives_bias, context,
+                  asset_name=name.upper()):
+            return freeze(asset_state(
+                asset_name,
+                dxy_state,
+                structure,
+                momentum,
+                derivatives,
+                exhaustion,
+                derivatives_bias,
+                context["bias_4h"],
+                context["bias_1h"],
+            ))
+
+        graph.node(
+            f"{name}_state",
+            state,
+            ["dxy_state"] + [
+                f"{symbol}:{n}"
+                for n in (
+                    "structure_state", "momentum", "derivatives",
+                    "exhaustion", "derivatives_bias", "context",
+                )
+            ],
+        )
+
+    graph.node(
+        "constraints",
+        lambda dxy, btc, paxg: freeze(build_constraints({"dxy": dxy, "btc": btc, "paxg": paxg})),
+        ["dxy_state", "btc_state", "paxg_state"],
+    )
+    graph.node(
+        "market_state",
+        lambda dxy, btc, paxg, constraints: FrozenDict({
+            "dxy": dxy,
+            "btc": btc,
+            "paxg": paxg,
+            "constraints": constraints,
+        }),
+        ["dxy_state", "btc_state", "paxg_state", "constraints"],
+    )
+
+    # ---- Snapshot diff ----
+    graph.input("previous_state")
+    graph.node("state_diff", diff_market_state, ["previous_state", "market_state"])
+
+    return graph
+
+
+def feed_market_graph(graph: ComputeGraph, inputs: dict, dxy, dxy_structure) -> list:
+    """
+    Sets every graph input from a fetch_asset_inputs() result and the
+    macro stage; returns the inputs that changed.
+    """
+    values = {"dxy": dxy, "dxy_structure": dxy_structure}
+
+    for symbol, data in inputs.items():
+        for tf in ("15m", "1h", "4h"):
+            values[f"{symbol}:{tf}"] = data[tf]
+        values[f"{symbol}:snapshot"] = data.get("derivatives")
+
+    return graph.update(values)
+
+
+# ============================================================
+# Pipeline
+# ============================================================
+
+class MarketPipeline:
+    """
+    Runs every stage once and serves the cached result until it is
+    older than `ttl` seconds (or run(force=True) is called).
+    """
+
+    def __init__(self, exchange: str, asset1: str, asset2: str, ttl: float = PIPELINE_TTL):
+        self.exchange = exchange
+        self.asset1 = asset1
+        self.asset2 = asset2
+        self.ttl = ttl
+
+        self.result = None
+        self.built_at = None
+
+        self.last_timestamp = None
+        self._snapshot_loaded = False
+
+        # Only stages whose inputs changed re-run between builds
+        self.graph = build_market_graph(asset1, asset2)
+
+        # Last distinct market states (frozen, subtrees shared)
+        self.history = StateHistory()
+
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        return (
+            self.result is not None
+            and (time.monotonic() - self.built_at) < self.ttl
+        )
+
+    def run(self, force: bool = False) -> dict:
+
+        if not force and self.is_fresh():
+            return self.result
+
+        with self._lock:
+            if not force and self.is_fresh():
+                return self.result
+
+            self.result = self._build()
+            self.built_at = time.monotonic()
+            return self.result
+
+    # ---------------- Internals ----------------
+
+    def _build(self) -> dict:
+
+        # ---- Independent fetch stages run side by side ----
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            macro_job = pool.submit(macro_stage)
+            news_job = pool.submit(news_stage)
+            inputs_job = pool.submit(inputs_stage, self.exchange, self.asset1, self.asset2)
+
+            macro = macro_job.result()
+            news = news_job.result()
+            fetched = inputs_job.result()
+
+        result = {
+            "exchange": self.exchange,
+            "asset1": self.asset1,
+            "asset2": self.asset2,
+
+            "dxy": macro["dxy"],
+            "dxy_structure": macro["dxy_structure"],
+            "dxy_error": macro["error"],
+
+            "btc_news": news["btc_news"],
+            "gold_news": news["gold_news"],
+            "news_errors": news["errors"],
+
+            "cmp": None,
+            "analysis_error": fetched["error"],
+
+            "market_state": None,
+            "recomputed": [],
+            "built_at": time.time(),
+        }
+
+        if fetched["inputs"] is None:
+            return result
+
+        try:
+            feed_market_graph(self.graph, fetched["inputs"], macro["dxy"], macro["dxy_structure"])
+            result["cmp"], market_state = self.graph.get("cmp", "market_state")
+            recomputed = self.graph.recomputed
+        except Exception as e:
+            result["analysis_error"] = str(e)
+            return result
+
+        result["market_state"] = self._snapshot_stage(market_state)
+        result["recomputed"] = recomputed + self.graph.recomputed
+        return result
+
+    def _snapshot_stage(self, market_state: FrozenDict) -> FrozenDict:
+        """
+        Diffs against the previous state, records and persists it.
+        """
+
+        last_state = self.history.latest()
+        last_timestamp = None
+
+        if last_state is None and not self._snapshot_loaded:
+            snapshot_payload = load_snapshot()
+            if snapshot_payload:
+                last_state = freeze(snapshot_payload.get("state"))
+                last_timestamp = snapshot_payload.get("timestamp")
+            self._snapshot_loaded = True
+
+        self.graph.set("previous_state", last_state)
+        state_diff = self.graph.get("state_diff")
+
+        # Unchanged state: nothing new to keep or write
+        if self.history.push(market_state):
+            save_snapshot(market_state)
+
+        return FrozenDict({
+            **market_state,
+            "last_snapshot_time": last_timestamp,
+            "state_diff": freeze(state_diff),
+        })
+
+
+# ============================================================
+# Process-wide registry (shared by all UI sessions)
+# ============================================================
+
+_PIPELINES = {}
+_PIPELINES_LOCK = threading.Lock()
+
+
+def get_pipeline(exchange: str, asset1: str, asset2: str) -> MarketPipeline:
+
+    key = (exchange.lower(), asset1, asset2)
+
+    with _PIPELINES_LOCK:
+        pipeline = _PIPELINES.get(key)
+        if pipeline is None:
+            pipeline = MarketPipeline(exchange, asset1, asset2)
+            _PIPELINES[key] = pipeline
+
+    return pipeline
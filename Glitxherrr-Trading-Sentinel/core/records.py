@@ -0,0 +1,385 @@
+# ============================================
+# records.py
+# Compact, immutable records for zones, structure, momentum and plans
+# ============================================
+
+from dataclasses import dataclass
+
+
+# The engines still produce plain dicts; these records are for holding
+# and shipping plans in bulk: scanner rows keep a TradePlan, and process
+# pool workers (core.parallel) send one back instead of the plan dict.
+# They are slotted and frozen, so one costs a fraction of the nested
+# dicts and can be shared instead of deep-copied. Zone, StructureState,
+# MomentumFast / MomentumSlow and DerivativesSnapshot are TradePlan's
+# nested parts.
+#
+# Every record has from_dict() for the engine output and to_dict(), which
+# rebuilds exactly that dict again for the UI / LLM boundary.
+
+
+# ============================================================
+# Zones
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class Zone:
+    type: str
+    top: float
+    bottom: float
+    touches: int = 0
+    volume_score: float = 0.0
+    age: int = 0
+    strength: float = 0.0
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Zone":
+        return cls(
+            d["type"],
+            d["top"],
+            d["bottom"],
+            d.get("touches", 0),
+            d.get("volume_score", 0.0),
+            d.get("age", 0),
+            d.get("strength", 0.0),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type,
+            "top": self.top,
+            "bottom": self.bottom,
+            "touches": self.touches,
+            "volume_score": self.volume_score,
+            "age": self.age,
+            "strength": self.strength,
+        }
+
+
+# ============================================================
+# Structure (core.structure_engine)
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class StructureState:
+    trend: str = "Neutral"
+    state: str = "Ranging"
+    recent_highs: int = 0
+    recent_lows: int = 0
+    last_high: float | None = None
+    last_low: float | None = None
+    liquidity_sweep: str | None = None
+    sweep_price: float | None = None
+    break_of_structure: str | None = None
+    bos_price: float | None = None
+    structure_confidence: str = "LOW"
+    structure_confidence_score: int = 1
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "StructureState":
+        return cls(
+            d.get("trend", "Neutral"),
+            d.get("state", "Ranging"),
+            d.get("recent_highs", 0),
+            d.get("recent_lows", 0),
+            d.get("last_high"),
+            d.get("last_low"),
+            d.get("liquidity_sweep"),
+            d.get("sweep_price"),
+            d.get("break_of_structure"),
+            d.get("bos_price"),
+            d.get("structure_confidence", "LOW"),
+            d.get("structure_confidence_score", 1),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "trend": self.trend,
+            "state": self.state,
+            "recent_highs": self.recent_highs,
+            "recent_lows": self.recent_lows,
+            "last_high": self.last_high,
+            "last_low": self.last_low,
+            "liquidity_sweep": self.liquidity_sweep,
+            "sweep_price": self.sweep_price,
+            "break_of_structure": self.break_of_structure,
+            "bos_price": self.bos_price,
+            "structure_confidence": self.structure_confidence,
+            "structure_confidence_score": self.structure_confidence_score,
+        }
+
+
+# ============================================================
+# Momentum (core.momentum)
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class MomentumFast:
+    atr_pct: float = 0.0
+    vol_spike: float = 1.0
+    obv_slope: float = 0.0
+    flow_state: str = "NEUTRAL"
+    bb_squeeze: bool = False
+    bb_squeeze_percentile: float | None = None
+    sideways: bool = True
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "MomentumFast":
+        return cls(
+            d.get("atr_pct", 0.0),
+            d.get("vol_spike", 1.0),
+            d.get("obv_slope", 0.0),
+            d.get("flow_state", "NEUTRAL"),
+            d.get("bb_squeeze", False),
+            d.get("bb_squeeze_percentile"),
+            d.get("sideways", True),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "atr_pct": self.atr_pct,
+            "vol_spike": self.vol_spike,
+            "obv_slope": self.obv_slope,
+            "flow_state": self.flow_state,
+            "bb_squeeze": self.bb_squeeze,
+            "bb_squeeze_percentile": self.bb_squeeze_percentile,
+            "sideways": self.sideways,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class MomentumSlow:
+    trend_energy_pctile: float = 50.0
+    trend_slope: float = 0.0
+    bb_squeeze: bool = False
+    bb_squeeze_percentile: float | None = None
+    sideways_regime: bool = True
+    breakout_watch: bool = False
+    breakout_direction: str = "NEUTRAL"
+    momentum_score: float = -5.0
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "MomentumSlow":
+        return cls(
+            d.get("trend_energy_pctile", 50.0),
+            d.get("trend_slope", 0.0),
+            d.get("bb_squeeze", False),
+            d.get("bb_squeeze_percentile"),
+            d.get("sideways_regime", True),
+            d.get("breakout_watch", False),
+            d.get("breakout_direction", "NEUTRAL"),
+            d.get("momentum_score", -5.0),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "trend_energy_pctile": self.trend_energy_pctile,
+            "trend_slope": self.trend_slope,
+            "bb_squeeze": self.bb_squeeze,
+            "bb_squeeze_percentile": self.bb_squeeze_percentile,
+            "sideways_regime": self.sideways_regime,
+            "breakout_watch": self.breakout_watch,
+            "breakout_direction": self.breakout_direction,
+            "momentum_score": self.momentum_score,
+        }
+
+
+# ============================================================
+# Derivatives (data.derivatives.fetch_derivatives_snapshot)
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class DerivativesSnapshot:
+    """
+    The three endpoint dicts flattened. A missing detail field (None)
+    means the endpoint returned its empty shape; errors are kept as-is.
+    """
+    funding_bps: float | None = None
+    funding_rate: float | None = None
+    next_funding_time: int | None = None
+    mark_price: float | None = None
+    open_interest: float | None = None
+    long_short_ratio: float | None = None
+    long_account: float | None = None
+    short_account: float | None = None
+    funding_error: str | None = None
+    open_interest_error: str | None = None
+    long_short_ratio_error: str | None = None
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "DerivativesSnapshot":
+        funding = d.get("funding") or {}
+        oi = d.get("open_interest") or {}
+        lsr = d.get("long_short_ratio") or {}
+
+        return cls(
+            funding.get("fundingBps"),
+            funding.get("fundingRate"),
+            funding.get("nextFundingTime"),
+            funding.get("markPrice"),
+            oi.get("openInterest"),
+            lsr.get("longShortRatio"),
+            lsr.get("longAccount"),
+            lsr.get("shortAccount"),
+            funding.get("error"),
+            oi.get("error"),
+            lsr.get("error"),
+        )
+
+    def funding_dict(self) -> dict:
+        if self.funding_rate is not None:
+            out = {
+                "fundingRate": self.funding_rate,
+                "fundingBps": self.funding_bps,
+                "nextFundingTime": self.next_funding_time,
+                "markPrice": self.mark_price,
+            }
+        else:
+            out = {"fundingBps": self.funding_bps}
+        return _with_error(out, self.funding_error)
+
+    def open_interest_dict(self) -> dict:
+        return _with_error({"openInterest": self.open_interest}, self.open_interest_error)
+
+    def long_short_ratio_dict(self) -> dict:
+        if self.long_account is not None:
+            out = {
+                "longShortRatio": self.long_short_ratio,
+                "longAccount": self.long_account,
+                "shortAccount": self.short_account,
+            }
+        else:
+            out = {"longShortRatio": self.long_short_ratio}
+        return _with_error(out, self.long_short_ratio_error)
+
+    def to_dict(self) -> dict:
+        return {
+            "funding": self.funding_dict(),
+            "open_interest": self.open_interest_dict(),
+            "long_short_ratio": self.long_short_ratio_dict(),
+        }
+
+
+def _with_error(out: dict, error) -> dict:
+    if error is not None:
+        out["error"] = error
+    return out
+
+
+# ============================================================
+# Trade plan (core.multi_asset.build_asset_plan)
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class TradePlan:
+    symbol: str
+    price: float
+    bias_4h: str
+    bias_1h: str
+    direction: str
+    entry: float | None = None
+    stop: float | None = None
+    target1: float | None = None
+    target2: float | None = None
+    rr: float | None = None
+    last_swing_high: float | None = None
+    last_swing_low: float | None = None
+    zones: tuple = ()
+    derivatives: DerivativesSnapshot | None = None
+    momentum_fast: MomentumFast | None = None
+    momentum_slow: MomentumSlow | None = None
+    structure_state: StructureState | None = None
+    structure_state_error: str | None = None
+    decision: str | None = None
+
+    @classmethod
+    def from_dict(cls, plan: dict) -> "TradePlan":
+        structure = plan.get("structure_state")
+        fast = plan.get("momentum_fast")
+        slow = plan.get("momentum_slow")
+
+        # plan_from_context() always copies the three fields; a plan built
+        # without a snapshot (core.backtest) has them all None
+        has_derivatives = any(
+            plan.get(k) is not None
+            for k in ("funding", "open_interest", "long_short_ratio")
+        )
+
+        return cls(
+            plan["symbol"],
+            plan["price"],
+            plan["bias_4h"],
+            plan["bias_1h"],
+            plan["direction"],
+            plan.get("entry"),
+            plan.get("stop"),
+            plan.get("target1"),
+            plan.get("target2"),
+            plan.get("rr"),
+            plan.get("last_swing_high"),
+            plan.get("last_swing_low"),
+            tuple(Zone.from_dict(z) for z in plan.get("zones") or ()),
+            DerivativesSnapshot.from_dict(plan) if has_derivatives else None,
+            MomentumFast.from_dict(fast) if fast is not None else None,
+            MomentumSlow.from_dict(slow) if slow is not None else None,
+            StructureState.from_dict(structure) if structure is not None else None,
+            plan.get("structure_state_error"),
+            plan.get("decision"),
+        )
+
+    def to_dict(self) -> dict:
+        """
+        The same dict build_asset_plan() returned.
+        """
+        d = self.derivatives
+
+        plan = {
+            "symbol": self.symbol,
+            "price": self.price,
+            "bias_4h": self.bias_4h,
+            "bias_1h": self.bias_1h,
+
+            "direction": self.direction,
+            "entry": self.entry,
+            "stop": self.stop,
+            "target1": self.target1,
+            "target2": self.target2,
+            "rr": self.rr,
+
+            "last_swing_high": self.last_swing_high,
+            "last_swing_low": self.last_swing_low,
+
+            "zones": [z.to_dict() for z in self.zones],
+
+            "funding": d.funding_dict() if d is not None else None,
+            "open_interest": d.open_interest_dict() if d is not None else None,
+            "long_short_ratio": d.long_short_ratio_dict() if d is not None else None,
+        }
+
+        if self.structure_state_error is not None:
+            plan["structure_state_error"] = self.structure_state_error
+
+        fast = self.momentum_fast.to_dict() if self.momentum_fast is not None else None
+        slow = self.momentum_slow.to_dict() if self.momentum_slow is not None else None
+
+        if self.momentum_fast is not None or self.momentum_slow is not None:
+            plan["momentum_fast"] = fast
+            plan["momentum_slow"] = slow
+
+        if self.structure_state is not None:
+            plan["structure_state"] = self.structure_state.to_dict()
+
+        if d is not None:
+            plan["derivatives_fast"] = {
+                "funding": plan["funding"],
+                "open_interest": plan["open_interest"],
+                "long_short_ratio": plan["long_short_ratio"],
+            }
+
+        if fast is not None or slow is not None:
+            plan["momentum"] = {**(slow or {}), **(fast or {})}
+
+        if self.decision is not None:
+            plan["decision"] = self.decision
+
+        return plan
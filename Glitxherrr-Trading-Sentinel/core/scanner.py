@@ -0,0 +1,174 @@
+# ============================================
+# scanner.py
+# Watchlist scanner: analyze + score N symbols,
+# streaming rows as each symbol completes.
+# ============================================
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from core.multi_asset import (
+    submit_asset_inputs,
+    collect_asset_inputs,
+    build_asset_plan,
+    score_plan,
+    safe_float,
+)
+from core.parallel import submit_analysis
+from core.records import TradePlan
+
+
+# I/O workers shared by the whole scan. Candle calls are still spaced by
+# the per-exchange RateLimiter and repeated symbols hit the data caches.
+SCAN_WORKERS = 16
+
+
+def scan_row(symbol: str, plan=None, error: str = None) -> dict:
+    """
+    Flat, table-friendly summary of one scanned symbol. `plan` is a plan
+    dict or the TradePlan record a worker process sent back; the row keeps
+    the record (plan.to_dict() gives the dict back).
+    """
+    if plan is None:
+        return {
+            "symbol": symbol,
+            "score": None,
+            "decision": None,
+            "direction": None,
+            "bias_4h": None,
+            "bias_1h": None,
+            "rr": None,
+            "price": None,
+            "momentum_score": None,
+            "funding_bps": None,
+            "long_short_ratio": None,
+            "error": error,
+            "plan": None,
+        }
+
+    if isinstance(plan, TradePlan):
+        record, plan = plan, plan.to_dict()
+    else:
+        record = TradePlan.from_dict(plan)
+
+    slow = plan.get("momentum_slow") or {}
+    funding = plan.get("funding") or {}
+    lsr = plan.get("long_short_ratio") or {}
+
+    return {
+        "symbol": symbol,
+        "score": score_plan(plan),
+        "decision": plan.get("decision"),
+        "direction": plan.get("direction"),
+        "bias_4h": plan.get("bias_4h"),
+        "bias_1h": plan.get("bias_1h"),
+        "rr": plan.get("rr"),
+        "price": safe_float(plan.get("price")),
+        "momentum_score": slow.get("momentum_score"),
+        "funding_bps": safe_float(funding.get("fundingBps")),
+        "long_short_ratio": safe_float(lsr.get("longShortRatio")),
+        "error": None,
+        "plan": record,
+    }
+
+
+def rank_rows(rows: list) -> list:
+    """
+    Best score first; failed symbols last.
+    """
+    return sorted(
+        rows,
+        key=lambda r: (r["score"] is None, -(r["score"] or 0), r["symbol"]),
+    )
+
+
+def iter_watchlist(exchange: str, symbols: list, workers: int = SCAN_WORKERS, processes: int = 0):
+    """
+    Yields one scan_row() per symbol in completion order.
+
+    Fetches for every symbol are queued up front (symbol by symbol, so the
+    first ones finish first); a plan is built as soon as all of a symbol's
+    inputs are in. Closing the generator cancels whatever hasn't started.
+
+    processes: 0 builds plans in this process; otherwise they run on the
+    shared process pool (core.parallel) with that many workers.
+    """
+    symbols = list(dict.fromkeys(symbols))
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+    analysis = {}   # process-pool future -> symbol
+
+    try:
+        jobs = {symbol: submit_asset_inputs(pool, exchange, symbol) for symbol in symbols}
+
+        owner = {}
+        remaining = {}
+
+        for symbol, symbol_jobs in jobs.items():
+            remaining[symbol] = len(symbol_jobs)
+            for future in symbol_jobs.values():
+                owner[future] = symbol
+
+        pending = set(owner)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+
+                # ---- Plan came back from a worker process ----
+                if future in analysis:
+                    symbol = analysis.pop(future)
+                    try:
+                        row = scan_row(symbol, future.result())
+                    except Exception as e:
+                        row = scan_row(symbol, error=str(e))
+                    yield row
+                    continue
+
+                # ---- One more input of a symbol arrived ----
+                symbol = owner[future]
+                remaining[symbol] -= 1
+
+                if remaining[symbol]:
+                    continue
+
+                try:
+                    inputs = collect_asset_inputs(jobs[symbol])
+
+                    if processes:
+                        job = submit_analysis(symbol, inputs, processes)
+                        analysis[job] = symbol
+                        pending.add(job)
+                        continue
+
+                    row = scan_row(symbol, build_asset_plan(symbol, inputs))
+                except Exception as e:
+                    row = scan_row(symbol, error=str(e))
+
+                yield row
+
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        for job in analysis:
+            job.cancel()
+
+
+def scan_watchlist(
+    exchange: str,
+    symbols: list,
+    workers: int = SCAN_WORKERS,
+    processes: int = 0,
+    on_row=None,
+) -> list:
+    """
+    Runs the whole scan and returns the ranked table.
+    on_row(row, rows_so_far) is called as each symbol completes.
+    """
+    rows = []
+
+    for row in iter_watchlist(exchange, symbols, workers=workers, processes=processes):
+        rows.append(row)
+        if on_row is not None:
+            on_row(row, rows)
+
+    return rank_rows(rows)
@@ -0,0 +1,239 @@
+# ============================================
+# scheduler.py
+# Background refresh loop that keeps the market state warm
+# and publishes versioned snapshots for UI sessions / the agent.
+# ============================================
+
+import threading
+import time
+from collections import namedtuple
+
+from core.multi_asset import TIMEFRAMES, CANDLE_LIMIT
+from core.pipeline import get_pipeline
+
+from data.candle_store import warm_candles
+from data.derivatives import warm_derivatives
+from data.dxy import dxy_detector
+from data.macro_data import fetch_dxy_ohlcv
+from data.news import warm_news
+from data.gold_news import warm_gold_news
+from data.macro_calendar import warm_macro_events
+from data.timeframes import timeframe_seconds
+
+
+DERIVATIVES_EVERY = 30     # seconds
+MACRO_EVERY = 600
+NEWS_EVERY = 900
+
+BAR_CLOSE_GRACE = 2        # seconds after a close before asking for the closed bar
+MIN_SLEEP = 0.5
+
+
+# Published state. The tuple is immutable and `result` is never mutated
+# after publishing, so readers can hold on to it without copying.
+# `refresh` is the last request_refresh() generation whose jobs had all
+# started before the snapshot was built.
+MarketSnapshot = namedtuple("MarketSnapshot", "version published_at result errors refresh")
+
+
+class MarketScheduler:
+    """
+    One daemon thread per (exchange, asset1, asset2):
+
+    - candles per timeframe right after each bar close
+    - derivatives every DERIVATIVES_EVERY seconds
+    - DXY every MACRO_EVERY, news / gold news / calendar every NEWS_EVERY
+
+    After any job runs, the pipeline is rebuilt from the warm caches
+    and a new MarketSnapshot is published.
+    """
+
+    def __init__(self, exchange: str, asset1: str, asset2: str):
+        self.exchange = exchange
+        self.symbols = (asset1, asset2)
+        self.pipeline = get_pipeline(exchange, asset1, asset2)
+
+        self.errors = {}
+
+        self._snapshot = None
+        self._published = threading.Condition()
+
+        self._due = {}
+        self._requested = 0            # request_refresh() generation
+        self._served = 0               # last generation that ran every job
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._jobs = {f"candles:{tf}": self._candle_job(tf) for tf in TIMEFRAMES}
+        self._jobs["derivatives"] = self._derivatives_job
+        self._jobs["macro"] = self._macro_job
+        self._jobs["news"] = warm_news
+        self._jobs["gold_news"] = warm_gold_news
+        self._jobs["calendar"] = warm_macro_events
+
+    # ---------------- Lifecycle ----------------
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._due = {name: 0.0 for name in self._jobs}   # warm everything first
+
+        self._thread = threading.Thread(
+            target=self._loop,
+            name=f"market-scheduler-{self.exchange}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def request_refresh(self) -> int:
+        """
+        Runs every job on the next loop iteration. Returns the request's
+        generation: wait_for(refresh=generation) only accepts a snapshot
+        built after all of those jobs ran, not one from a pass that was
+        already under way.
+        """
+        with self._published:
+            self._requested += 1
+            generation = self._requested
+
+        self._wake.set()
+        return generation
+
+    # ---------------- Readers ----------------
+
+    def latest(self):
+        """
+        Most recent snapshot, or None before the first publish.
+        """
+        return self._snapshot
+
+    def wait_for(self, version: int = 1, timeout: float = None, refresh: int = 0):
+        """
+        Blocks until a snapshot with at least `version` is published, and
+        that covers refresh generation `refresh` (see request_refresh).
+        """
+        with self._published:
+            self._published.wait_for(
+                lambda: (
+                    self._snapshot is not None
+                    and self._snapshot.version >= version
+                    and self._snapshot.refresh >= refresh
+                ),
+                timeout=timeout,
+            )
+            return self._snapshot
+
+    # ---------------- Scheduling ----------------
+
+    def _next_due(self, name: str, now: float) -> float:
+        if name.startswith("candles:"):
+            period = timeframe_seconds(name.split(":", 1)[1])
+            return now - (now % period) + period + BAR_CLOSE_GRACE
+
+        if name == "derivatives":
+            return now + DERIVATIVES_EVERY
+
+        if name == "macro":
+            return now + MACRO_EVERY
+
+        return now + NEWS_EVERY
+
+    def _loop(self):
+        while not self._stop.is_set():
+
+            now = time.time()
+            ran = False
+
+            with self._published:
+                generation = self._requested
+            forced = generation > self._served
+
+            for name, job in self._jobs.items():
+                if not forced and self._due[name] > now:
+                    continue
+
+                try:
+                    job()
+                    self.errors.pop(name, None)
+                except Exception as e:
+                    self.errors[name] = str(e)
+
+                self._due[name] = self._next_due(name, time.time())
+                ran = True
+
+            self._served = generation
+
+            if ran:
+                self._publish(generation)
+
+            wait = min(self._due.values()) - time.time()
+            self._wake.wait(max(wait, MIN_SLEEP))
+            self._wake.clear()
+
+    def _publish(self, generation: int):
+        try:
+            result = self.pipeline.run(force=True)
+        except Exception as e:
+            self.errors["pipeline"] = str(e)
+            return
+
+        self.errors.pop("pipeline", None)
+
+        with self._published:
+            version = self._snapshot.version + 1 if self._snapshot else 1
+            self._snapshot = MarketSnapshot(version, time.time(), result, dict(self.errors), generation)
+            self._published.notify_all()
+
+    # ---------------- Jobs ----------------
+
+    def _candle_job(self, timeframe: str):
+        def job():
+            for symbol in self.symbols:
+                warm_candles(self.exchange, symbol, timeframe, limit=CANDLE_LIMIT)
+        return job
+
+    def _derivatives_job(self):
+        for symbol in self.symbols:
+            warm_derivatives(symbol)
+
+    def _macro_job(self):
+        dxy_detector.refresh(interval="1h")
+        fetch_dxy_ohlcv.refresh(interval="4h")
+
+
+# ============================================================
+# Process-wide registry: one scheduler per dashboard config
+# ============================================================
+
+_SCHEDULERS = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def start_scheduler(exchange: str, asset1: str, asset2: str) -> MarketScheduler:
+    """
+    Returns the running scheduler for this config, starting it on first use.
+    """
+    key = (exchange.lower(), asset1, asset2)
+
+    with _SCHEDULERS_LOCK:
+        scheduler = _SCHEDULERS.get(key)
+        if scheduler is None:
+            scheduler = MarketScheduler(exchange, asset1, asset2)
+            _SCHEDULERS[key] = scheduler
+        scheduler.start()
+
+    return scheduler
+
+
+def stop_schedulers():
+    with _SCHEDULERS_LOCK:
+        for scheduler in _SCHEDULERS.values():
+            scheduler.stop()
+        _SCHEDULERS.clear()
@@ -1,16 +1,444 @@
+import atexit
+import bisect
+import gzip
 import json
+import os
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 import pytz
 
+# Legacy single-file snapshot, still read when the journal is empty
 SNAPSHOT_FILE = Path("snapshot_memory.json")
 
 IST = pytz.timezone("Asia/Kolkata")
 
 
+# ============================================================
+#                  APPEND-ONLY SNAPSHOT JOURNAL
+# ============================================================
+
+# Every saved market state is one compact JSON line in the active segment
+#   {"ts": epoch ms, "timestamp": ISO (IST), "state": {...}}
+# written with a single O_APPEND write, so a crash can at worst leave a
+# torn last line, which readers skip and the next open truncates.
+# fsync is batched: at most every FSYNC_EVERY seconds (and at exit).
+#
+# Layout (SNAPSHOT_JOURNAL_DIR):
+#   index.json               rotated segments: name, first/last ts, count
+#   snap-000001.jsonl(.gz)   segments; rotated ones are gzipped
+#   snap-000001.idx          sparse "ts offset" lines, every INDEX_EVERY entries
+#
+# The active segment is the one with the highest number, so the latest
+# snapshot is a read of the last line of one file, however long the
+# history gets. Right after a rotation (or compaction) the active segment
+# is still empty, and the latest snapshot is the last line of the newest
+# sealed segment, found from its sparse index.
+
+JOURNAL_DIR = Path(os.getenv("SNAPSHOT_JOURNAL_DIR", "snapshot_journal"))
+
+SEGMENT_BYTES = 16 * 1024 * 1024   # rotate the active segment past this size
+INDEX_EVERY = 64                   # entries between sparse index points
+FSYNC_EVERY = 5.0                  # seconds
+TAIL_BLOCK = 64 * 1024             # first read size when looking for the last line
+
+
+def _now_payload(state) -> dict:
+    now = datetime.now(IST)
+    return {
+        "ts": int(now.timestamp() * 1000),
+        "timestamp": now.isoformat(),
+        "state": state,
+    }
+
+
+def _to_ms(when) -> int:
+    if when is None:
+        return None
+    if isinstance(when, (int, float)):
+        return int(when)
+    if isinstance(when, str):
+        when = datetime.fromisoformat(when)
+    if when.tzinfo is None:
+        when = IST.localize(when)
+    return int(when.timestamp() * 1000)
+
+
+class SnapshotJournal:
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root is not None else JOURNAL_DIR
+
+        self._lock = threading.Lock()
+        self._fd = None
+        self._seq = None
+        self._size = 0
+        self._count = 0
+        self._first_ts = None
+        self._last_ts = None
+        self._sparse = []          # [(ts, offset)] of the active segment
+        self._last_sync = 0.0
+        self._dirty = False
+
+    # ---------------- Files ----------------
+
+    def _segment(self, seq: int, compressed: bool = False) -> Path:
+        return self.root / f"snap-{seq:06d}.jsonl{'.gz' if compressed else ''}"
+
+    def _sparse_file(self, seq: int) -> Path:
+        return self.root / f"snap-{seq:06d}.idx"
+
+    def load_index(self) -> list:
+        try:
+            with open(self.root / "index.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _save_index(self, segments: list):
+        tmp = self.root / "index.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(segments, f)
+        os.replace(tmp, self.root / "index.json")
+
+    def _active_seq(self) -> int:
+        rotated = {s["seq"] for s in self.load_index()}
+        found = []
+
+        for path in self.root.glob("snap-*.jsonl"):
+            seq = int(path.name[5:11])
+            if seq in rotated:
+                # Sealed already, the rotation just didn't get to delete it
+                path.unlink(missing_ok=True)
+            else:
+                found.append(seq)
+
+        return max(found + [s + 1 for s in rotated] + [1])
+
+    # ---------------- Writing ----------------
+
+    def _open(self):
+        """
+        Opens (or recovers) the active segment. Lock held.
+        """
+        if self._fd is not None:
+            return
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._seq = self._active_seq()
+        path = self._segment(self._seq)
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        self._count = 0
+        self._first_ts = None
+        self._last_ts = None
+        self._sparse = []
+
+        # Rescan once: cuts a torn last line, rebuilds counters and sparse index
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    ts = json.loads(line)["ts"]
+                except Exception:
+                    offset += len(line)
+                    continue
+                if self._count % INDEX_EVERY == 0:
+                    self._sparse.append((ts, offset))
+                self._first_ts = ts if self._first_ts is None else self._first_ts
+                self._last_ts = ts
+                self._count += 1
+                offset += len(line)
+
+        if offset != self._size:
+            os.ftruncate(self._fd, offset)
+            self._size = offset
+
+        self._write_sparse()
+
+    def _write_sparse(self):
+        tmp = self._sparse_file(self._seq).with_suffix(".idx.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{ts} {off}\n" for ts, off in self._sparse)
+        os.replace(tmp, self._sparse_file(self._seq))
+
+    def append(self, state) -> dict:
+        payload = _now_payload(state)
+        line = (json.dumps(payload, separators=(",", ":")) + "\n").encode("utf-8")
+
+        with self._lock:
+            self._open()
+
+            if self._size and self._size + len(line) > SEGMENT_BYTES:
+                self._rotate()
+
+            if self._count % INDEX_EVERY == 0:
+                self._sparse.append((payload["ts"], self._size))
+                with open(self._sparse_file(self._seq), "a", encoding="utf-8") as f:
+                    f.write(f"{payload['ts']} {self._size}\n")
+
+            os.write(self._fd, line)
+
+            self._size += len(line)
+            self._count += 1
+            self._first_ts = payload["ts"] if self._first_ts is None else self._first_ts
+            self._last_ts = payload["ts"]
+            self._dirty = True
+
+            if time.monotonic() - self._last_sync >= FSYNC_EVERY:
+                self._sync()
+
+        return payload
+
+    def _sync(self):
+        if self._fd is not None and self._dirty:
+            os.fsync(self._fd)
+            self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._sync()
+
+    def _rotate(self):
+        """
+        Seals the active segment (gzipped, listed in index.json) and
+        starts the next one. Lock held.
+        """
+        self._sync()
+        os.close(self._fd)
+        self._fd = None
+
+        path = self._segment(self._seq)
+        packed = self._segment(self._seq, compressed=True)
+
+        with open(path, "rb") as src, gzip.open(packed.with_suffix(".gz.tmp"), "wb") as dst:
+            while True:
+                block = src.read(1024 * 1024)
+                if not block:
+                    break
+                dst.write(block)
+        os.replace(packed.with_suffix(".gz.tmp"), packed)
+
+        segments = [s for s in self.load_index() if s["seq"] != self._seq]
+        segments.append({
+            "seq": self._seq,
+            "name": packed.name,
+            "first_ts": self._first_ts,
+            "last_ts": self._last_ts,
+            "count": self._count,
+        })
+        self._save_index(sorted(segments, key=lambda s: s["seq"]))
+        path.unlink()
+
+        self._seq += 1
+        self._open()
+
+    def rotate(self):
+        with self._lock:
+            self._open()
+            if self._count:
+                self._rotate()
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                self._sync()
+                os.close(self._fd)
+                self._fd = None
+
+    # ---------------- Reading ----------------
+
+    def tail(self) -> dict | None:
+        """
+        Latest snapshot: reads backwards from the end of the active
+        segment, else the end of the newest sealed one.
+        """
+        with self._lock:
+            seq = self._seq if self._seq is not None else self._active_seq()
+
+        payload = self._last_line(self._segment(seq))
+        if payload is not None:
+            return payload
+
+        for seg in reversed(self.load_index()):
+            sparse = self._load_sparse(seg["seq"])
+            offset = sparse[-1][1] if sparse else 0
+
+            last = None
+            try:
+                for last in self._scan(self.root / seg["name"], offset):
+                    pass
+            except FileNotFoundError:
+                continue
+
+            if last is not None:
+                return last
+
+        return None
+
+    @staticmethod
+    def _last_line(path: Path) -> dict | None:
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            block = TAIL_BLOCK
+
+            while end:
+                start = max(0, end - block)
+                f.seek(start)
+                chunk = f.read(end - start)
+
+                lines = chunk.split(b"\n")
+                # Last element is "" (complete) or a torn line; walk back
+                for raw in reversed(lines[1:] if start else lines):
+                    if not raw.strip():
+                        continue
+                    try:
+                        return json.loads(raw)
+                    except ValueError:
+                        continue
+
+                if not start:
+                    return None
+                block *= 4
+
+        return None
+
+    def _segments(self) -> list:
+        """
+        [(first_ts, last_ts, path, sparse)] oldest first, active included.
+        """
+        out = [
+            (s["first_ts"], s["last_ts"], self.root / s["name"], self._load_sparse(s["seq"]))
+            for s in self.load_index()
+        ]
+
+        with self._lock:
+            if self._fd is not None:
+                active = (self._first_ts, self._last_ts, self._segment(self._seq), list(self._sparse))
+            else:
+                seq = self._active_seq()
+                active = (None, None, self._segment(seq), self._load_sparse(seq))
+
+        if active[2].exists():
+            out.append(active)
+        return out
+
+    def _load_sparse(self, seq: int) -> list:
+        try:
+            with open(self._sparse_file(seq), "r", encoding="utf-8") as f:
+                return [tuple(map(int, line.split())) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _scan(self, path: Path, offset: int = 0):
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    @staticmethod
+    def _offset(sparse: list, ts: int) -> int:
+        k = bisect.bisect_right([t for t, _ in sparse], ts) - 1
+        return sparse[k][1] if k >= 0 else 0
+
+    def read(self, start=None, end=None):
+        """
+        Yields every snapshot with start <= ts <= end (datetimes, ISO
+        strings or epoch ms; None = open), oldest first.
+        """
+        start, end = _to_ms(start), _to_ms(end)
+
+        for first_ts, last_ts, path, sparse in self._segments():
+
+            if start is not None and last_ts is not None and last_ts < start:
+                continue
+            if end is not None and first_ts is not None and first_ts > end:
+                return
+
+            offset = self._offset(sparse, start) if start is not None else 0
+
+            for payload in self._scan(path, offset):
+                if start is not None and payload["ts"] < start:
+                    continue
+                if end is not None and payload["ts"] > end:
+                    return
+                yield payload
+
+    def at(self, when) -> dict | None:
+        """
+        The snapshot in force at `when`: the last one saved at or before it.
+        """
+        when = _to_ms(when)
+
+        for first_ts, _, path, sparse in reversed(self._segments()):
+            if first_ts is not None and first_ts > when:
+                continue
+
+            found = None
+            for payload in self._scan(path, self._offset(sparse, when)):
+                if payload["ts"] > when:
+                    break
+                found = payload
+
+            if found is not None:
+                return found
+
+        return None
+
+    def compact(self, keep_segments: int = None):
+        """
+        Seals the active segment and, when keep_segments is set, drops
+        all but that many newest sealed segments.
+        """
+        self.rotate()
+
+        if keep_segments is None:
+            return
+
+        with self._lock:
+            segments = self.load_index()
+            cut = max(len(segments) - keep_segments, 0)
+
+            for seg in segments[:cut]:
+                (self.root / seg["name"]).unlink(missing_ok=True)
+                self._sparse_file(seg["seq"]).unlink(missing_ok=True)
+
+            self._save_index(segments[cut:])
+
+
+_JOURNAL = None
+_JOURNAL_LOCK = threading.Lock()
+
+
+def get_journal() -> SnapshotJournal:
+    global _JOURNAL
+
+    with _JOURNAL_LOCK:
+        if _JOURNAL is None:
+            _JOURNAL = SnapshotJournal()
+            atexit.register(_JOURNAL.close)
+        return _JOURNAL
+
+
 # -------- LOAD SNAPSHOT --------
 
-def load_snapshot():
+def _load_legacy():
     if SNAPSHOT_FILE.exists():
         try:
             return json.loads(SNAPSHOT_FILE.read_text())
@@ -19,20 +447,35 @@ def load_snapshot():
     return None
 
 
+def load_snapshot():
+    try:
+        payload = get_journal().tail()
+    except Exception:
+        payload = None
+
+    return payload if payload is not None else _load_legacy()
+
+
 # -------- SAVE SNAPSHOT (IST TIME) --------
 
 def save_snapshot(state: dict):
-    payload = {
-        "timestamp": datetime.now(IST).isoformat(),
-        "state": state
-    }
-
     try:
-        SNAPSHOT_FILE.write_text(json.dumps(payload, indent=2))
+        get_journal().append(state)
     except Exception:
         pass
 
 
+def read_snapshots(start=None, end=None):
+    """
+    Saved snapshots between start and end, oldest first (audit trail).
+    """
+    return get_journal().read(start, end)
+
+
+def snapshot_at(when):
+    return get_journal().at(when)
+
+
 # -------- PRETTY TIME FOR UI --------
 
 def format_ist_time(iso_time: str):
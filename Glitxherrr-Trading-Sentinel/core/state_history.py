@@ -0,0 +1,180 @@
+# ============================================
+# state_history.py
+# Immutable market states with shared subtrees + a bounded history ring
+# ============================================
+
+import threading
+import time
+from collections import deque
+
+from core.state_diff import diff_market_state
+
+
+# A market state is frozen once, when it is built: dicts become FrozenDict
+# (a read-only dict, so json.dumps, isinstance(x, dict) and every reader
+# keep working) and lists become tuples. freeze() returns frozen input as
+# is, so a new state built from the pipeline graph's unchanged node
+# values shares those subtrees with the previous state, and keeping a
+# state around never needs a deep copy.
+
+HISTORY_SIZE = 256
+
+
+# ============================================================
+# Frozen values
+# ============================================================
+
+class FrozenDict(dict):
+
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("FrozenDict is immutable; use .set() / .set_in() for an updated copy")
+
+    __setitem__ = _immutable
+    __delitem__ = _immutable
+    __ior__ = _immutable
+    clear = _immutable
+    pop = _immutable
+    popitem = _immutable
+    setdefault = _immutable
+    update = _immutable
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def set(self, key, value) -> "FrozenDict":
+        """
+        Copy with one key replaced; every other value is shared.
+        """
+        out = dict(self)
+        out[key] = freeze(value)
+        return FrozenDict(out)
+
+    def set_in(self, path, value) -> "FrozenDict":
+        """
+        Copy with a nested key replaced; only the dicts along `path` are new.
+        """
+        key, rest = path[0], path[1:]
+        if not rest:
+            return self.set(key, value)
+
+        child = self.get(key)
+        if not isinstance(child, FrozenDict):
+            child = FrozenDict()
+        return self.set(key, child.set_in(rest, value))
+
+
+def freeze(value):
+    """
+    Deep read-only view of plain data. Already-frozen parts are reused.
+    """
+    if isinstance(value, FrozenDict):
+        return value
+
+    if isinstance(value, dict):
+        return FrozenDict({k: freeze(v) for k, v in value.items()})
+
+    if isinstance(value, (list, tuple)):
+        items = tuple(freeze(v) for v in value)
+        if isinstance(value, tuple) and all(a is b for a, b in zip(items, value)):
+            return value
+        return items
+
+    return value
+
+
+def thaw(value):
+    """
+    Plain, mutable copy of a frozen value.
+    """
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+
+def get_in(state, path, default=None):
+    for key in path:
+        if not isinstance(state, dict):
+            return default
+        state = state.get(key, default)
+    return state
+
+
+# ============================================================
+# History
+# ============================================================
+
+class StateHistory:
+    """
+    The last `size` distinct market states, oldest first. Entries are
+    (timestamp, state) and states are frozen, so holding them is free.
+    """
+
+    def __init__(self, size: int = HISTORY_SIZE):
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def push(self, state, timestamp: float = None) -> bool:
+        """
+        Appends `state` unless it is the latest one already (same object
+        or equal); returns whether it was appended.
+        """
+        state = freeze(state)
+
+        with self._lock:
+            if self._entries:
+                last = self._entries[-1][1]
+                if last is state or last == state:
+                    return False
+
+            self._entries.append((time.time() if timestamp is None else timestamp, state))
+            return True
+
+    def latest(self):
+        with self._lock:
+            return self._entries[-1][1] if self._entries else None
+
+    def entries(self) -> list:
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def diff(self, back: int = 1) -> dict:
+        """
+        diff_market_state() between the latest state and the one
+        `back` entries before it.
+        """
+        entries = self.entries()
+        if not entries:
+            return diff_market_state(None, {})
+
+        prev = entries[-1 - back][1] if back < len(entries) else None
+        return diff_market_state(prev, entries[-1][1])
+
+    def series(self, path) -> list:
+        """
+        [(timestamp, value)] of one field across the history,
+        e.g. series(("btc", "structure", "trend")).
+        """
+        return [(ts, get_in(state, path)) for ts, state in self.entries()]
+
+    def changes(self, path) -> list:
+        """
+        series() reduced to the points where the value changed.
+        """
+        out = []
+        for ts, value in self.series(path):
+            if not out or out[-1][1] != value:
+                out.append((ts, value))
+        return out
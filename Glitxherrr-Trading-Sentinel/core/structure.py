@@ -2,18 +2,62 @@ import pandas as pd
 import numpy as np
 
 
-def detect_swings(df: pd.DataFrame, left: int = 3, right: int = 3) -> pd.DataFrame:
-    highs = df["high"].values
-    lows = df["low"].values
+def swing_flags(highs, lows, left: int = 3, right: int = 3):
+    """
+    Vectorized swing detection on raw arrays.
+
+    Bar i is a swing high when high[i] is strictly above every high in the
+    `left` bars before it and the `right` bars after it (mirror for lows).
+    The first `left` and last `right` bars are never swings.
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+
+    n = len(highs)
+
+    swing_high = np.zeros(n, dtype=bool)
+    swing_low = np.zeros(n, dtype=bool)
+
+    if n < left + right + 1:
+        return swing_high, swing_low
+
+    centre = slice(left, n - right)
+    m = n - left - right
+
+    # Neighbour extremes via shifted views (window sizes are tiny)
+    left_max = np.full(m, -np.inf)
+    left_min = np.full(m, np.inf)
+    right_max = np.full(m, -np.inf)
+    right_min = np.full(m, np.inf)
+
+    for k in range(1, left + 1):
+        left_max = np.maximum(left_max, highs[left - k:n - right - k])
+        left_min = np.minimum(left_min, lows[left - k:n - right - k])
 
-    swing_high = np.zeros(len(df), dtype=bool)
-    swing_low = np.zeros(len(df), dtype=bool)
+    for k in range(1, right + 1):
+        right_max = np.maximum(right_max, highs[left + k:n - right + k])
+        right_min = np.minimum(right_min, lows[left + k:n - right + k])
 
-    for i in range(left, len(df) - right):
-        if highs[i] > highs[i - left:i].max() and highs[i] > highs[i + 1:i + 1 + right].max():
-            swing_high[i] = True
-        if lows[i] < lows[i - left:i].min() and lows[i] < lows[i + 1:i + 1 + right].min():
-            swing_low[i] = True
+    h = highs[centre]
+    l = lows[centre]
+
+    swing_high[centre] = (h > left_max) & (h > right_max)
+    swing_low[centre] = (l < left_min) & (l < right_min)
+
+    return swing_high, swing_low
+
+
+def swing_points(df: pd.DataFrame, left: int = 3, right: int = 3):
+    """
+    Positional indices of swing highs / lows.
+    Compute once per frame and pass to trend_bias / last_swing_levels.
+    """
+    swing_high, swing_low = swing_flags(df["high"].values, df["low"].values, left, right)
+    return np.flatnonzero(swing_high), np.flatnonzero(swing_low)
+
+
+def detect_swings(df: pd.DataFrame, left: int = 3, right: int = 3) -> pd.DataFrame:
+    swing_high, swing_low = swing_flags(df["high"].values, df["low"].values, left, right)
 
     out = df.copy()
     out["swing_high"] = swing_high
@@ -21,18 +65,19 @@ def detect_swings(df: pd.DataFrame, left: int = 3, right: int = 3) -> pd.DataFra
     return out
 
 
-def trend_bias(df: pd.DataFrame) -> str:
-    sdf = detect_swings(df, left=3, right=3)
-    sh = sdf[sdf["swing_high"]]
-    sl = sdf[sdf["swing_low"]]
+def trend_bias(df: pd.DataFrame, swings=None) -> str:
+    sh, sl = swings if swings is not None else swing_points(df, left=3, right=3)
 
     if len(sh) < 2 or len(sl) < 2:
         return "Neutral"
 
-    last_sh = float(sh.iloc[-1]["high"])
-    prev_sh = float(sh.iloc[-2]["high"])
-    last_sl = float(sl.iloc[-1]["low"])
-    prev_sl = float(sl.iloc[-2]["low"])
+    highs = df["high"].values
+    lows = df["low"].values
+
+    last_sh = float(highs[sh[-1]])
+    prev_sh = float(highs[sh[-2]])
+    last_sl = float(lows[sl[-1]])
+    prev_sl = float(lows[sl[-2]])
 
     if last_sh > prev_sh and last_sl > prev_sl:
         return "Bullish"
@@ -41,11 +86,9 @@ def trend_bias(df: pd.DataFrame) -> str:
     return "Neutral"
 
 
-def last_swing_levels(df: pd.DataFrame):
-    sdf = detect_swings(df, left=3, right=3)
-    sh = sdf[sdf["swing_high"]]
-    sl = sdf[sdf["swing_low"]]
+def last_swing_levels(df: pd.DataFrame, swings=None):
+    sh, sl = swings if swings is not None else swing_points(df, left=3, right=3)
 
-    last_high = float(sh.iloc[-1]["high"]) if len(sh) else None
-    last_low = float(sl.iloc[-1]["low"]) if len(sl) else None
+    last_high = float(df["high"].values[sh[-1]]) if len(sh) else None
+    last_low = float(df["low"].values[sl[-1]]) if len(sl) else None
     return last_high, last_low
@@ -6,26 +6,46 @@ import numpy as np
 # Pivot Detection (NO lookahead, symmetric window)
 # ============================================================
 
-def detect_pivots(df: pd.DataFrame, window: int = 5) -> pd.Series:
+def pivot_flags(highs, lows, window: int = 5) -> np.ndarray:
+    """
+    Array entry point: 1 = pivot high, 2 = pivot low, 0 = none.
+
+    A bar is a pivot high when its high is the max of the centered
+    (2 * window + 1) bar window; pivot low likewise with the min.
+    High wins when both apply. The first / last `window` bars never
+    qualify and any NaN in the window disables it.
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+
+    n = len(highs)
+    pivots = np.zeros(n, dtype=int)
 
-    highs = df["high"]
-    lows  = df["low"]
+    if n < window * 2 + 1:
+        return pivots
 
-    roll_max = highs.rolling(window * 2 + 1, center=True).max()
-    roll_min = lows.rolling(window * 2 + 1, center=True).min()
+    m = n - 2 * window
 
-    pivots = np.zeros(len(df), dtype=int)
+    roll_max = highs[:m].copy()
+    roll_min = lows[:m].copy()
 
-    for i in range(len(df)):
+    for k in range(1, window * 2 + 1):
+        roll_max = np.maximum(roll_max, highs[k:k + m])
+        roll_min = np.minimum(roll_min, lows[k:k + m])
 
-        if i < window or i > len(df) - window - 1:
-            continue
+    centre = slice(window, n - window)
 
-        if highs.iloc[i] >= roll_max.iloc[i]:
-            pivots[i] = 1   # Pivot High
+    is_high = highs[centre] >= roll_max
+    is_low = lows[centre] <= roll_min
 
-        elif lows.iloc[i] <= roll_min.iloc[i]:
-            pivots[i] = 2   # Pivot Low
+    pivots[centre] = np.where(is_high, 1, np.where(is_low, 2, 0))
+
+    return pivots
+
+
+def detect_pivots(df: pd.DataFrame, window: int = 5) -> pd.Series:
+
+    pivots = pivot_flags(df["high"].values, df["low"].values, window)
 
     return pd.Series(pivots, index=df.index)
 
@@ -36,15 +56,27 @@ def detect_pivots(df: pd.DataFrame, window: int = 5) -> pd.Series:
 
 def detect_structure_state(df: pd.DataFrame, lookback: int = 80) -> dict:
 
-    df = df.copy()
+    return detect_structure_arrays(
+        df["high"].values,
+        df["low"].values,
+        df["close"].values,
+        lookback=lookback,
+    )
+
+
+def detect_structure_arrays(high, low, close, lookback: int = 80) -> dict:
+
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
 
     # ---------- Detect pivots ----------
-    df["pivot"] = detect_pivots(df)
+    pivots = pivot_flags(high, low)
 
-    recent = df.tail(lookback)
+    start = max(len(high) - lookback, 0)
+    recent_pivots = pivots[start:]
 
-    highs = recent[recent["pivot"] == 1]
-    lows  = recent[recent["pivot"] == 2]
+    highs = high[start:][recent_pivots == 1]
+    lows  = low[start:][recent_pivots == 2]
 
     structure = {
 
@@ -74,10 +106,10 @@ def detect_structure_state(df: pd.DataFrame, lookback: int = 80) -> dict:
     # ---------- Store last pivot levels ----------
 
     if len(highs) > 0:
-        structure["last_high"] = float(highs["high"].iloc[-1])
+        structure["last_high"] = float(highs[-1])
 
     if len(lows) > 0:
-        structure["last_low"] = float(lows["low"].iloc[-1])
+        structure["last_low"] = float(lows[-1])
 
     # =========================================================
     # Core structure logic
@@ -86,13 +118,13 @@ def detect_structure_state(df: pd.DataFrame, lookback: int = 80) -> dict:
     if len(highs) < 2 or len(lows) < 2:
         return structure   # Not enough data to infer structure
 
-    prev_high = float(highs["high"].iloc[-2])
-    last_high = float(highs["high"].iloc[-1])
+    prev_high = float(highs[-2])
+    last_high = float(highs[-1])
 
-    prev_low  = float(lows["low"].iloc[-2])
-    last_low  = float(lows["low"].iloc[-1])
+    prev_low  = float(lows[-2])
+    last_low  = float(lows[-1])
 
-    close_now = float(recent["close"].iloc[-1])
+    close_now = float(close[-1])
 
     # ---------------------------------------------------------
     # 1) Liquidity Sweep Detection
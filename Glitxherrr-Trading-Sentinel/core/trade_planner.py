@@ -1,7 +1,7 @@
 import pandas as pd
-from core.structure import trend_bias, last_swing_levels
+from core.structure import trend_bias, last_swing_levels, swing_points
 from core.zones import sr_zones
-from data.derivatives import get_funding_rate, get_open_interest, get_global_long_short_ratio
+from data.derivatives import fetch_derivatives_snapshot, LSR_PERIOD
 
 
 def nearest_levels(zones, price: float):
@@ -31,16 +31,55 @@ def is_entry_in_zone(entry: float, zones: list, direction: str) -> bool:
     return False
 
 
-def build_trade_plan(symbol: str, df_15m: pd.DataFrame, df_1h: pd.DataFrame, df_4h: pd.DataFrame):
+def build_trade_plan(
+    symbol: str,
+    df_15m: pd.DataFrame,
+    df_1h: pd.DataFrame,
+    df_4h: pd.DataFrame,
+    derivatives: dict | None = None,
+    lsr_period: str = LSR_PERIOD,
+):
+    """
+    derivatives: a fetch_derivatives_snapshot() result when the caller has
+    already fetched it; otherwise it is fetched here (cached + coalesced).
+    """
     price = float(df_15m.iloc[-1]["close"])
 
-    bias_4h = trend_bias(df_4h)
-    bias_1h = trend_bias(df_1h)
+    if derivatives is None:
+        derivatives = fetch_derivatives_snapshot(symbol, period=lsr_period)
 
-    zones = sr_zones(df_1h, lookback=250)
-    supports, resistances = nearest_levels(zones, price)
+    return plan_from_context(symbol, price, plan_context(df_1h, df_4h), derivatives)
+
+
+def plan_context(df_1h: pd.DataFrame, df_4h: pd.DataFrame) -> dict:
+    """
+    The HTF part of a plan: biases, 1H zones and swing levels.
+    Only changes when a 1H / 4H bar closes, so callers stepping through
+    15m prices (core.backtest) can build it once per 1H bar.
+    """
+    swings_1h = swing_points(df_1h)
+    last_high, last_low = last_swing_levels(df_1h, swings=swings_1h)
 
-    last_high, last_low = last_swing_levels(df_1h)
+    return {
+        "bias_4h": trend_bias(df_4h),
+        "bias_1h": trend_bias(df_1h, swings=swings_1h),
+        "zones": sr_zones(df_1h, lookback=250, swings=swings_1h),
+        "last_high": last_high,
+        "last_low": last_low,
+    }
+
+
+def plan_from_context(symbol: str, price: float, context: dict, derivatives: dict) -> dict:
+    """
+    build_trade_plan() for `price` on top of a plan_context().
+    """
+    bias_4h = context["bias_4h"]
+    bias_1h = context["bias_1h"]
+    zones = context["zones"]
+    last_high = context["last_high"]
+    last_low = context["last_low"]
+
+    supports, resistances = nearest_levels(zones, price)
 
     direction = "WAIT"
     entry = None
@@ -113,15 +152,9 @@ def build_trade_plan(symbol: str, df_15m: pd.DataFrame, df_1h: pd.DataFrame, df_
         rr = None
 
     # Derivatives
-    funding = None
-    oi = None
-    lsr = None
-    try:
-        funding = get_funding_rate(symbol)
-        oi = get_open_interest(symbol)
-        lsr = get_global_long_short_ratio(symbol, period="5m", limit=1)
-    except Exception:
-        pass
+    funding = derivatives.get("funding")
+    oi = derivatives.get("open_interest")
+    lsr = derivatives.get("long_short_ratio")
 
     return {
         "symbol": symbol,
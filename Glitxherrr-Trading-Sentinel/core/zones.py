@@ -1,23 +1,37 @@
 import pandas as pd
 import numpy as np
 
-from core.structure import detect_swings
+from core.structure import swing_points
 
 
-def sr_zones(df: pd.DataFrame, lookback: int = 200):
+SWING_LEFT = 3
+SWING_RIGHT = 3
+
+
+def sr_zones(df: pd.DataFrame, lookback: int = 200, swings=None):
     """
     Build S/R zones and attach strength metrics:
     - touches
     - volume_score
     - age
     - strength (0–100)
+
+    swings: swing_points(df) of the whole frame when the caller already
+    has them (left=right=3); they are cut down to the lookback window.
     """
 
     recent = df.tail(lookback).copy()
 
-    swing_df = detect_swings(recent, left=3, right=3)
-    swing_highs = swing_df[swing_df["swing_high"]]["high"].tail(8).values
-    swing_lows = swing_df[swing_df["swing_low"]]["low"].tail(8).values
+    if swings is None:
+        sh_idx, sl_idx = swing_points(recent, left=SWING_LEFT, right=SWING_RIGHT)
+    else:
+        # A window swing needs its left neighbours inside the window too
+        start = len(df) - len(recent)
+        first = start + SWING_LEFT
+        sh_idx = swings[0][swings[0] >= first] - start
+        sl_idx = swings[1][swings[1] >= first] - start
+    swing_highs = recent["high"].values[sh_idx][-8:]
+    swing_lows = recent["low"].values[sl_idx][-8:]
 
     highs = swing_highs if len(swing_highs) >= 3 else recent["high"].nlargest(6).values
     lows = swing_lows if len(swing_lows) >= 3 else recent["low"].nsmallest(6).values
@@ -44,39 +58,40 @@ def sr_zones(df: pd.DataFrame, lookback: int = 200):
 
     zones = merge_zones(raw_zones, overlap_threshold=0.0015)
 
+    if not zones:
+        return []
+
     # ---------- Strength metrics ----------
+    # One broadcast of zone (bottom, top) against bar (low, high):
+    # hits[k, i] == bar i trades inside zone k
 
     avg_vol = recent["volume"].mean()
 
-    for z in zones:
+    bar_low = recent["low"].values
+    bar_high = recent["high"].values
+    bar_vol = recent["volume"].values
 
-        touches = 0
-        volume_hits = []
-        first_touch_idx = None
+    tops = np.array([z["top"] for z in zones], dtype=float)
+    bottoms = np.array([z["bottom"] for z in zones], dtype=float)
 
-        for i, row in recent.iterrows():
+    hits = (bar_low[None, :] <= tops[:, None]) & (bar_high[None, :] >= bottoms[:, None])
 
-            price_in_zone = (
-                row["low"] <= z["top"] and
-                row["high"] >= z["bottom"]
-            )
+    touch_counts = hits.sum(axis=1)
+    first_touch = hits.argmax(axis=1)
 
-            if price_in_zone:
-                touches += 1
-                volume_hits.append(row["volume"])
+    for k, z in enumerate(zones):
 
-                if first_touch_idx is None:
-                    first_touch_idx = i
+        touches = int(touch_counts[k])
 
         # ---- Age (older = stronger) ----
-        if first_touch_idx is not None:
-            age = len(recent) - recent.index.get_loc(first_touch_idx)
+        if touches:
+            age = len(recent) - int(first_touch[k])
         else:
             age = 0
 
         # ---- Volume score (normalized) ----
-        if volume_hits and avg_vol > 0:
-            volume_score = float(np.mean(volume_hits) / avg_vol)
+        if touches and avg_vol > 0:
+            volume_score = float(np.mean(bar_vol[hits[k]]) / avg_vol)
         else:
             volume_score = 0.0
 
@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import ccxt
+import numpy as np
+import pandas as pd
+
+from data.candle_archive import coverage, series_dir, write_candles
+from data.market_data import fetch_ohlcv_rows
+from data.timeframes import timeframe_ms
+
+
+# ============================================================
+#                  HISTORICAL BACKFILL
+# ============================================================
+
+# Pages fetch_ohlcv(since=...) forward through every range the archive
+# doesn't cover yet and writes each page straight into the archive.
+#
+# Resuming needs no extra bookkeeping for downloaded bars: the archive
+# coverage *is* the checkpoint. The only extra state is backfill.json per
+# series, which remembers ranges the exchange has no bars for (before
+# listing, outages), so reruns don't keep asking for them. A range only
+# becomes a hole when a second request for it agrees, and never reaches
+# the newest closed bar (the exchange may just not have published it yet).
+#
+# Usage:
+#   python -m data.backfill --symbols BTC/USDT ETH/USDT \
+#       --timeframes 15m 1h 4h --since 2021-01-01
+
+PAGE_LIMIT = 1000
+WORKERS = 4
+
+MAX_ATTEMPTS = 4
+RETRY_BASE = 1.0    # seconds, doubled per attempt
+
+
+# ---------------- Known-empty ranges ----------------
+
+def _state_file(exchange_name: str, symbol: str, timeframe: str, root=None):
+    return series_dir(exchange_name, symbol, timeframe, root) / "backfill.json"
+
+
+def load_holes(exchange_name: str, symbol: str, timeframe: str, root=None) -> list:
+    try:
+        with open(_state_file(exchange_name, symbol, timeframe, root), "r", encoding="utf-8") as f:
+            return [tuple(h) for h in json.load(f).get("holes", [])]
+    except FileNotFoundError:
+        return []
+
+
+def _save_holes(exchange_name: str, symbol: str, timeframe: str, holes: list, root=None):
+    path = _state_file(exchange_name, symbol, timeframe, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"holes": sorted(holes)}, f)
+    os.replace(tmp, path)
+
+
+# ---------------- Range math ----------------
+
+def missing_ranges(covered: list, start: int, end: int, period: int) -> list:
+    """
+    [(first_bar, last_bar), ...] inside [start, end] not in any covered
+    (first, last) interval. All values are bar open times in ms.
+    """
+    out = []
+    cursor = start
+
+    for first, last in sorted(covered):
+        if last < cursor:
+            continue
+        if first > end:
+            break
+        if first > cursor:
+            out.append((cursor, min(first - period, end)))
+        cursor = max(cursor, last + period)
+        if cursor > end:
+            break
+
+    if cursor <= end:
+        out.append((cursor, end))
+
+    return out
+
+
+def _to_ms(value) -> int:
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).value // 1_000_000)
+
+
+def _align_up(ts: int, period: int) -> int:
+    return -(-ts // period) * period
+
+
+def last_closed_bar(timeframe: str, now_ms: int = None) -> int:
+    period = timeframe_ms(timeframe)
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return now_ms - now_ms % period - period
+
+
+# ---------------- Fetching ----------------
+
+def _fetch_page(fetch_rows, exchange_name, symbol, timeframe, since, limit):
+    """
+    One page with retries on network / rate-limit errors. Request spacing
+    itself comes from the shared per-exchange RateLimiter.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            rows = fetch_rows(exchange_name, symbol, timeframe, limit=limit, since=since)
+            return np.asarray(rows, dtype=float).reshape(-1, 6)
+        except ccxt.NetworkError:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(RETRY_BASE * (2 ** attempt))
+
+
+def _page_bars(page: np.ndarray, cursor: int, hi: int) -> tuple:
+    ts = page[:, 0].astype(np.int64)
+    keep = (ts >= cursor) & (ts <= hi)
+    return ts[keep], page[keep, 1:]
+
+
+def _add_hole(holes: list, first: int, last: int, newest: int) -> bool:
+    if last >= newest:
+        # Bars up to "now" may simply not be published yet
+        return False
+    holes.append((first, last))
+    return True
+
+
+def backfill_series(
+    exchange_name: str,
+    symbol: str,
+    timeframe: str,
+    start,
+    end=None,
+    page_limit: int = PAGE_LIMIT,
+    fetch_rows=fetch_ohlcv_rows,
+    root=None,
+) -> dict:
+    """
+    Downloads every closed bar in [start, end] the archive doesn't have.
+    `fetch_rows` has fetch_ohlcv_rows()'s signature (swap in a stub to test).
+    """
+    period = timeframe_ms(timeframe)
+    newest = last_closed_bar(timeframe)
+
+    start = _align_up(_to_ms(start), period)
+    end = newest if end is None else min(_to_ms(end) // period * period, newest)
+
+    holes = load_holes(exchange_name, symbol, timeframe, root)
+    covered = [(first, last) for first, last, _ in coverage(exchange_name, symbol, timeframe, root)]
+
+    written = 0
+    requests = 0
+
+    for lo, hi in missing_ranges(covered + holes, start, end, period):
+
+        cursor = lo
+
+        while cursor <= hi:
+            page = _fetch_page(fetch_rows, exchange_name, symbol, timeframe, cursor, page_limit)
+            requests += 1
+            ts, ohlcv = _page_bars(page, cursor, hi)
+
+            if len(ts) == 0 or ts[0] > cursor:
+                # Short answer: ask again before believing it is a real gap
+                page = _fetch_page(fetch_rows, exchange_name, symbol, timeframe, cursor, page_limit)
+                requests += 1
+                ts, ohlcv = _page_bars(page, cursor, hi)
+
+            if len(ts) == 0:
+                # Nothing left in this range on the exchange
+                if _add_hole(holes, cursor, hi, newest):
+                    _save_holes(exchange_name, symbol, timeframe, holes, root)
+                break
+
+            if ts[0] > cursor:
+                # Exchange skipped ahead (pre-listing / outage)
+                if _add_hole(holes, cursor, int(ts[0]) - period, newest):
+                    _save_holes(exchange_name, symbol, timeframe, holes, root)
+
+            written += write_candles(exchange_name, symbol, timeframe, ts, ohlcv, root)
+            cursor = int(ts[-1]) + period
+
+    return {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "written": written,
+        "requests": requests,
+    }
+
+
+def backfill(
+    exchange_name: str,
+    symbols: list,
+    timeframes: list,
+    start,
+    end=None,
+    workers: int = WORKERS,
+    page_limit: int = PAGE_LIMIT,
+    fetch_rows=fetch_ohlcv_rows,
+    root=None,
+    log=print,
+) -> list:
+    """
+    Runs backfill_series() for every (symbol, timeframe) concurrently.
+    A failing series is reported and doesn't stop the others.
+    """
+    results = []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+
+        jobs = {
+            pool.submit(
+                backfill_series,
+                exchange_name, symbol, tf, start, end,
+                page_limit, fetch_rows, root,
+            ): (symbol, tf)
+            for symbol in symbols
+            for tf in timeframes
+        }
+
+        for job in as_completed(jobs):
+            symbol, tf = jobs[job]
+            try:
+                result = job.result()
+            except Exception as e:
+                result = {"symbol": symbol, "timeframe": tf, "error": str(e)}
+                log(f"[backfill] {symbol} {tf}: FAILED — {e}")
+            else:
+                log(
+                    f"[backfill] {symbol} {tf}: "
+                    f"{result['written']} bars in {result['requests']} requests"
+                )
+            results.append(result)
+
+    return results
+
+
+# ============================================================
+#                            CLI
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m data.backfill",
+        description="Download historical candles into the local archive (resumable).",
+    )
+    parser.add_argument("--exchange", default="binance")
+    parser.add_argument("--symbols", nargs="+", required=True)
+    parser.add_argument("--timeframes", nargs="+", default=["15m", "1h", "4h"])
+    parser.add_argument("--since", required=True, help="e.g. 2021-01-01")
+    parser.add_argument("--until", default=None, help="default: last closed bar")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--page", type=int, default=PAGE_LIMIT)
+    parser.add_argument("--root", default=None, help="archive dir (default CANDLE_ARCHIVE_DIR)")
+
+    args = parser.parse_args(argv)
+
+    results = backfill(
+        args.exchange,
+        [s.upper() for s in args.symbols],
+        args.timeframes,
+        args.since,
+        args.until,
+        workers=args.workers,
+        page_limit=args.page,
+        root=args.root,
+    )
+
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+# ============================================================
+#               TTL CACHE + REQUEST COALESCING
+# ============================================================
+
+# Process-wide, so it is shared by every Streamlit session / rerun.
+# Concurrent callers asking for the same key while a fetch is running
+# wait on that one in-flight request instead of issuing their own.
+# Failures are never cached.
+#
+# Stale-while-revalidate: once an entry is past its TTL but still inside
+# its stale window, callers get the old value immediately and a single
+# background refresh is started. Only a cold (or fully expired) key blocks.
+
+# Per-source policy, seconds
+SOURCES = {
+    "candles":     {"ttl": 30,  "stale": 120},     # ttl is also capped at the next bar close
+    "derivatives": {"ttl": 30,  "stale": 120},
+    "dxy":         {"ttl": 600, "stale": 3600},
+    "news":        {"ttl": 900, "stale": 6 * 3600},
+    "calendar":    {"ttl": 900, "stale": 6 * 3600},
+}
+
+REFRESH_WORKERS = 4
+
+_ENTRIES = {}    # key -> (fresh_until, stale_until, value)
+_INFLIGHT = {}   # key -> Future
+_LOCK = threading.Lock()
+
+_refresher = None
+
+
+def _refresh_pool() -> ThreadPoolExecutor:
+    global _refresher
+
+    with _LOCK:
+        if _refresher is None:
+            _refresher = ThreadPoolExecutor(
+                max_workers=REFRESH_WORKERS,
+                thread_name_prefix="cache-refresh",
+            )
+        return _refresher
+
+
+def _run(key, fetch, ttl: float, stale: float, future: Future):
+    try:
+        value = fetch()
+    except BaseException as e:
+        with _LOCK:
+            _INFLIGHT.pop(key, None)
+        future.set_exception(e)
+        raise
+
+    with _LOCK:
+        now = time.monotonic()
+        _ENTRIES[key] = (now + ttl, now + ttl + stale, value)
+        _INFLIGHT.pop(key, None)
+
+    future.set_result(value)
+    return value
+
+
+def cached_call(key, fetch, ttl: float, stale: float = 0.0):
+    now = time.monotonic()
+
+    with _LOCK:
+        hit = _ENTRIES.get(key)
+
+        if hit is not None and hit[0] > now:
+            return hit[2]
+
+        future = _INFLIGHT.get(key)
+
+        if hit is not None and hit[1] > now:
+            # Stale but usable: serve it, refresh once in the background
+            if future is None:
+                future = Future()
+                _INFLIGHT[key] = future
+                revalidate = True
+            else:
+                revalidate = False
+            owner = None
+        else:
+            owner = future is None
+            if owner:
+                future = Future()
+                _INFLIGHT[key] = future
+
+    if owner is None:
+        if revalidate:
+            _refresh_pool().submit(_run, key, fetch, ttl, stale, future)
+        return hit[2]
+
+    if not owner:
+        return future.result()
+
+    return _run(key, fetch, ttl, stale, future)
+
+
+def refresh_call(key, fetch, ttl: float, stale: float = 0.0):
+    """
+    Fetches now and stores the result, regardless of what is cached
+    (used by background warmers). Joins a fetch already in flight.
+    """
+    with _LOCK:
+        future = _INFLIGHT.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _INFLIGHT[key] = future
+
+    if not owner:
+        return future.result()
+
+    return _run(key, fetch, ttl, stale, future)
+
+
+def store(key, value, ttl: float, stale: float = 0.0):
+    """
+    Puts a value pushed from elsewhere (e.g. a stream) as if just fetched.
+    """
+    with _LOCK:
+        now = time.monotonic()
+        _ENTRIES[key] = (now + ttl, now + ttl + stale, value)
+
+
+def _source_args(source: str, key, ttl):
+    policy = SOURCES[source]
+    return (
+        (source,) + tuple(key),
+        policy["ttl"] if ttl is None else ttl,
+        policy["stale"],
+    )
+
+
+def source_call(source: str, key, fetch, ttl: float = None):
+    """
+    cached_call() with the TTL / stale window of a named source.
+    `ttl` overrides the table (e.g. candles aligned to bar close).
+    """
+    key, ttl, stale = _source_args(source, key, ttl)
+    return cached_call(key, fetch, ttl, stale)
+
+
+def source_refresh(source: str, key, fetch, ttl: float = None):
+    """
+    refresh_call() counterpart of source_call().
+    """
+    key, ttl, stale = _source_args(source, key, ttl)
+    return refresh_call(key, fetch, ttl, stale)
+
+
+def source_store(source: str, key, value, ttl: float = None):
+    """
+    store() counterpart of source_call().
+    """
+    key, ttl, stale = _source_args(source, key, ttl)
+    store(key, value, ttl, stale)
+
+
+def cached(source: str):
+    """
+    Decorator: caches a fetcher under a source policy, keyed by its arguments.
+    The undecorated function stays available as `.uncached`, and
+    `.refresh(*args, **kwargs)` refetches and re-caches one call.
+    """
+    def wrap(func):
+
+        def key(args, kwargs):
+            return (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            return source_call(source, key(args, kwargs), lambda: func(*args, **kwargs))
+
+        def refresh(*args, **kwargs):
+            return source_refresh(source, key(args, kwargs), lambda: func(*args, **kwargs))
+
+        inner.uncached = func
+        inner.refresh = refresh
+        return inner
+
+    return wrap
+
+
+def invalidate(key=None):
+    """
+    Drops one cached key, or everything when key is None.
+    """
+    with _LOCK:
+        if key is None:
+            _ENTRIES.clear()
+        else:
+            _ENTRIES.pop(key, None)
@@ -0,0 +1,342 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data.timeframes import timeframe_ms
+
+
+# ============================================================
+#                 COLUMNAR CANDLE ARCHIVE
+# ============================================================
+
+# One directory per (exchange, symbol, timeframe):
+#
+#   <root>/<exchange>/<BTC-USDT>/<15m>/
+#       index.json                    [[first_ts, last_ts, rows, name], ...]
+#       <first_ts>-<last_ts>.npy      int64[6, n]: epoch ms (ascending),
+#                                     then open..volume as float64 bits
+#
+# Segments are immutable and never overlap: writes only add bars that
+# fall outside every existing segment's [first_ts, last_ts] range, so a
+# series can be appended at the end or gap-filled anywhere. Reads use
+# the index to pick segments and np.load(mmap_mode="r") + searchsorted
+# to slice them, so only the requested rows are ever touched.
+#
+# A segment is one file, written under a temporary name and renamed into
+# place before index.json (also renamed into place) refers to it. A
+# crash therefore leaves at most an unreferenced file, never a segment
+# whose timestamps and prices disagree. Compaction writes merged
+# segments under new names and deletes the old files only after the new
+# index is in place; a reader that still lists a deleted segment reloads
+# the index and retries.
+
+ARCHIVE_DIR = Path(os.getenv("CANDLE_ARCHIVE_DIR", "candle_archive"))
+
+MAX_SEGMENTS = 64         # compact a series once it has more segments than this
+SMALL_SEGMENT = 50_000    # only segments below this many rows get merged
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+
+_LOCKS = {}
+_LOCKS_LOCK = threading.Lock()
+
+
+# ---------------- Paths / keys ----------------
+
+def series_dir(exchange_name: str, symbol: str, timeframe: str, root: Path = None) -> Path:
+    safe_symbol = symbol.replace("/", "-").replace(":", "_")
+    return Path(root or ARCHIVE_DIR) / exchange_name.lower() / safe_symbol / timeframe
+
+
+def _series_lock(path: Path) -> threading.Lock:
+    with _LOCKS_LOCK:
+        lock = _LOCKS.get(path)
+        if lock is None:
+            lock = threading.Lock()
+            _LOCKS[path] = lock
+        return lock
+
+
+def _to_ms(value) -> int:
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).value // 1_000_000)
+
+
+# ---------------- Index ----------------
+
+def _load_index(path: Path) -> list:
+    try:
+        with open(path / "index.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def _save_index(path: Path, segments: list):
+    tmp = path / "index.json.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(sorted(segments), f)
+    os.replace(tmp, path / "index.json")
+
+
+def _write_segment(path: Path, ts: np.ndarray, ohlcv: np.ndarray) -> list:
+    name = f"{int(ts[0]):013d}-{int(ts[-1]):013d}"
+
+    block = np.empty((6, len(ts)), dtype=np.int64)
+    block[0] = ts
+    block[1:].view(np.float64)[:] = ohlcv.T
+
+    file = path / f"{name}.npy"
+    tmp = file.with_name(file.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, block)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, file)
+
+    return [int(ts[0]), int(ts[-1]), int(len(ts)), name]
+
+
+def _open_segment(path: Path, name: str) -> tuple:
+    """
+    (ts int64[n], ohlcv float64[5, n]) as read-only views of one mmap.
+    """
+    block = np.load(path / f"{name}.npy", mmap_mode="r")
+    return block[0], block[1:].view(np.float64)
+
+
+# ============================================================
+#                          WRITES
+# ============================================================
+
+def write_candles(
+    exchange_name: str,
+    symbol: str,
+    timeframe: str,
+    ts,
+    ohlcv,
+    root: Path = None,
+) -> int:
+    """
+    Stores bars not yet covered by the archive. ts: epoch ms (n,),
+    ohlcv: (n, 5). Returns the number of rows written.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    ohlcv = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 5)
+
+    if len(ts) == 0:
+        return 0
+
+    order = np.argsort(ts, kind="stable")
+    ts, ohlcv = ts[order], ohlcv[order]
+
+    keep = np.r_[ts[1:] != ts[:-1], True]   # last value wins on duplicate ts
+    ts, ohlcv = ts[keep], ohlcv[keep]
+
+    path = series_dir(exchange_name, symbol, timeframe, root)
+
+    with _series_lock(path):
+        path.mkdir(parents=True, exist_ok=True)
+        segments = _load_index(path)
+
+        # ---- Drop rows inside existing segment ranges ----
+        if segments:
+            firsts = np.array([s[0] for s in segments], dtype=np.int64)
+            lasts = np.array([s[1] for s in segments], dtype=np.int64)
+
+            slot = np.searchsorted(firsts, ts, side="right") - 1
+            covered = (slot >= 0) & (ts <= lasts[np.maximum(slot, 0)])
+
+            ts, ohlcv = ts[~covered], ohlcv[~covered]
+
+            # New rows between the same two existing segments form one segment
+            group = np.searchsorted(firsts, ts, side="right")
+        else:
+            group = np.zeros(len(ts), dtype=np.int64)
+
+        if len(ts) == 0:
+            return 0
+
+        cuts = np.flatnonzero(np.diff(group)) + 1
+
+        for part_ts, part_ohlcv in zip(np.split(ts, cuts), np.split(ohlcv, cuts)):
+            segments.append(_write_segment(path, part_ts, part_ohlcv))
+
+        _save_index(path, segments)
+
+        if len(segments) > MAX_SEGMENTS:
+            _compact(path, segments, timeframe_ms(timeframe), SMALL_SEGMENT)
+
+        return int(len(ts))
+
+
+def _contiguous_runs(segments: list, period: int, max_rows: int = None) -> list:
+    """
+    Groups sorted segments that continue each other bar-for-bar.
+    A gap between segments is never merged over, so it stays fillable.
+    """
+    runs = []
+
+    for seg in sorted(segments):
+        run = runs[-1] if runs else None
+
+        mergeable = (
+            run is not None
+            and seg[0] == run[-1][1] + period
+            and (max_rows is None or (seg[2] < max_rows and run[-1][2] < max_rows))
+        )
+
+        if mergeable:
+            run.append(seg)
+        else:
+            runs.append([seg])
+
+    return runs
+
+
+def _compact(path: Path, segments: list, period: int, max_rows: int = None):
+    """
+    Merges contiguous runs of segments (caller holds the lock).
+    """
+    merged_index = []
+
+    for run in _contiguous_runs(segments, period, max_rows):
+
+        if len(run) == 1:
+            merged_index.append(run[0])
+            continue
+
+        parts = [_open_segment(path, seg[3]) for seg in run]
+        ts = np.concatenate([p[0] for p in parts])
+        ohlcv = np.concatenate([p[1] for p in parts], axis=1).T
+        del parts
+
+        merged_index.append(_write_segment(path, ts, ohlcv))
+
+    _save_index(path, merged_index)
+
+    kept = {seg[3] for seg in merged_index}
+    for seg in segments:
+        if seg[3] not in kept:
+            try:
+                os.remove(path / f"{seg[3]}.npy")
+            except FileNotFoundError:
+                pass
+
+
+def compact_series(exchange_name: str, symbol: str, timeframe: str, root: Path = None):
+    """
+    Merges every contiguous run regardless of size.
+    """
+    path = series_dir(exchange_name, symbol, timeframe, root)
+
+    with _series_lock(path):
+        segments = _load_index(path)
+        if len(segments) > 1:
+            _compact(path, segments, timeframe_ms(timeframe))
+
+
+# ============================================================
+#                          READS
+# ============================================================
+
+def coverage(exchange_name: str, symbol: str, timeframe: str, root: Path = None) -> list:
+    """
+    [(first_ts, last_ts, rows), ...] in time order.
+    """
+    path = series_dir(exchange_name, symbol, timeframe, root)
+    return [(s[0], s[1], s[2]) for s in sorted(_load_index(path))]
+
+
+def read_arrays(
+    exchange_name: str,
+    symbol: str,
+    timeframe: str,
+    start=None,
+    end=None,
+    limit: int = None,
+    root: Path = None,
+) -> tuple:
+    """
+    (ts int64[n], ohlcv float64[5, n]) for start <= ts <= end, at most
+    the last `limit` rows. A range inside one segment is returned as
+    read-only memory-mapped views.
+    """
+    start, end = _to_ms(start), _to_ms(end)
+    path = series_dir(exchange_name, symbol, timeframe, root)
+
+    for attempt in range(3):
+        try:
+            return _read_segments(path, start, end, limit)
+        except FileNotFoundError:
+            # Compacted away after we loaded the index
+            if attempt == 2:
+                raise
+
+
+def _read_segments(path: Path, start, end, limit) -> tuple:
+    segments = sorted(_load_index(path))
+    segments = [
+        s for s in segments
+        if (start is None or s[1] >= start) and (end is None or s[0] <= end)
+    ]
+
+    # Walk newest -> oldest so `limit` only opens the segments it needs
+    ts_parts, ohlcv_parts = [], []
+    rows = 0
+
+    for first, last, n, name in reversed(segments):
+        ts, ohlcv = _open_segment(path, name)
+
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side="right"))
+
+        if limit is not None:
+            lo = max(lo, hi - (limit - rows))
+
+        if hi > lo:
+            ts_parts.append(ts[lo:hi])
+            ohlcv_parts.append(ohlcv[:, lo:hi])
+            rows += hi - lo
+
+        if limit is not None and rows >= limit:
+            break
+
+    if not ts_parts:
+        return np.empty(0, dtype=np.int64), np.empty((5, 0), dtype=np.float64)
+
+    if len(ts_parts) == 1:
+        return ts_parts[0], ohlcv_parts[0]
+
+    return np.concatenate(ts_parts[::-1]), np.concatenate(ohlcv_parts[::-1], axis=1)
+
+
+def read_candles(
+    exchange_name: str,
+    symbol: str,
+    timeframe: str,
+    start=None,
+    end=None,
+    limit: int = None,
+    root: Path = None,
+) -> pd.DataFrame:
+    """
+    fetch_ohlcv()-compatible frame (timestamp, open, high, low, close, volume).
+    """
+    ts, ohlcv = read_arrays(exchange_name, symbol, timeframe, start, end, limit, root)
+
+    df = pd.DataFrame(ohlcv.T, columns=OHLCV, copy=False)
+    df.insert(0, "timestamp", ts.view("datetime64[ms]"))
+    return df
+
+
+def last_timestamp(exchange_name: str, symbol: str, timeframe: str, root: Path = None):
+    segments = _load_index(series_dir(exchange_name, symbol, timeframe, root))
+    return max(s[1] for s in segments) if segments else None
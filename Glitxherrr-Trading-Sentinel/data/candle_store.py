@@ -0,0 +1,272 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from data.cache import SOURCES, source_call, source_refresh
+from data.candle_archive import read_arrays, write_candles
+from data.market_data import fetch_ohlcv_rows
+from data.timeframes import closed_bars, timeframe_seconds
+
+
+# ============================================================
+#                 INCREMENTAL CANDLE STORE
+# ============================================================
+
+# Keyed by (exchange, symbol, timeframe). After the first full download
+# each refresh only asks the exchange for bars since the last stored
+# timestamp, which also re-delivers (and replaces) the still-forming bar.
+#
+# With CANDLE_ARCHIVE_LIVE=1, closed bars are also appended to the on-disk
+# archive (data.candle_archive) and a cold key is seeded from it, so a
+# restart only downloads the bars since the last run. Off by default: the
+# archive is otherwise only written by data.backfill.
+#
+# A key can also be kept current by a WebSocket stream (data.stream), which
+# pushes bars through apply_bar(). While a key is live, get_candles() reads
+# the stored series directly: no cache lookup and no REST call.
+
+MAX_BARS = 1500
+
+ARCHIVE_CLOSED_BARS = os.getenv("CANDLE_ARCHIVE_LIVE", "").strip().lower() in ("1", "true", "yes")
+
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+_STORE = {}
+_ARCHIVED = {}   # key -> last archived bar timestamp
+_LIVE = set()    # keys fed by a stream
+_KEY_LOCKS = {}
+_STORE_LOCK = threading.Lock()
+
+
+def _key(exchange_name: str, symbol: str, timeframe: str) -> tuple:
+    return (exchange_name.lower(), symbol, timeframe)
+
+
+def _key_lock(key: tuple) -> threading.Lock:
+    with _STORE_LOCK:
+        lock = _KEY_LOCKS.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _KEY_LOCKS[key] = lock
+        return lock
+
+
+def candle_ttl(timeframe: str, now: float = None) -> float:
+    """
+    Seconds until the current bar closes, capped by the forming-bar TTL,
+    so a cached frame never outlives the bar it was built on.
+    """
+    period = timeframe_seconds(timeframe)
+    now = time.time() if now is None else now
+    until_close = period - (now % period)
+    return min(until_close, SOURCES["candles"]["ttl"])
+
+
+def _to_arrays(rows) -> dict:
+    arr = np.asarray(rows, dtype=float).reshape(-1, 6)
+    return {
+        "ts": arr[:, 0].astype(np.int64),
+        "ohlcv": arr[:, 1:],
+    }
+
+
+def _merge(entry: dict, new: dict) -> dict:
+    """
+    Drops stored bars at/after the first new timestamp, then appends.
+    """
+    if len(new["ts"]) == 0:
+        return entry
+
+    keep = entry["ts"] < new["ts"][0]
+
+    return {
+        "ts": np.concatenate([entry["ts"][keep], new["ts"]])[-MAX_BARS:],
+        "ohlcv": np.concatenate([entry["ohlcv"][keep], new["ohlcv"]])[-MAX_BARS:],
+    }
+
+
+def _from_archive(key: tuple, limit: int):
+    """
+    Store entry with (up to) the last `limit` archived bars, or None.
+    """
+    try:
+        ts, ohlcv = read_arrays(*key, limit=limit)
+    except (OSError, ValueError):
+        return None
+
+    if len(ts) == 0:
+        return None
+
+    _ARCHIVED[key] = int(ts[-1])
+    return {"ts": np.array(ts), "ohlcv": np.array(ohlcv.T)}
+
+
+def _archive_closed(key: tuple, entry: dict):
+    """
+    Appends closed bars that aren't archived yet. Never fails the caller.
+    """
+    ts = entry["ts"]
+    new = closed_bars(ts, key[2]) & (ts > _ARCHIVED.get(key, -1))
+
+    if not new.any():
+        return
+
+    try:
+        write_candles(*key, ts[new], entry["ohlcv"][new])
+    except (OSError, ValueError):
+        return
+
+    _ARCHIVED[key] = int(ts[new][-1])
+
+
+def _to_frame(entry: dict, limit: int) -> pd.DataFrame:
+    ts = entry["ts"][-limit:]
+    ohlcv = entry["ohlcv"][-limit:]
+
+    df = pd.DataFrame(ohlcv, columns=COLUMNS[1:])
+    df.insert(0, "timestamp", pd.to_datetime(ts, unit="ms"))
+    return df
+
+
+def refresh_candles(exchange_name: str, symbol: str, timeframe: str, limit: int = 400) -> dict:
+    """
+    Brings the stored series up to date and returns the raw arrays.
+    """
+    key = _key(exchange_name, symbol, timeframe)
+
+    with _key_lock(key):
+        entry = _STORE.get(key)
+
+        seeded = None
+        if entry is None and ARCHIVE_CLOSED_BARS:
+            # Closed bars only, possibly short: topped up below like any entry
+            entry = seeded = _from_archive(key, limit)
+
+        if entry is None or (len(entry["ts"]) < limit and entry is not seeded):
+            entry = _to_arrays(
+                fetch_ohlcv_rows(exchange_name, symbol, timeframe, limit=limit)
+            )
+
+        else:
+            since = int(entry["ts"][-1])
+            new = _to_arrays(
+                fetch_ohlcv_rows(exchange_name, symbol, timeframe, limit=limit, since=since)
+            )
+
+            merged = _merge(entry, new)
+
+            if len(new["ts"]) >= limit or len(merged["ts"]) < limit:
+                # Too far behind to catch up in one page (or a short archive
+                # seed) — take the latest window
+                entry = _to_arrays(
+                    fetch_ohlcv_rows(exchange_name, symbol, timeframe, limit=limit)
+                )
+            else:
+                entry = merged
+
+        _STORE[key] = entry
+
+        if ARCHIVE_CLOSED_BARS:
+            _archive_closed(key, entry)
+
+    return entry
+
+
+def get_candles(exchange_name: str, symbol: str, timeframe: str, limit: int = 400) -> pd.DataFrame:
+    """
+    Drop-in for fetch_ohlcv(): same columns, last `limit` bars.
+    Cached per bar (see candle_ttl); treat the frame as read-only.
+    """
+    live = _live_frame(exchange_name, symbol, timeframe, limit)
+    if live is not None:
+        return live
+
+    return source_call(*_candle_source(exchange_name, symbol, timeframe, limit))
+
+
+def warm_candles(exchange_name: str, symbol: str, timeframe: str, limit: int = 400) -> pd.DataFrame:
+    """
+    Like get_candles(), but always pulls from the exchange first and
+    re-caches the frame (scheduler use). Live keys need no pull.
+    """
+    live = _live_frame(exchange_name, symbol, timeframe, limit)
+    if live is not None:
+        return live
+
+    return source_refresh(*_candle_source(exchange_name, symbol, timeframe, limit))
+
+
+def _candle_source(exchange_name: str, symbol: str, timeframe: str, limit: int) -> tuple:
+    return (
+        "candles",
+        (_key(exchange_name, symbol, timeframe), limit),
+        lambda: _to_frame(refresh_candles(exchange_name, symbol, timeframe, limit=limit), limit),
+        candle_ttl(timeframe),
+    )
+
+
+# ============================================================
+#                      STREAMED BARS
+# ============================================================
+
+def _live_frame(exchange_name: str, symbol: str, timeframe: str, limit: int):
+    key = _key(exchange_name, symbol, timeframe)
+    if key not in _LIVE:
+        return None
+
+    entry = _STORE.get(key)
+    if entry is None or len(entry["ts"]) < limit:
+        return None
+
+    return _to_frame(entry, limit)
+
+
+def set_live(exchange_name: str, symbol: str, timeframe: str, live: bool = True):
+    """
+    Marks a key as stream-fed (or back to polled, e.g. on disconnect).
+    """
+    key = _key(exchange_name, symbol, timeframe)
+    with _STORE_LOCK:
+        if live:
+            _LIVE.add(key)
+        else:
+            _LIVE.discard(key)
+
+
+def apply_bar(exchange_name: str, symbol: str, timeframe: str, row, closed: bool = False) -> bool:
+    """
+    Merges one streamed bar [ts_ms, o, h, l, c, v] into the stored series.
+    Returns False when the bar doesn't continue the series (cold key or
+    missed bars); the caller should backfill with refresh_candles().
+    """
+    key = _key(exchange_name, symbol, timeframe)
+
+    with _key_lock(key):
+        entry = _STORE.get(key)
+        if entry is None or len(entry["ts"]) == 0:
+            return False
+
+        ts = int(row[0])
+        last = int(entry["ts"][-1])
+
+        if ts < last:
+            return True   # late update of an older bar; REST already has it
+        if ts > last + timeframe_seconds(timeframe) * 1000:
+            return False
+
+        entry = _merge(entry, _to_arrays([row]))
+        _STORE[key] = entry
+
+        if closed and ARCHIVE_CLOSED_BARS:
+            _archive_closed(key, entry)
+
+    return True
+
+
+def clear_candles():
+    with _STORE_LOCK:
+        _STORE.clear()
+        _LIVE.clear()
@@ -1,14 +1,21 @@
-import requests
+from data.cache import source_call, source_refresh, source_store
+from data.transport import get_json
 
 
 BINANCE_FAPI = "https://fapi.binance.com"
 
+# Funding / OI / L-S ratio move slowly relative to a UI refresh; their
+# TTL / stale window is the "derivatives" entry in data.cache.SOURCES.
+
+# Long/short ratio bucket used everywhere (planner + snapshot)
+LSR_PERIOD = "15m"
+
 
 def to_binance_symbol(symbol: str) -> str:
     return symbol.replace("/", "").upper()
 
 
-def get_funding_rate(symbol: str):
+def _fetch_funding_rate(symbol: str):
     """
     ✅ Reliable funding snapshot using Premium Index.
     Returns latest funding rate (lastFundingRate) + nextFundingTime.
@@ -17,9 +24,7 @@ def get_funding_rate(symbol: str):
     url = f"{BINANCE_FAPI}/fapi/v1/premiumIndex"
     params = {"symbol": s}
 
-    r = requests.get(url, params=params, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    data = get_json(url, params=params)
 
     # lastFundingRate is string
     fr = data.get("lastFundingRate") or data.get("fundingRate")
@@ -35,7 +40,7 @@ def get_funding_rate(symbol: str):
     }
 
 
-def get_open_interest(symbol: str):
+def _fetch_open_interest(symbol: str):
     """
     Returns current open interest for Binance USDT-M perpetual.
     """
@@ -43,16 +48,14 @@ def get_open_interest(symbol: str):
     url = f"{BINANCE_FAPI}/fapi/v1/openInterest"
     params = {"symbol": s}
 
-    r = requests.get(url, params=params, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    data = get_json(url, params=params)
 
     return {
         "openInterest": float(data["openInterest"]),
     }
 
 
-def get_global_long_short_ratio(symbol: str, period: str = "15m", limit: int = 1):
+def _fetch_global_long_short_ratio(symbol: str, period: str, limit: int):
     """
     Global Account Long/Short Ratio (Binance Futures).
     period: 5m, 15m, 30m, 1h, 2h, 4h, 6h, 12h, 1d
@@ -61,9 +64,7 @@ def get_global_long_short_ratio(symbol: str, period: str = "15m", limit: int = 1
     url = f"{BINANCE_FAPI}/futures/data/globalLongShortAccountRatio"
     params = {"symbol": s, "period": period, "limit": limit}
 
-    r = requests.get(url, params=params, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    data = get_json(url, params=params)
 
     if not data:
         return None
@@ -76,34 +77,100 @@ def get_global_long_short_ratio(symbol: str, period: str = "15m", limit: int = 1
     }
 
 
-def fetch_derivatives_snapshot(symbol: str):
+# ============================================================
+#            CACHED + COALESCED PUBLIC ENDPOINTS
+# ============================================================
+
+def get_funding_rate(symbol: str):
+    s = to_binance_symbol(symbol)
+    return source_call(
+        "derivatives",
+        ("funding", s),
+        lambda: _fetch_funding_rate(symbol),
+    )
+
+
+def get_open_interest(symbol: str):
+    s = to_binance_symbol(symbol)
+    return source_call(
+        "derivatives",
+        ("open_interest", s),
+        lambda: _fetch_open_interest(symbol),
+    )
+
+
+def get_global_long_short_ratio(symbol: str, period: str = LSR_PERIOD, limit: int = 1):
+    s = to_binance_symbol(symbol)
+    return source_call(
+        "derivatives",
+        ("long_short_ratio", s, period, limit),
+        lambda: _fetch_global_long_short_ratio(symbol, period, limit),
+    )
+
+
+def warm_derivatives(symbol: str, period: str = LSR_PERIOD):
     """
-    Unified snapshot so your core engine can use:
-    plan["funding"]["fundingBps"]
-    plan["open_interest"]["openInterest"]
-    plan["long_short_ratio"]["longShortRatio"]
+    Refetches every snapshot endpoint into the cache (scheduler use).
+    Errors are left to the caller.
     """
-    snap = {}
+    s = to_binance_symbol(symbol)
+    source_refresh("derivatives", ("funding", s), lambda: _fetch_funding_rate(symbol))
+    warm_open_interest(symbol)
+    source_refresh(
+        "derivatives",
+        ("long_short_ratio", s, period, 1),
+        lambda: _fetch_global_long_short_ratio(symbol, period, 1),
+    )
 
-    # funding
-    try:
-        fr = get_funding_rate(symbol)
-        snap["funding"] = fr if fr else {"fundingBps": None}
-    except Exception as e:
-        snap["funding"] = {"fundingBps": None, "error": str(e)}
 
-    # open interest
-    try:
-        oi = get_open_interest(symbol)
-        snap["open_interest"] = oi if oi else {"openInterest": None}
-    except Exception as e:
-        snap["open_interest"] = {"openInterest": None, "error": str(e)}
+def warm_open_interest(symbol: str):
+    s = to_binance_symbol(symbol)
+    return source_refresh("derivatives", ("open_interest", s), lambda: _fetch_open_interest(symbol))
+
 
-    # long/short ratio
+def publish_funding(symbol: str, funding: dict):
+    """
+    Caches a funding snapshot (same shape as _fetch_funding_rate) pushed
+    by the mark-price stream, so get_funding_rate() serves it directly.
+    """
+    source_store("derivatives", ("funding", to_binance_symbol(symbol)), funding)
+
+
+def snapshot_field(empty: dict, call):
+    """
+    One snapshot entry: call() result, or `empty` (+ "error") when it fails.
+    """
     try:
-        lsr = get_global_long_short_ratio(symbol, period="15m", limit=1)
-        snap["long_short_ratio"] = lsr if lsr else {"longShortRatio": None}
+        value = call()
+        return value if value else dict(empty)
     except Exception as e:
-        snap["long_short_ratio"] = {"longShortRatio": None, "error": str(e)}
+        return {**empty, "error": str(e)}
 
-    return snap
+
+def derivatives_calls(symbol: str, period: str = LSR_PERIOD):
+    """
+    (key, empty value, fetcher) for every endpoint in a derivatives snapshot.
+    Lets callers run the endpoints concurrently and still build the same snapshot.
+    """
+    return [
+        ("funding", {"fundingBps": None}, lambda: get_funding_rate(symbol)),
+        ("open_interest", {"openInterest": None}, lambda: get_open_interest(symbol)),
+        (
+            "long_short_ratio",
+            {"longShortRatio": None},
+            lambda: get_global_long_short_ratio(symbol, period=period, limit=1),
+        ),
+    ]
+
+
+def fetch_derivatives_snapshot(symbol: str, period: str = LSR_PERIOD):
+    """
+    Unified snapshot so your core engine can use:
+    plan["funding"]["fundingBps"]
+    plan["open_interest"]["openInterest"]
+    plan["long_short_ratio"]["longShortRatio"]
+    """
+    return {
+        key: snapshot_field(empty, call)
+        for key, empty, call in derivatives_calls(symbol, period=period)
+    }
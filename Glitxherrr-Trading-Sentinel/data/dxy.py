@@ -1,41 +1,9 @@
-import requests
 import pandas as pd
 import numpy as np
-from datetime import datetime, timezone, timedelta
 from io import StringIO
 
-
-# ============================================================
-#                      SIMPLE CACHE
-# ============================================================
-
-_CACHE = {
-    "timestamp": None,
-    "result": None
-}
-
-CACHE_MINUTES = 10
-
-
-def _now_utc():
-    return datetime.now(timezone.utc)
-
-
-def _get_cache():
-    ts = _CACHE["timestamp"]
-
-    if ts is None:
-        return None
-
-    if (_now_utc() - ts) < timedelta(minutes=CACHE_MINUTES):
-        return _CACHE["result"]
-
-    return None
-
-
-def _set_cache(result):
-    _CACHE["timestamp"] = _now_utc()
-    _CACHE["result"] = result
+from data.cache import cached
+from data.transport import get
 
 
 # ============================================================
@@ -125,8 +93,7 @@ def _fetch_fred_dxy():
     """
     url = "https://fred.stlouisfed.org/graph/fredgraph.csv?id=DTWEXM"
 
-    r = requests.get(url, timeout=20)
-    r.raise_for_status()
+    r = get(url)
 
     df = pd.read_csv(StringIO(r.text))
 
@@ -145,8 +112,7 @@ def _fetch_stooq_dxy():
     """
     url = "https://stooq.com/q/d/l/?s=dx.f&i=d"
 
-    r = requests.get(url, timeout=20)
-    r.raise_for_status()
+    r = get(url)
 
     df = pd.read_csv(StringIO(r.text))
 
@@ -169,6 +135,7 @@ def _fetch_stooq_dxy():
 #                       PUBLIC API
 # ============================================================
 
+@cached("dxy")
 def dxy_detector(interval: str = "1h") -> dict:
     """
     Returns a macro regime snapshot for USD (DXY proxy).
@@ -185,10 +152,6 @@ def dxy_detector(interval: str = "1h") -> dict:
     }
     """
 
-    cached = _get_cache()
-    if cached:
-        return cached
-
     # ---- Primary source: FRED ----
     try:
         df = _fetch_fred_dxy()
@@ -200,8 +163,6 @@ def dxy_detector(interval: str = "1h") -> dict:
 
         out["source"] = "FRED"
 
-        _set_cache(out)
-
         return out
 
     except Exception:
@@ -218,8 +179,6 @@ def dxy_detector(interval: str = "1h") -> dict:
 
         out["source"] = "Stooq"
 
-        _set_cache(out)
-
         return out
 
     except Exception:
@@ -1,17 +1,36 @@
 import feedparser
 from datetime import datetime
 
+from data.cache import cached
+from data.transport import get
+
 
 GOLD_RSS = "https://www.investing.com/rss/news_11.rss"
 MACRO_RSS = "https://www.investing.com/rss/news_14.rss"
 
 
+@cached("news")
+def _fetch_feed(url: str) -> list:
+    return feedparser.parse(get(url).content).entries
+
+
+def warm_gold_news():
+    """
+    Refetches both feeds into the cache (scheduler use).
+    Errors are left to the caller.
+    """
+    for url in (GOLD_RSS, MACRO_RSS):
+        _fetch_feed.refresh(url)
+
+
 def fetch_gold_news(limit=6):
     feeds = []
 
     for url in (GOLD_RSS, MACRO_RSS):
-        feed = feedparser.parse(url)
-        feeds.extend(feed.entries)
+        try:
+            feeds.extend(_fetch_feed(url))
+        except Exception:
+            continue
 
     out = []
     for e in feeds[:limit]:
@@ -1,16 +1,29 @@
-import requests
 from datetime import datetime, timedelta, timezone
 
+from data.cache import cached
+from data.transport import get_json
+
 
 CAL_URL = "https://economic-calendar-api.vercel.app/api/events"
 
 
+@cached("calendar")
+def _fetch_calendar():
+    return get_json(CAL_URL)
+
+
+def warm_macro_events():
+    """
+    Refetches the calendar into the cache (scheduler use).
+    Errors are left to the caller.
+    """
+    return _fetch_calendar.refresh()
+
+
 def fetch_macro_events():
 
     try:
-        r = requests.get(CAL_URL, timeout=20)
-        r.raise_for_status()
-        data = r.json()
+        data = _fetch_calendar()
     except Exception:
         return []
 
@@ -1,7 +1,10 @@
 import yfinance as yf
 import pandas as pd
 
+from data.cache import cached
 
+
+@cached("dxy")
 def fetch_dxy_ohlcv(interval="4h", limit=400):
 
     ticker = yf.Ticker("DX-Y.NYB")
@@ -1,19 +1,158 @@
+import threading
+import time
+
 import ccxt
 import pandas as pd
 
 
-def get_exchange(name: str = "binance"):
+# ============================================================
+#                 EXCHANGE CLIENT REGISTRY
+# ============================================================
+
+# Clients are process-wide and reused across calls / Streamlit reruns,
+# so the HTTP session (keep-alive), market metadata and throttling state
+# survive between candle fetches.
+
+MARKETS_TTL = 3600  # seconds before load_markets() is refreshed
+
+_EXCHANGES = {}
+_LIMITERS = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+class RateLimiter:
+    """
+    Thread-safe request spacing, shared by every client of one exchange.
+    Each caller reserves the next free slot under the lock and sleeps
+    outside of it, so concurrent callers queue instead of bursting.
+    """
+
+    def __init__(self, interval_ms: float):
+        self.interval = max(0.0, float(interval_ms)) / 1000.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _options_key(options) -> tuple:
+    if not options:
+        return ()
+    return tuple(sorted((k, repr(v)) for k, v in options.items()))
+
+
+def _ensure_markets(entry: dict):
+    now = time.monotonic()
+    if entry["markets_at"] is not None and (now - entry["markets_at"]) < MARKETS_TTL:
+        return
+
+    with entry["lock"]:
+        if entry["markets_at"] is not None and (time.monotonic() - entry["markets_at"]) < MARKETS_TTL:
+            return
+
+        reload = entry["markets_at"] is not None
+        get_rate_limiter(entry["client"]).wait()
+        entry["client"].load_markets(reload=reload)
+        entry["markets_at"] = time.monotonic()
+
+
+def get_rate_limiter(client) -> RateLimiter:
+    """
+    One limiter per exchange id, spaced by the exchange's own rateLimit.
+    """
+    with _REGISTRY_LOCK:
+        limiter = _LIMITERS.get(client.id)
+        if limiter is None:
+            limiter = RateLimiter(client.rateLimit)
+            _LIMITERS[client.id] = limiter
+
+    return limiter
+
+
+def get_exchange(name: str = "binance", options: dict | None = None):
+    """
+    Returns the shared ccxt client for (exchange, options).
+    Markets are loaded once and refreshed every MARKETS_TTL seconds.
+    """
     name = name.lower()
     if not hasattr(ccxt, name):
         raise ValueError(f"Exchange '{name}' not supported in ccxt.")
-    exchange_class = getattr(ccxt, name)
-    ex = exchange_class({"enableRateLimit": True})
-    return ex
 
+    key = (name, _options_key(options))
+
+    with _REGISTRY_LOCK:
+        entry = _EXCHANGES.get(key)
+
+        if entry is None:
+            exchange_class = getattr(ccxt, name)
+
+            # Throttling is done by the shared RateLimiter, not per client
+            config = {**(options or {}), "enableRateLimit": False}
+
+            entry = {
+                "client": exchange_class(config),
+                "markets_at": None,
+                "lock": threading.Lock(),
+            }
+            _EXCHANGES[key] = entry
+
+    _ensure_markets(entry)
+    return entry["client"]
 
-def fetch_ohlcv(exchange_name: str, symbol: str, timeframe: str, limit: int = 500) -> pd.DataFrame:
+
+def close_exchanges():
+    """
+    Drops all pooled clients (closing their HTTP sessions).
+    """
+    with _REGISTRY_LOCK:
+        entries = list(_EXCHANGES.values())
+        _EXCHANGES.clear()
+
+    for entry in entries:
+        session = getattr(entry["client"], "session", None)
+        if session is not None:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+
+# ============================================================
+#                        CANDLES
+# ============================================================
+
+def fetch_ohlcv_rows(
+    exchange_name: str,
+    symbol: str,
+    timeframe: str,
+    limit: int = 500,
+    since: int | None = None,
+) -> list:
+    """
+    Raw ccxt rows: [timestamp_ms, open, high, low, close, volume].
+    """
     ex = get_exchange(exchange_name)
-    ohlcv = ex.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+
+    get_rate_limiter(ex).wait()
+    return ex.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+
+
+def fetch_ohlcv(
+    exchange_name: str,
+    symbol: str,
+    timeframe: str,
+    limit: int = 500,
+    since: int | None = None,
+) -> pd.DataFrame:
+    ohlcv = fetch_ohlcv_rows(exchange_name, symbol, timeframe, limit=limit, since=since)
 
     df = pd.DataFrame(
         ohlcv,
@@ -1,17 +1,17 @@
-import requests
-import time
 from datetime import datetime
 
+from data.cache import cached
+from data.transport import get_json
+
 # CryptoCompare free news feed
 NEWS_URL = "https://min-api.cryptocompare.com/data/v2/news/?lang=EN"
 
-# ---------------- Cache ----------------
-
-_cached_news = []
-_last_fetch = 0
+# Cached under the "news" source policy (data.cache.SOURCES); a failed
+# refresh keeps serving the last good list for the stale window. Past
+# that window fetch_important_news() still falls back to the last good
+# list, so an upstream outage never empties the panel.
 
-# 30 minutes cooldown (matches UI refresh)
-COOLDOWN = 1800  
+_last_good = []
 
 
 # ---------------- Helpers ----------------
@@ -36,6 +36,38 @@ def _safe_time(ts):
 
 # ---------------- Main Fetch ----------------
 
+@cached("news")
+def _fetch_news() -> list:
+
+    raw = get_json(NEWS_URL).get("Data", [])
+
+    news = []
+
+    for item in raw:
+
+        title = _clean_text(item.get("title"))
+        source = item.get("source", "Unknown")
+        url = item.get("url")
+        published = _safe_time(item.get("published_on"))
+
+        news.append({
+            "title": title,
+            "source": source,
+            "url": url,
+            "published": published
+        })
+
+    return news
+
+
+def warm_news() -> list:
+    """
+    Refetches the feed into the cache (scheduler use).
+    Errors are left to the caller.
+    """
+    return _fetch_news.refresh()
+
+
 def fetch_important_news(limit: int = 8):
     """
     Returns list of dicts:
@@ -47,43 +79,12 @@ def fetch_important_news(limit: int = 8):
     }
     """
 
-    global _cached_news, _last_fetch
-
-    now = time.time()
-
-    # ---- Return cache if within cooldown ----
-    if _cached_news and (now - _last_fetch) < COOLDOWN:
-        return _cached_news[:limit]
+    global _last_good
 
     try:
-        r = requests.get(NEWS_URL, timeout=10)
-        r.raise_for_status()
-
-        raw = r.json().get("Data", [])
-
-        news = []
-
-        for item in raw:
-
-            title = _clean_text(item.get("title"))
-            source = item.get("source", "Unknown")
-            url = item.get("url")
-            published = _safe_time(item.get("published_on"))
-
-            news.append({
-                "title": title,
-                "source": source,
-                "url": url,
-                "published": published
-            })
-
-        # ---- Save cache ----
-        _cached_news = news
-        _last_fetch = now
-
-        return news[:limit]
-
+        news = _fetch_news()
     except Exception:
+        return _last_good[:limit]
 
-        # Fallback to last known cache if API fails
-        return _cached_news[:limit]
+    _last_good = news
+    return news[:limit]
@@ -0,0 +1,171 @@
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+#               SHARED-MEMORY CANDLE BLOCK
+# ============================================================
+
+# Many (symbol, timeframe) series packed into two shared-memory
+# segments:
+#   ts     int64[total]        epoch ms
+#   ohlcv  float64[5, total]   one contiguous row per column
+# plus an index {(symbol, timeframe): (offset, length)}.
+#
+# The creator fills it once; worker processes attach by name and slice
+# views out of it, so a task only ships the small handle dict.
+# Column-major OHLCV means a series slice is already laid out the way
+# pandas stores a float block, so frames are built without copying.
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+
+MAX_ATTACHED = 2   # blocks a worker keeps mapped (current + previous)
+
+
+class SharedCandles:
+    """
+    Creator side. Use as a context manager, or call close() when every
+    task reading `handle` has finished; close() also unlinks.
+    """
+
+    def __init__(self, series: dict):
+        """
+        series: {(symbol, timeframe): {"ts": int64[n], "ohlcv": float64[n, 5]}}
+        """
+        total = sum(len(entry["ts"]) for entry in series.values())
+        size = max(total, 1) * 8
+
+        self._ts_shm = shared_memory.SharedMemory(create=True, size=size)
+        self._ohlcv_shm = shared_memory.SharedMemory(create=True, size=size * len(OHLCV))
+
+        ts = np.ndarray((total,), dtype=np.int64, buffer=self._ts_shm.buf)
+        ohlcv = np.ndarray((len(OHLCV), total), dtype=np.float64, buffer=self._ohlcv_shm.buf)
+
+        index = {}
+        offset = 0
+
+        for key, entry in series.items():
+            n = len(entry["ts"])
+            ts[offset:offset + n] = entry["ts"]
+            ohlcv[:, offset:offset + n] = entry["ohlcv"].T
+            index[key] = (offset, n)
+            offset += n
+
+        del ts, ohlcv   # release buffer exports so close() can succeed
+
+        self.handle = {
+            "ts": self._ts_shm.name,
+            "ohlcv": self._ohlcv_shm.name,
+            "total": total,
+            "index": index,
+        }
+
+    def handle_for(self, keys) -> dict:
+        """
+        Handle restricted to some (symbol, timeframe) keys, so a task
+        doesn't carry the index of the whole universe.
+        """
+        return {**self.handle, "index": {key: self.handle["index"][key] for key in keys}}
+
+    def close(self):
+        for shm in (self._ts_shm, self._ohlcv_shm):
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def share_frames(frames: dict) -> SharedCandles:
+    """
+    {(symbol, timeframe): fetch_ohlcv()-style df} -> SharedCandles holding
+    exactly those bars.
+    """
+    return SharedCandles({
+        key: {
+            "ts": df["timestamp"].to_numpy().astype("datetime64[ms]").view(np.int64),
+            "ohlcv": np.column_stack([df[c].to_numpy(dtype=np.float64) for c in OHLCV]),
+        }
+        for key, df in frames.items()
+    })
+
+
+# ============================================================
+#                     READER SIDE (workers)
+# ============================================================
+
+_ATTACHED = {}   # (ts name, ohlcv name) -> (segments, ts view, ohlcv view)
+_ATTACH_LOCK = threading.Lock()
+
+
+def _attach(handle: dict) -> tuple:
+    key = (handle["ts"], handle["ohlcv"])
+
+    with _ATTACH_LOCK:
+        hit = _ATTACHED.get(key)
+        if hit is not None:
+            return hit[1], hit[2]
+
+        ts_shm = shared_memory.SharedMemory(name=handle["ts"])
+        ohlcv_shm = shared_memory.SharedMemory(name=handle["ohlcv"])
+
+        total = handle["total"]
+        ts = np.ndarray((total,), dtype=np.int64, buffer=ts_shm.buf)
+        ohlcv = np.ndarray((len(OHLCV), total), dtype=np.float64, buffer=ohlcv_shm.buf)
+
+        ts.flags.writeable = False
+        ohlcv.flags.writeable = False
+
+        _ATTACHED[key] = ((ts_shm, ohlcv_shm), ts, ohlcv)
+
+        # Older blocks are unmapped once nothing references them anymore
+        while len(_ATTACHED) > MAX_ATTACHED:
+            _release(next(iter(_ATTACHED)))
+
+        return ts, ohlcv
+
+
+def _release(key: tuple):
+    segments, _, _ = _ATTACHED.pop(key)
+    for shm in segments:
+        try:
+            shm.close()
+        except BufferError:
+            # A frame built on this block is still alive; the mapping
+            # goes away with the process instead.
+            pass
+
+
+def shared_arrays(handle: dict, symbol: str, timeframe: str) -> tuple:
+    """
+    (ts int64[n], ohlcv float64[5, n]) read-only views, no copy.
+    """
+    offset, n = handle["index"][(symbol, timeframe)]
+    ts, ohlcv = _attach(handle)
+    return ts[offset:offset + n], ohlcv[:, offset:offset + n]
+
+
+def shared_frame(handle: dict, symbol: str, timeframe: str) -> pd.DataFrame:
+    """
+    fetch_ohlcv()-shaped frame whose OHLCV columns are views into the block.
+    """
+    ts, ohlcv = shared_arrays(handle, symbol, timeframe)
+
+    df = pd.DataFrame(ohlcv.T, columns=OHLCV, copy=False)
+    df.insert(0, "timestamp", ts.view("datetime64[ms]"))
+    return df
+
+
+def detach_all():
+    with _ATTACH_LOCK:
+        for key in list(_ATTACHED):
+            _release(key)
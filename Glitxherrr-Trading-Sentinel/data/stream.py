@@ -0,0 +1,395 @@
+import asyncio
+import json
+import random
+import threading
+import time
+
+from data.candle_store import apply_bar, refresh_candles, set_live
+from data.derivatives import publish_funding, to_binance_symbol, warm_open_interest
+
+
+# ============================================================
+#                 LIVE WEBSOCKET INGESTION
+# ============================================================
+
+# Binance combined streams, one background thread + asyncio loop:
+# - <symbol>@kline_<tf>      spot klines (same market ccxt "binance" polls)
+#                            -> data.candle_store.apply_bar()
+# - <symbol>@markPrice@1s    USDT-M mark price + funding
+#                            -> data.derivatives.publish_funding()
+# - open interest has no stream; it is polled over REST every OI_EVERY s.
+#
+# On every (re)connect the candle series are first brought up to date
+# over REST (refresh_candles), which backfills whatever was missed while
+# disconnected; a streamed bar that skips ahead triggers the same
+# backfill for its key, run as a separate task so the socket keeps being
+# read meanwhile (bars for that key are held and applied after it). Keys
+# are only marked live after that, and go back to REST polling while the
+# socket is down.
+#
+# The candle store is guarded by a threading lock, so bars are handed to
+# it from a worker thread (asyncio.to_thread) rather than on the loop; a
+# contended store then only delays its own socket, never the others.
+#
+# The `websockets` package is optional and only imported when a stream
+# starts.
+
+KLINE_URL = "wss://stream.binance.com:9443/stream"
+MARK_URL = "wss://fstream.binance.com/stream"
+
+TIMEFRAMES = ("15m", "1h", "4h")
+BUFFER_BARS = 400          # bars kept current per key (planner CANDLE_LIMIT)
+
+OI_EVERY = 15              # seconds between open-interest polls
+SILENCE_TIMEOUT = 60       # reconnect when no message arrives for this long
+RECONNECT_BASE = 1.0       # seconds, doubled per failed attempt
+RECONNECT_MAX = 60.0
+CLOSE_TIMEOUT = 2.0        # seconds allowed for sockets to close on stop()
+
+
+def _websockets():
+    try:
+        import websockets
+    except ImportError as e:
+        raise RuntimeError(
+            "Live streaming needs the optional 'websockets' package "
+            "(pip install websockets)."
+        ) from e
+    return websockets
+
+
+# ---------------- Message parsing ----------------
+
+def parse_kline(data: dict) -> tuple:
+    """
+    kline event -> (stream symbol, timeframe, [ts, o, h, l, c, v], closed)
+    """
+    k = data["k"]
+    row = [
+        int(k["t"]),
+        float(k["o"]),
+        float(k["h"]),
+        float(k["l"]),
+        float(k["c"]),
+        float(k["v"]),
+    ]
+    return k["s"], k["i"], row, bool(k["x"])
+
+
+def parse_mark_price(data: dict) -> tuple:
+    """
+    markPriceUpdate event -> (stream symbol, funding dict shaped like
+    data.derivatives._fetch_funding_rate()).
+    """
+    fr = float(data["r"]) if data.get("r") not in (None, "") else None
+
+    funding = None
+    if fr is not None:
+        funding = {
+            "fundingRate": fr,
+            "fundingBps": round(fr * 10000, 3),
+            "nextFundingTime": int(data.get("T", 0)),
+            "markPrice": float(data["p"]) if data.get("p") else None,
+        }
+
+    return data["s"], funding
+
+
+# ============================================================
+#                        STREAM
+# ============================================================
+
+class MarketStream:
+    """
+    Keeps the candle store and funding cache of `symbols` current.
+    kline_url / mark_url can point at a local server for testing.
+    """
+
+    def __init__(
+        self,
+        exchange: str,
+        symbols: list,
+        timeframes=TIMEFRAMES,
+        limit: int = BUFFER_BARS,
+        mark_price: bool = True,
+        open_interest: bool = True,
+        kline_url: str = KLINE_URL,
+        mark_url: str = MARK_URL,
+    ):
+        if exchange.lower() != "binance":
+            raise ValueError(f"Live streaming is only available for binance, not '{exchange}'")
+
+        self.exchange = exchange
+        self.symbols = list(dict.fromkeys(symbols))
+        self.timeframes = tuple(timeframes)
+        self.limit = limit
+        self.mark_price = mark_price
+        self.open_interest = open_interest
+        self.kline_url = kline_url
+        self.mark_url = mark_url
+
+        # "btcusdt" / "BTCUSDT" -> "BTC/USDT"
+        self._by_stream = {to_binance_symbol(s): s for s in self.symbols}
+
+        self.connected = {"klines": False, "mark_price": False}
+        self.last_message = None
+        self.reconnects = 0
+        self.errors = []
+
+        self._thread = None
+        self._loop = None
+        self._main = None
+        self._started = threading.Event()
+
+        self._catching_up = {}   # (symbol, tf) -> bars received during its backfill
+        self._tasks = set()
+
+    # ---------------- Control ----------------
+
+    def start(self):
+        _websockets()   # fail in the caller, not in the thread
+
+        if self._thread is not None and self._thread.is_alive():
+            return self
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"stream-{self.exchange}",
+            daemon=True,
+        )
+        self._thread.start()
+        self._started.wait(timeout=5)
+        return self
+
+    def stop(self, timeout: float = 5):
+        loop, main = self._loop, self._main
+        if loop is not None and main is not None:
+            loop.call_soon_threadsafe(main.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._set_live(False)
+
+    def status(self) -> dict:
+        return {
+            "connected": dict(self.connected),
+            "last_message": self.last_message,
+            "reconnects": self.reconnects,
+            "errors": self.errors[-5:],
+        }
+
+    # ---------------- Loop ----------------
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        try:
+            self._main = self._loop.create_task(self._gather())
+            self._started.set()
+            self._loop.run_until_complete(self._main)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # Sockets may still be in their close handshake: give them a
+            # moment to finish (so the peer sees a clean close), then
+            # cancel whatever is left before closing the loop
+            pending = asyncio.all_tasks(self._loop)
+            if pending:
+                _, pending = self._loop.run_until_complete(
+                    asyncio.wait(pending, timeout=CLOSE_TIMEOUT)
+                )
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+    async def _gather(self):
+        tasks = [
+            self._consume(
+                "klines",
+                self.kline_url,
+                [
+                    f"{s.lower()}@kline_{tf}"
+                    for s in self._by_stream
+                    for tf in self.timeframes
+                ],
+                self._on_kline,
+                self._backfill,
+            )
+        ]
+
+        if self.mark_price:
+            tasks.append(self._consume(
+                "mark_price",
+                self.mark_url,
+                [f"{s.lower()}@markPrice@1s" for s in self._by_stream],
+                self._on_mark_price,
+                None,
+            ))
+
+        if self.open_interest:
+            tasks.append(self._poll_open_interest())
+
+        await asyncio.gather(*tasks)
+
+    async def _consume(self, name: str, url: str, streams: list, handle, on_connect):
+        websockets = _websockets()
+        attempt = 0
+
+        while True:
+            try:
+                async with websockets.connect(f"{url}?streams={'/'.join(streams)}") as sock:
+
+                    if on_connect is not None:
+                        await on_connect()
+
+                    self.connected[name] = True
+                    attempt = 0
+
+                    while True:
+                        raw = await asyncio.wait_for(sock.recv(), timeout=SILENCE_TIMEOUT)
+                        self.last_message = time.time()
+
+                        msg = json.loads(raw)
+                        data = msg.get("data", msg)   # combined or raw stream
+                        await handle(data)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors = (self.errors + [f"{name}: {e}"])[-20:]
+
+            self.connected[name] = False
+            if name == "klines":
+                self._set_live(False)
+
+            self.reconnects += 1
+            delay = min(RECONNECT_MAX, RECONNECT_BASE * (2 ** attempt))
+            attempt += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    # ---------------- Handlers ----------------
+
+    async def _backfill(self, keys=None):
+        """
+        REST catch-up for every (or the given) key, then marks them live.
+        """
+        keys = keys or [(s, tf) for s in self.symbols for tf in self.timeframes]
+
+        for symbol, tf in keys:
+            await asyncio.to_thread(refresh_candles, self.exchange, symbol, tf, self.limit)
+            set_live(self.exchange, symbol, tf, True)
+
+    async def _on_kline(self, data: dict):
+        if data.get("e") != "kline":
+            return
+
+        stream_symbol, tf, row, closed = parse_kline(data)
+        symbol = self._by_stream.get(stream_symbol)
+
+        if symbol is None or tf not in self.timeframes:
+            return
+
+        key = (symbol, tf)
+
+        held = self._catching_up.get(key)
+        if held is not None:
+            held.append((row, closed))
+            return
+
+        if not await self._apply(symbol, tf, row, closed):
+            # Missed bars (or a cold key): refetch in the background,
+            # then apply what arrived meanwhile
+            self._catching_up[key] = [(row, closed)]
+            task = asyncio.create_task(self._catch_up(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _catch_up(self, key: tuple):
+        symbol, tf = key
+        try:
+            await self._backfill([key])
+        except Exception as e:
+            self.errors = (self.errors + [f"backfill {symbol} {tf}: {e}"])[-20:]
+        finally:
+            # Bars keep arriving while the held ones are applied; the key
+            # stays held until the list is drained so order is kept
+            held = self._catching_up[key]
+            while held:
+                row, closed = held.pop(0)
+                await self._apply(symbol, tf, row, closed)
+            del self._catching_up[key]
+
+    async def _apply(self, symbol: str, tf: str, row: list, closed: bool) -> bool:
+        return await asyncio.to_thread(apply_bar, self.exchange, symbol, tf, row, closed)
+
+    async def _on_mark_price(self, data: dict):
+        if data.get("e") != "markPriceUpdate":
+            return
+
+        stream_symbol, funding = parse_mark_price(data)
+        symbol = self._by_stream.get(stream_symbol)
+
+        if symbol is not None and funding is not None:
+            publish_funding(symbol, funding)
+
+    async def _poll_open_interest(self):
+        while True:
+            for symbol in self.symbols:
+                try:
+                    await asyncio.to_thread(warm_open_interest, symbol)
+                except Exception as e:
+                    self.errors = (self.errors + [f"open_interest {symbol}: {e}"])[-20:]
+
+            await asyncio.sleep(OI_EVERY)
+
+    def _set_live(self, live: bool):
+        for symbol in self.symbols:
+            for tf in self.timeframes:
+                set_live(self.exchange, symbol, tf, live)
+
+
+# ============================================================
+#                     PROCESS-WIDE REGISTRY
+# ============================================================
+
+_STREAMS = {}
+_STREAMS_LOCK = threading.Lock()
+
+
+def _stream_key(exchange: str, symbols: list, timeframes) -> tuple:
+    return exchange.lower(), tuple(dict.fromkeys(symbols)), tuple(timeframes)
+
+
+def start_stream(exchange: str, symbols: list, timeframes=TIMEFRAMES) -> MarketStream:
+    """
+    One running stream per (exchange, symbols, timeframes).
+    Raises RuntimeError when `websockets` isn't installed.
+    """
+    key = _stream_key(exchange, symbols, timeframes)
+
+    with _STREAMS_LOCK:
+        stream = _STREAMS.get(key)
+        if stream is None:
+            stream = MarketStream(exchange, symbols, timeframes).start()
+            _STREAMS[key] = stream
+        return stream
+
+
+def stop_stream(exchange: str, symbols: list, timeframes=TIMEFRAMES):
+    """
+    Stops the stream start_stream() runs for these arguments, if any;
+    its keys fall back to REST polling.
+    """
+    with _STREAMS_LOCK:
+        stream = _STREAMS.pop(_stream_key(exchange, symbols, timeframes), None)
+
+    if stream is not None:
+        stream.stop()
+
+
+def stop_streams():
+    with _STREAMS_LOCK:
+        for stream in _STREAMS.values():
+            stream.stop()
+        _STREAMS.clear()
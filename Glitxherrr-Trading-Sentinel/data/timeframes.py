@@ -0,0 +1,26 @@
+import time
+
+import numpy as np
+
+
+# ============================================================
+#                 TIMEFRAME HELPERS
+# ============================================================
+
+_TF_UNITS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def timeframe_ms(timeframe: str) -> int:
+    return int(timeframe[:-1]) * _TF_UNITS[timeframe[-1]]
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    return timeframe_ms(timeframe) // 1000
+
+
+def closed_bars(ts, timeframe: str, now_ms: int = None):
+    """
+    Boolean mask of bars whose period has fully elapsed.
+    """
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return np.asarray(ts, dtype=np.int64) + timeframe_ms(timeframe) <= now_ms
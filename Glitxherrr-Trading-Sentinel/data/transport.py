@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# ============================================================
+#                 SHARED HTTP TRANSPORT
+# ============================================================
+
+# Every fetcher in data/ goes through this module:
+# - one pooled requests.Session (keep-alive)
+# - per-host connection limit
+# - (connect, read) timeouts + an overall time budget per call
+# - jittered exponential retries on network errors / 429 / 5xx
+# - per-host circuit breaker so a dead endpoint fails fast
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 8
+TIME_BUDGET = 12           # seconds, across all attempts of one call
+
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.4         # seconds
+
+PER_HOST_CONNECTIONS = 4
+
+BREAKER_THRESHOLD = 3      # consecutive failed calls before opening
+BREAKER_COOLDOWN = 60      # seconds before a trial request is allowed
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+USER_AGENT = "Glitxherrr-Trading-Sentinel/1.0"
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+_session = None
+_session_lock = threading.Lock()
+
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            adapter = HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=PER_HOST_CONNECTIONS,
+            )
+            s = requests.Session()
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers["User-Agent"] = USER_AGENT
+            _session = s
+
+        return _session
+
+
+def _host_state(host: str) -> dict:
+    with _hosts_lock:
+        state = _hosts.get(host)
+        if state is None:
+            state = {
+                "slots": threading.BoundedSemaphore(PER_HOST_CONNECTIONS),
+                "failures": 0,
+                "opened_at": None,
+                "lock": threading.Lock(),
+            }
+            _hosts[host] = state
+        return state
+
+
+# ---------------- Circuit breaker ----------------
+
+def _breaker_allows(state: dict) -> bool:
+    with state["lock"]:
+        if state["opened_at"] is None:
+            return True
+
+        if time.monotonic() - state["opened_at"] >= BREAKER_COOLDOWN:
+            # Half-open: let this call through as the trial
+            state["opened_at"] = time.monotonic()
+            return True
+
+        return False
+
+
+def _record_success(state: dict):
+    with state["lock"]:
+        state["failures"] = 0
+        state["opened_at"] = None
+
+
+def _record_failure(state: dict):
+    with state["lock"]:
+        state["failures"] += 1
+        if state["failures"] >= BREAKER_THRESHOLD:
+            state["opened_at"] = time.monotonic()
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter
+    return random.uniform(0, BACKOFF_BASE * (2 ** attempt))
+
+
+# ============================================================
+#                         SYNC API
+# ============================================================
+
+def request(
+    method: str,
+    url: str,
+    *,
+    params=None,
+    timeout=None,
+    retries: int = MAX_RETRIES,
+    budget: float = TIME_BUDGET,
+    **kwargs,
+) -> requests.Response:
+    """
+    Pooled request with retries. Raises for HTTP errors like
+    raise_for_status(), and CircuitOpenError while the host is tripped.
+    """
+    host = urlsplit(url).netloc
+    state = _host_state(host)
+
+    if not _breaker_allows(state):
+        raise CircuitOpenError(f"{host} temporarily disabled after repeated failures")
+
+    session = get_session()
+    deadline = time.monotonic() + budget
+    connect, read = timeout if isinstance(timeout, tuple) else (CONNECT_TIMEOUT, timeout or READ_TIMEOUT)
+
+    last_error = None
+
+    for attempt in range(retries + 1):
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        try:
+            with state["slots"]:
+                r = session.request(
+                    method,
+                    url,
+                    params=params,
+                    timeout=(min(connect, remaining), min(read, remaining)),
+                    **kwargs,
+                )
+
+            if r.status_code in RETRY_STATUS:
+                last_error = requests.HTTPError(f"{r.status_code} from {host}", response=r)
+            else:
+                r.raise_for_status()
+                _record_success(state)
+                return r
+
+        except (requests.ConnectionError, requests.Timeout) as e:
+            last_error = e
+
+        except requests.HTTPError:
+            # Non-retryable client error: the host itself is fine
+            _record_success(state)
+            raise
+
+        if attempt < retries:
+            pause = _backoff(attempt)
+            if time.monotonic() + pause >= deadline:
+                break
+            time.sleep(pause)
+
+    _record_failure(state)
+
+    if last_error is None:
+        last_error = requests.Timeout(f"{host} time budget exhausted")
+
+    raise last_error
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def get_json(url: str, **kwargs):
+    return get(url, **kwargs).json()
@@ -0,0 +1,128 @@
+# ============================================
+# bench_indicators.py
+# Timings of the vectorized indicators against a git baseline
+# ============================================
+
+# Reproduces the numbers quoted for the swing, zone, Bollinger squeeze and
+# pivot rewrites. The "loop" columns run the implementations as they were
+# at --baseline (default: the repository's first commit), loaded straight
+# from git, on the same random-walk frames.
+#
+# Usage (from the project directory):
+#   python scripts/bench_indicators.py [--baseline REV] [--repeat 5]
+
+import argparse
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.momentum import bollinger_squeeze  # noqa: E402
+from core.structure import swing_points  # noqa: E402
+from core.structure_engine import detect_structure_state  # noqa: E402
+from core.zones import sr_zones  # noqa: E402
+
+
+def _git(*args) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+
+
+def load_baseline(rev: str, path: str, **overrides) -> types.ModuleType:
+    """
+    Module object for `path` as of `rev`. `overrides` replace globals after
+    import (e.g. to point zones at the baseline swing detector).
+    """
+    module = types.ModuleType(f"baseline_{Path(path).stem}")
+    exec(compile(_git("show", f"{rev}:./{path}"), f"{rev}:{path}", "exec"), module.__dict__)
+    module.__dict__.update(overrides)
+    return module
+
+
+def frame(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(n).cumsum()
+    return pd.DataFrame({
+        "open": close,
+        "high": close + rng.random(n),
+        "low": close - rng.random(n),
+        "close": close,
+        "volume": rng.random(n) * 100 + 1,
+    })
+
+
+def best_ms(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def report(name: str, rows: list):
+    print(f"\n{name}")
+    for bars, old, new in rows:
+        old_txt = f"{old:9.1f} ms" if old is not None else "        -   "
+        print(f"  {bars:>9,} bars   loop {old_txt}   vectorized {new:8.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indicator timings against a git baseline")
+    parser.add_argument("--baseline", default=None, help="git revision (default: first commit)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rev = args.baseline or _git("rev-list", "--max-parents=0", "HEAD").split()[0]
+    print(f"baseline: {rev}")
+
+    old_structure = load_baseline(rev, "core/structure.py")
+    old_zones = load_baseline(rev, "core/zones.py", detect_swings=old_structure.detect_swings)
+    old_momentum = load_baseline(rev, "core/momentum.py")
+    old_engine = load_baseline(rev, "core/structure_engine.py")
+
+    r = args.repeat
+
+    # ---- Swings (left = right = 3) ----
+    rows = []
+    for n in (10_000, 100_000, 1_000_000):
+        df = frame(n)
+        old = best_ms(lambda: old_structure.detect_swings(df), 1) if n <= 100_000 else None
+        rows.append((n, old, best_ms(lambda: swing_points(df), r)))
+    report("swings: detect_swings loop vs swing_points", rows)
+
+    # ---- S/R zones, full lookback ----
+    rows = []
+    for n in (250, 2_000, 10_000):
+        df = frame(n, 1)
+        old = best_ms(lambda: old_zones.sr_zones(df, lookback=n), 1)
+        rows.append((n, old, best_ms(lambda: sr_zones(df, lookback=n), r)))
+    report("sr_zones (lookback = all bars)", rows)
+
+    # ---- Bollinger squeeze ranking ----
+    rows = []
+    for n in (5_000, 50_000):
+        df = frame(n, 2)
+        old = best_ms(lambda: old_momentum.bollinger_squeeze(df, squeeze_lookback=140), 1)
+        rows.append((n, old, best_ms(lambda: bollinger_squeeze(df, squeeze_lookback=140), r)))
+    report("bollinger_squeeze (squeeze_lookback = 140)", rows)
+
+    # ---- Pivots + structure state ----
+    rows = []
+    for n in (400, 10_000):
+        df = frame(n, 3)
+        old = best_ms(lambda: old_engine.detect_structure_state(df), 1)
+        rows.append((n, old, best_ms(lambda: detect_structure_state(df), r)))
+    report("detect_structure_state", rows)
+
+
+if __name__ == "__main__":
+    main()
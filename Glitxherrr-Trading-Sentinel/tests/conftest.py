@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the packages the same way the app does (core.*, data.*)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
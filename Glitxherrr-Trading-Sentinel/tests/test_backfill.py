@@ -0,0 +1,167 @@
+import numpy as np
+import pytest
+
+from data import backfill
+from data.candle_archive import coverage, read_arrays
+
+
+# ============================================================
+# Stub exchange
+# ============================================================
+
+H = 3_600_000
+LISTED = 1_700_000_000_000 // H * H     # first bar the exchange has
+NEWEST = LISTED + 1_000 * H             # newest closed bar ("now")
+
+
+class StubExchange:
+    """
+    fetch_ohlcv_rows() stand-in: 1h bars from LISTED to NEWEST, minus
+    `missing` bars. `empty_once` answers the first request for those
+    `since` values with an empty page; `fail_after` raises once that many
+    requests were served.
+    """
+
+    def __init__(self, missing=(), empty_once=(), fail_after=None):
+        self.missing = set(missing)
+        self.empty_once = set(empty_once)
+        self.fail_after = fail_after
+        self.calls = []
+
+    def __call__(self, exchange_name, symbol, timeframe, limit=500, since=None):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise RuntimeError("connection dropped")
+
+        self.calls.append(since)
+
+        if since in self.empty_once:
+            self.empty_once.discard(since)
+            return []
+
+        first = max(since, LISTED)
+        rows = []
+        for ts in range(first, NEWEST + 1, H):
+            if ts in self.missing:
+                continue
+            rows.append([ts, 1.0, 2.0, 0.5, 1.5, 10.0])
+            if len(rows) == limit:
+                break
+        return rows
+
+
+@pytest.fixture(autouse=True)
+def fixed_clock(monkeypatch):
+    monkeypatch.setattr(backfill, "last_closed_bar", lambda timeframe, now_ms=None: NEWEST)
+
+
+def run(stub, start, end=None, root=None, page_limit=100):
+    return backfill.backfill_series(
+        "binance", "BTC/USDT", "1h", start, end,
+        page_limit=page_limit, fetch_rows=stub, root=root,
+    )
+
+
+def stored(root):
+    ts, _ = read_arrays("binance", "BTC/USDT", "1h", root=root)
+    return ts
+
+
+def holes(root):
+    return backfill.load_holes("binance", "BTC/USDT", "1h", root)
+
+
+# ============================================================
+# Pagination / resume
+# ============================================================
+
+def test_pages_through_the_range(tmp_path):
+    stub = StubExchange()
+
+    result = run(stub, LISTED, LISTED + 249 * H, root=tmp_path)
+
+    assert result["written"] == 250
+    assert stub.calls == [LISTED, LISTED + 100 * H, LISTED + 200 * H]
+    assert np.array_equal(stored(tmp_path), LISTED + np.arange(250) * H)
+
+
+def test_resume_only_fetches_what_is_missing(tmp_path):
+    with pytest.raises(RuntimeError):
+        run(StubExchange(fail_after=2), LISTED, LISTED + 499 * H, root=tmp_path)
+
+    assert len(stored(tmp_path)) == 200
+
+    stub = StubExchange()
+    result = run(stub, LISTED, LISTED + 499 * H, root=tmp_path)
+
+    assert stub.calls[0] == LISTED + 200 * H
+    assert result["written"] == 300
+    assert np.array_equal(stored(tmp_path), LISTED + np.arange(500) * H)
+
+    rerun = StubExchange()
+    assert run(rerun, LISTED, LISTED + 499 * H, root=tmp_path)["requests"] == 0
+
+
+def test_gap_between_segments_is_filled(tmp_path):
+    run(StubExchange(), LISTED, LISTED + 99 * H, root=tmp_path)
+    run(StubExchange(), LISTED + 200 * H, LISTED + 299 * H, root=tmp_path)
+
+    stub = StubExchange()
+    run(stub, LISTED, LISTED + 299 * H, root=tmp_path)
+
+    assert stub.calls == [LISTED + 100 * H]
+    assert [c[:2] for c in coverage("binance", "BTC/USDT", "1h", tmp_path)] == [
+        (LISTED, LISTED + 99 * H),
+        (LISTED + 100 * H, LISTED + 199 * H),
+        (LISTED + 200 * H, LISTED + 299 * H),
+    ]
+
+
+# ============================================================
+# Holes
+# ============================================================
+
+def test_pre_listing_range_becomes_a_hole_after_a_retry(tmp_path):
+    start = LISTED - 50 * H
+    stub = StubExchange()
+
+    run(stub, start, LISTED + 49 * H, root=tmp_path)
+
+    # First answer skipped ahead; the same request was repeated once
+    assert stub.calls[:2] == [start, start]
+    assert holes(tmp_path) == [(start, LISTED - H)]
+
+    rerun = StubExchange()
+    assert run(rerun, start, LISTED + 49 * H, root=tmp_path)["requests"] == 0
+
+
+def test_one_empty_page_is_not_a_hole(tmp_path):
+    stub = StubExchange(empty_once={LISTED + 100 * H})
+
+    result = run(stub, LISTED, LISTED + 199 * H, root=tmp_path)
+
+    assert result["written"] == 200
+    assert holes(tmp_path) == []
+
+
+def test_outage_inside_the_range_is_recorded(tmp_path):
+    outage = {LISTED + i * H for i in range(100, 120)}
+
+    run(StubExchange(missing=outage), LISTED, LISTED + 299 * H, root=tmp_path)
+
+    assert holes(tmp_path) == [(LISTED + 100 * H, LISTED + 119 * H)]
+    assert len(stored(tmp_path)) == 280
+
+
+def test_no_hole_at_the_newest_closed_bar(tmp_path):
+    # The exchange hasn't published the last 5 bars yet
+    late = {NEWEST - i * H for i in range(5)}
+
+    run(StubExchange(missing=late), NEWEST - 99 * H, root=tmp_path)
+
+    assert stored(tmp_path)[-1] == NEWEST - 5 * H
+    assert holes(tmp_path) == []
+
+    # Once they are out, a rerun picks them up
+    stub = StubExchange()
+    assert run(stub, NEWEST - 99 * H, root=tmp_path)["written"] == 5
+    assert stub.calls[0] == NEWEST - 4 * H
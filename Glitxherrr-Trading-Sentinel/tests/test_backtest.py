@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from core.backtest import _close_trade, _manage, _open_position
+
+
+TS15 = np.arange(10, dtype=np.int64) * 900_000
+
+
+def order(direction="LONG", entry=100.0, stop=95.0, target1=110.0, target2=120.0):
+    return {
+        "symbol": "BTC/USDT",
+        "direction": direction,
+        "decision": "TRADE",
+        "score": 1.0,
+        "entry": entry,
+        "stop": stop,
+        "target1": target1,
+        "target2": target2,
+        "rr": 2.0,
+        "signal_bar": 0,
+    }
+
+
+def fill_bar(o, open_, high, low):
+    pos = _open_position(o, 1, open_)
+    reason = _manage(pos, open_, high, low, fill_bar=True)
+    return pos, reason
+
+
+# ============================================================
+# Fill bar
+# ============================================================
+
+def test_long_gap_through_stop_exits_at_the_open():
+    pos, reason = fill_bar(order(), open_=90.0, high=91.0, low=88.0)
+
+    assert reason == "stop"
+    assert pos["fill"] == 90.0
+    assert pos["realized"] == 0.0
+
+    trade = _close_trade(pos, reason, 1, TS15, fee_bps=4.0)
+    assert trade["r"] == 0.0
+    assert trade["pnl_pct"] < 0
+
+
+def test_short_gap_through_stop_exits_at_the_open():
+    o = order("SHORT", entry=100.0, stop=105.0, target1=90.0, target2=80.0)
+    pos, reason = fill_bar(o, open_=108.0, high=109.0, low=107.0)
+
+    assert reason == "stop"
+    assert pos["fill"] == 108.0
+    assert pos["realized"] == 0.0
+
+
+def test_gap_through_entry_only_fills_at_the_open():
+    pos, reason = fill_bar(order(), open_=97.0, high=99.0, low=96.0)
+
+    assert reason is None
+    assert pos["fill"] == 97.0
+
+
+def test_stop_inside_the_fill_bar_exits_at_the_stop():
+    pos, reason = fill_bar(order(), open_=101.0, high=102.0, low=94.0)
+
+    assert reason == "stop"
+    assert pos["fill"] == 100.0
+    assert pos["realized"] == pytest.approx(-5.0)
+
+
+# ============================================================
+# Later bars
+# ============================================================
+
+def test_target1_then_breakeven():
+    pos, _ = fill_bar(order(), open_=101.0, high=102.0, low=99.0)
+
+    assert _manage(pos, 105.0, 111.0, 104.0, fill_bar=False) is None
+    assert pos["hit_target1"] and pos["active_stop"] == 100.0
+
+    assert _manage(pos, 104.0, 104.5, 99.5, fill_bar=False) == "breakeven"
+    assert pos["realized"] == pytest.approx(5.0)
+
+
+def test_later_gap_through_stop_exits_at_the_open():
+    pos, _ = fill_bar(order(), open_=101.0, high=102.0, low=99.0)
+
+    assert _manage(pos, 93.0, 94.0, 92.0, fill_bar=False) == "stop"
+    assert pos["realized"] == pytest.approx(-7.0)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import batch
+from core.exhaustion import detect_exhaustion
+from core.momentum import momentum_score, momentum_score_1h
+
+
+def tick_frame(seed: int, bars: int = 360) -> pd.DataFrame:
+    # Prices on a 0.01 grid with flat stretches, so bandwidths tie often
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + np.cumsum(rng.integers(-3, 4, bars)) * 0.01, 2)
+    close = np.where(rng.random(bars) < 0.3, np.roll(close, 1), close)
+
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=bars, freq="1h"),
+        "open": close,
+        "high": close + 0.01,
+        "low": close - 0.01,
+        "close": close,
+        "volume": rng.integers(1, 5, bars).astype(float),
+    })
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_squeeze_matches_the_engines_on_every_bar(seed):
+    df = tick_frame(seed)
+    arrays = [df[c].to_numpy()[None] for c in ("high", "low", "close", "volume")]
+
+    fast_ind = batch.fast_indicators(*arrays)
+    fast = batch.fast_regime(fast_ind)
+    slow = batch.slow_regime(batch.slow_indicators(*arrays))
+
+    for i in range(150, len(df), 5):
+        frame = df.iloc[:i + 1]
+        m1h = momentum_score_1h(frame)
+        m4h = momentum_score(frame)
+
+        assert bool(fast["bb_squeeze"][0, i]) == m1h["bb_squeeze"]
+        assert bool(slow["bb_squeeze"][0, i]) == m4h["bb_squeeze"]
+        assert round(float(fast_ind["squeeze_percentile"][0, i]), 2) == m1h["bb_squeeze_percentile"]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_exhaustion_matches_detect_exhaustion(seed):
+    df = tick_frame(seed)
+    arrays = [df[c].to_numpy()[None] for c in ("high", "low", "close", "volume")]
+    fast = batch.fast_regime(batch.fast_indicators(*arrays))
+
+    structure = {"trend": "Uptrend", "state": "Higher Highs"}
+    derivatives = {"funding": {"fundingBps": 9.0}, "long_short_ratio": {"longShortRatio": 1.2}}
+
+    codes = batch.exhaustion_codes(
+        fast,
+        trend=np.ones_like(fast["atr_pct"]),
+        extended=np.ones(fast["atr_pct"].shape, dtype=bool),
+        funding_bps=np.full_like(fast["atr_pct"], 9.0),
+        long_short_ratio=np.full_like(fast["atr_pct"], 1.2),
+    )
+
+    for i in range(150, len(df), 5):
+        frame = df.iloc[:i + 1]
+        momentum = {**momentum_score(frame), **momentum_score_1h(frame)}
+
+        assert batch.EXHAUSTION[codes[0, i]] == detect_exhaustion(momentum, structure, derivatives), i
+
+
+def test_persistence_is_not_a_sweep_axis():
+    df = tick_frame(0)
+    arrays = [df[c].to_numpy()[None] for c in ("high", "low", "close", "volume")]
+    ind = batch.fast_indicators(*arrays)
+
+    with pytest.raises(ValueError):
+        batch.sweep(ind, ind, np.zeros_like(ind["close"]), persistence=[2, 3])
@@ -0,0 +1,166 @@
+import threading
+import time
+
+import pytest
+
+import data.cache as cache
+from data.cache import cached, cached_call, invalidate, refresh_call
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Fetch:
+    """
+    Counts calls and returns the call number. Blocks while `gate` is
+    cleared; raises while `error` is set.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self.error = None
+
+    def __call__(self):
+        self.calls += 1
+        n = self.calls
+        self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return n
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", c)
+    invalidate()
+    yield c
+    invalidate()
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError("condition not reached in time")
+
+
+def test_fresh_hits_skip_the_fetch(clock):
+    fetch = Fetch()
+
+    assert cached_call("k", fetch, ttl=10) == 1
+    clock.now += 9
+    assert cached_call("k", fetch, ttl=10) == 1
+    assert fetch.calls == 1
+
+
+def test_expired_entries_are_refetched(clock):
+    fetch = Fetch()
+
+    cached_call("k", fetch, ttl=10, stale=5)
+    clock.now += 16
+
+    assert cached_call("k", fetch, ttl=10, stale=5) == 2
+
+
+def test_concurrent_callers_share_one_fetch(clock):
+    fetch = Fetch()
+    fetch.gate.clear()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cached_call("k", fetch, ttl=10)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+
+    wait_for(lambda: fetch.calls == 1 and "k" in cache._INFLIGHT)
+    time.sleep(0.05)
+    fetch.gate.set()
+
+    for t in threads:
+        t.join(5)
+
+    assert results == [1] * 5
+    assert fetch.calls == 1
+
+
+def test_stale_values_are_served_while_one_refresh_runs(clock):
+    fetch = Fetch()
+    cached_call("k", fetch, ttl=10, stale=60)
+
+    clock.now += 20
+    fetch.gate.clear()
+
+    # Served at once, with a single background refresh behind them
+    assert [cached_call("k", fetch, ttl=10, stale=60) for _ in range(3)] == [1, 1, 1]
+    wait_for(lambda: fetch.calls == 2)
+
+    fetch.gate.set()
+    wait_for(lambda: "k" not in cache._INFLIGHT)
+
+    assert cached_call("k", fetch, ttl=10, stale=60) == 2
+    assert fetch.calls == 2
+
+
+def test_failures_are_not_cached(clock):
+    fetch = Fetch()
+    fetch.error = ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        cached_call("k", fetch, ttl=10)
+
+    fetch.error = None
+    assert cached_call("k", fetch, ttl=10) == 2
+
+
+def test_a_failed_revalidation_keeps_the_stale_value(clock):
+    fetch = Fetch()
+    cached_call("k", fetch, ttl=10, stale=60)
+
+    clock.now += 20
+    fetch.error = ConnectionError("down")
+
+    assert cached_call("k", fetch, ttl=10, stale=60) == 1
+    wait_for(lambda: fetch.calls == 2 and "k" not in cache._INFLIGHT)
+
+    # Still stale, so the next caller gets the old value and retries
+    fetch.error = None
+    assert cached_call("k", fetch, ttl=10, stale=60) == 1
+    wait_for(lambda: fetch.calls == 3 and "k" not in cache._INFLIGHT)
+    assert cached_call("k", fetch, ttl=10, stale=60) == 3
+
+
+def test_refresh_call_fetches_even_when_fresh(clock):
+    fetch = Fetch()
+
+    cached_call("k", fetch, ttl=10)
+    assert refresh_call("k", fetch, ttl=10) == 2
+    assert cached_call("k", fetch, ttl=10) == 2
+
+
+def test_cached_keys_by_arguments(clock):
+    calls = []
+
+    @cached("derivatives")
+    def funding(symbol, period="5m"):
+        calls.append((symbol, period))
+        return len(calls)
+
+    assert funding("BTC") == funding("BTC") == 1
+    assert funding("BTC", period="15m") == 2
+    assert funding("ETH") == 3
+
+    assert funding.refresh("BTC") == 4
+    assert funding("BTC") == 4
+    assert funding.uncached("BTC") == 5
@@ -0,0 +1,109 @@
+import numpy as np
+
+from data.candle_archive import (
+    compact_series,
+    coverage,
+    last_timestamp,
+    read_arrays,
+    read_candles,
+    write_candles,
+)
+
+
+H = 3_600_000
+T0 = 1_700_000_000_000 // H * H
+
+
+def bars(first: int, n: int, price: float = 1.0) -> tuple:
+    ts = T0 + (first + np.arange(n)) * H
+    # open = price, close = position in the write
+    ohlcv = np.column_stack([
+        np.full(n, price), np.full(n, 2.0), np.full(n, 0.5), np.arange(n, dtype=float), np.ones(n),
+    ])
+    return ts, ohlcv
+
+
+def write(root, first: int, n: int, price: float = 1.0) -> int:
+    return write_candles("binance", "BTC/USDT", "1h", *bars(first, n, price), root=root)
+
+
+def read(root, **kwargs) -> tuple:
+    return read_arrays("binance", "BTC/USDT", "1h", root=root, **kwargs)
+
+
+def test_round_trip(tmp_path):
+    ts, ohlcv = bars(0, 100)
+    write_candles("binance", "BTC/USDT", "1h", ts, ohlcv, root=tmp_path)
+
+    got_ts, got = read(tmp_path)
+    assert np.array_equal(got_ts, ts)
+    assert np.array_equal(got, ohlcv.T)
+
+    df = read_candles("binance", "BTC/USDT", "1h", root=tmp_path)
+    assert list(df.columns) == ["timestamp", "open", "high", "low", "close", "volume"]
+    assert df["timestamp"].iloc[0].value // 1_000_000 == T0
+    assert df["close"].tolist() == list(range(100))
+
+
+def test_range_reads(tmp_path):
+    write(tmp_path, 0, 100)
+    write(tmp_path, 100, 100)
+
+    ts, _ = read(tmp_path, start=T0 + 90 * H, end=T0 + 110 * H)
+    assert ts[0] == T0 + 90 * H and ts[-1] == T0 + 110 * H and len(ts) == 21
+
+    ts, _ = read(tmp_path, limit=150)
+    assert ts[0] == T0 + 50 * H and len(ts) == 150
+
+    ts, _ = read(tmp_path, start=T0 + 500 * H)
+    assert len(ts) == 0
+
+
+def test_reads_inside_one_segment_are_memory_mapped(tmp_path):
+    write(tmp_path, 0, 100)
+
+    ts, _ = read(tmp_path, start=T0 + 10 * H, end=T0 + 20 * H)
+    assert not ts.flags.writeable
+    assert isinstance(ts.base, np.memmap) or isinstance(ts, np.memmap)
+
+
+def test_covered_bars_are_not_rewritten(tmp_path):
+    write(tmp_path, 0, 100)
+
+    assert write(tmp_path, 50, 60, price=9.0) == 10
+    _, ohlcv = read(tmp_path)
+    assert (ohlcv[0, :100] == 1.0).all()
+    assert (ohlcv[0, 100:] == 9.0).all()
+
+
+def test_gaps_are_filled_in_place(tmp_path):
+    write(tmp_path, 0, 10)
+    write(tmp_path, 20, 10)
+
+    assert write(tmp_path, 0, 30) == 10
+    assert [c[:2] for c in coverage("binance", "BTC/USDT", "1h", root=tmp_path)] == [
+        (T0, T0 + 9 * H), (T0 + 10 * H, T0 + 19 * H), (T0 + 20 * H, T0 + 29 * H),
+    ]
+    assert np.array_equal(read(tmp_path)[0], T0 + np.arange(30) * H)
+
+
+def test_the_last_duplicate_in_a_write_wins(tmp_path):
+    ts, ohlcv = bars(0, 3)
+    ts = np.r_[ts, ts[1]]
+    ohlcv = np.vstack([ohlcv, ohlcv[1] * 2])
+
+    assert write_candles("binance", "BTC/USDT", "1h", ts, ohlcv, root=tmp_path) == 3
+    assert read(tmp_path)[1][0].tolist() == [1.0, 2.0, 1.0]
+
+
+def test_compaction_keeps_the_data(tmp_path):
+    for first in range(0, 50, 10):
+        write(tmp_path, first, 10)
+    before = read(tmp_path)
+
+    compact_series("binance", "BTC/USDT", "1h", root=tmp_path)
+
+    assert coverage("binance", "BTC/USDT", "1h", root=tmp_path) == [(T0, T0 + 49 * H, 50)]
+    after = read(tmp_path)
+    assert np.array_equal(after[0], before[0]) and np.array_equal(after[1], before[1])
+    assert last_timestamp("binance", "BTC/USDT", "1h", root=tmp_path) == T0 + 49 * H
@@ -0,0 +1,99 @@
+import pytest
+
+import data.candle_store as candle_store
+from data.cache import invalidate
+
+
+H = 3_600_000
+END = 1_700_000_000_000 // H * H
+
+
+class Exchange:
+    """
+    fetch_ohlcv_rows() stand-in serving 1h bars up to `end`; the last bar
+    closes at `forming`.
+    """
+
+    def __init__(self):
+        self.end = END
+        self.forming = 1.5
+        self.calls = []
+
+    def __call__(self, exchange_name, symbol, timeframe, limit=500, since=None):
+        self.calls.append(since)
+
+        start = since if since is not None else self.end - (limit - 1) * H
+        rows = [[ts, 1.0, 2.0, 0.5, 1.0, 10.0] for ts in range(start, self.end + 1, H)][:limit]
+        if rows and rows[-1][0] == self.end:
+            rows[-1][4] = self.forming
+        return rows
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    stub = Exchange()
+
+    monkeypatch.setattr(candle_store, "fetch_ohlcv_rows", stub)
+    monkeypatch.setattr(candle_store, "ARCHIVE_CLOSED_BARS", False)
+
+    yield stub
+
+    candle_store.clear_candles()
+    invalidate()
+
+
+def refresh(limit: int = 50) -> dict:
+    return candle_store.refresh_candles("binance", "BTC/USDT", "1h", limit=limit)
+
+
+def test_refresh_only_asks_for_bars_since_the_last_one(exchange):
+    refresh()
+
+    exchange.end = END + 2 * H
+    entry = refresh()
+
+    assert exchange.calls == [None, END]
+    assert len(entry["ts"]) == 52
+    assert entry["ts"][-1] == END + 2 * H
+
+
+def test_refresh_replaces_the_forming_bar(exchange):
+    refresh()
+
+    exchange.forming = 2.5
+    entry = refresh()
+
+    assert exchange.calls == [None, END]
+    assert len(entry["ts"]) == 50
+    assert entry["ohlcv"][-1, 3] == 2.5
+    assert entry["ohlcv"][-2, 3] == 1.0
+
+
+def test_a_store_too_far_behind_takes_the_latest_window(exchange):
+    refresh()
+
+    exchange.end = END + 60 * H
+    entry = refresh()
+
+    assert exchange.calls == [None, END, None]
+    assert entry["ts"][0] == END + 11 * H
+    assert entry["ts"][-1] == END + 60 * H
+
+
+def test_get_candles_returns_the_last_bars_as_a_frame(exchange):
+    df = candle_store.get_candles("binance", "BTC/USDT", "1h", limit=50)
+
+    assert list(df.columns) == candle_store.COLUMNS
+    assert len(df) == 50
+    assert df["timestamp"].iloc[-1].value // 1_000_000 == END
+    assert df["close"].iloc[-1] == 1.5
+
+    # A second read inside the bar's TTL doesn't go to the exchange
+    candle_store.get_candles("binance", "BTC/USDT", "1h", limit=50)
+    assert exchange.calls == [None]
+
+
+def test_candle_ttl_stops_at_the_bar_close():
+    close = END / 1000 + 3600
+    assert candle_store.candle_ttl("1h", now=close - 10) == 10
+    assert candle_store.candle_ttl("1h", now=close - 1000) == candle_store.SOURCES["candles"]["ttl"]
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+import data.derivatives as derivatives
+from data.cache import invalidate
+
+
+PAYLOADS = {
+    "premiumIndex": {"lastFundingRate": "0.0001", "nextFundingTime": 123, "markPrice": "100.5"},
+    "openInterest": {"openInterest": "42"},
+    "globalLongShortAccountRatio": [{"longShortRatio": "1.5", "longAccount": "0.6", "shortAccount": "0.4"}],
+}
+
+
+class Binance:
+    """
+    get_json() stand-in answering the three futures endpoints; records
+    (endpoint, params). Blocks while `gate` is cleared.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.down = set()
+
+    def __call__(self, url, params=None):
+        endpoint = url.rsplit("/", 1)[-1]
+        self.calls.append((endpoint, params))
+        self.gate.wait(5)
+
+        if endpoint in self.down:
+            raise ConnectionError(f"{endpoint} down")
+        return PAYLOADS[endpoint]
+
+
+@pytest.fixture
+def binance(monkeypatch):
+    stub = Binance()
+    monkeypatch.setattr(derivatives, "get_json", stub)
+    invalidate()
+    yield stub
+    stub.gate.set()
+    invalidate()
+
+
+def endpoints(calls) -> list:
+    return sorted(endpoint for endpoint, _ in calls)
+
+
+def test_snapshot_shape(binance):
+    assert derivatives.fetch_derivatives_snapshot("BTC/USDT") == {
+        "funding": {"fundingRate": 0.0001, "fundingBps": 1.0, "nextFundingTime": 123, "markPrice": 100.5},
+        "open_interest": {"openInterest": 42.0},
+        "long_short_ratio": {"longShortRatio": 1.5, "longAccount": 0.6, "shortAccount": 0.4},
+    }
+
+
+def test_planner_and_snapshot_share_one_set_of_requests(binance):
+    derivatives.fetch_derivatives_snapshot("BTC/USDT")
+    derivatives.get_funding_rate("BTC/USDT")
+    derivatives.get_open_interest("BTC/USDT")
+    derivatives.get_global_long_short_ratio("BTC/USDT")
+
+    assert endpoints(binance.calls) == ["globalLongShortAccountRatio", "openInterest", "premiumIndex"]
+
+    # Both sides ask for the same long/short bucket
+    (params,) = [p for e, p in binance.calls if e == "globalLongShortAccountRatio"]
+    assert params["period"] == derivatives.LSR_PERIOD
+
+
+def test_concurrent_snapshots_coalesce(binance):
+    binance.gate.clear()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(derivatives.fetch_derivatives_snapshot("BTC/USDT")))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+
+    # Callers queue behind the one in-flight funding request
+    time.sleep(0.1)
+    binance.gate.set()
+
+    for t in threads:
+        t.join(5)
+
+    assert len(results) == 4 and all(r == results[0] for r in results)
+    assert endpoints(binance.calls) == ["globalLongShortAccountRatio", "openInterest", "premiumIndex"]
+
+
+def test_a_failing_endpoint_is_folded_in_and_retried(binance):
+    binance.down = {"openInterest"}
+
+    snap = derivatives.fetch_derivatives_snapshot("BTC/USDT")
+    assert snap["open_interest"] == {"openInterest": None, "error": "openInterest down"}
+    assert snap["funding"]["fundingBps"] == 1.0
+
+    binance.down = set()
+    assert derivatives.fetch_derivatives_snapshot("BTC/USDT")["open_interest"] == {"openInterest": 42.0}
+
+
+def test_published_funding_is_served_without_a_request(binance):
+    funding = {"fundingRate": 0.0002, "fundingBps": 2.0, "nextFundingTime": 1, "markPrice": 99.0}
+    derivatives.publish_funding("BTC/USDT", funding)
+
+    assert derivatives.get_funding_rate("BTC/USDT") == funding
+    assert binance.calls == []
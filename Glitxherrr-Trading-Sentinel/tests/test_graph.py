@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from core.graph import ComputeGraph
+
+
+@pytest.fixture
+def graph():
+    # a, b -> total -> sign -> label
+    g = ComputeGraph()
+    g.input("a")
+    g.input("b")
+    g.node("total", lambda a, b: a + b, ["a", "b"])
+    g.node("sign", lambda t: t >= 0, ["total"])
+    g.node("label", lambda s: "up" if s else "down", ["sign"])
+    g.update({"a": 1, "b": 2})
+    g.get("label")
+    return g
+
+
+def test_first_get_runs_every_node(graph):
+    assert graph.runs == {"total": 1, "sign": 1, "label": 1}
+
+
+def test_unchanged_inputs_recompute_nothing(graph):
+    assert graph.update({"a": 1, "b": 2}) == []
+    assert graph.get("label") == "up"
+    assert graph.recomputed == []
+
+
+def test_a_changed_input_reruns_its_dependents(graph):
+    assert graph.update({"a": 5}) == ["a"]
+    assert graph.get("total", "label") == (7, "up")
+
+    # sign is still True, so label isn't re-run
+    assert graph.recomputed == ["total", "sign"]
+    assert graph.runs["label"] == 1
+
+
+def test_a_changed_result_spreads_downstream(graph):
+    graph.set("a", -10)
+
+    assert graph.get("label") == "down"
+    assert graph.recomputed == ["total", "sign", "label"]
+
+
+def test_input_fingerprints_decide_what_changed():
+    g = ComputeGraph()
+    g.input("bars", fingerprint=lambda arr: float(arr[-1]))
+    g.node("last", lambda arr: float(arr[-1]), ["bars"])
+
+    g.set("bars", np.array([1.0, 2.0]))
+    g.get("last")
+
+    assert not g.set("bars", np.array([0.0, 2.0]))   # same last bar
+    assert g.set("bars", np.array([1.0, 3.0]))
+    assert g.get("last") == 3.0
+
+
+def test_unfingerprinted_objects_compare_by_identity():
+    g = ComputeGraph()
+    g.input("arr")
+
+    arr = np.arange(3)
+    g.set("arr", arr)
+
+    assert not g.set("arr", arr)
+    assert g.set("arr", arr.copy())
+
+
+def test_a_failing_node_keeps_its_state_and_retries():
+    g = ComputeGraph()
+    g.input("x")
+    g.node("inverse", lambda x: 1 / x, ["x"])
+
+    g.set("x", 2)
+    assert g.get("inverse") == 0.5
+
+    g.set("x", 0)
+    with pytest.raises(ZeroDivisionError):
+        g.get("inverse")
+
+    g.set("x", 4)
+    assert g.get("inverse") == 0.25
+
+
+def test_invalidate_reruns_every_computed_node(graph):
+    graph.invalidate()
+
+    assert graph.get("label") == "up"
+    assert graph.recomputed == ["total", "sign", "label"]
+    assert graph.version("total") == 1   # same result, same version
+
+
+def test_definition_and_input_errors():
+    g = ComputeGraph()
+    g.input("x")
+    g.node("y", lambda x: x, ["x"])
+
+    with pytest.raises(KeyError):
+        g.get("y")                       # x never set
+    with pytest.raises(KeyError):
+        g.node("z", lambda w: w, ["w"])
+    with pytest.raises(ValueError):
+        g.input("x")
+    with pytest.raises(ValueError):
+        g.set("y", 1)
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+import data.market_data as market_data
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    # load_markets() calls, without touching the network
+    calls = []
+
+    def load_markets(self, reload=False):
+        calls.append((self.id, reload))
+        return {}
+
+    monkeypatch.setattr(market_data.ccxt.Exchange, "load_markets", load_markets)
+    monkeypatch.setattr(market_data, "_EXCHANGES", {})
+    monkeypatch.setattr(market_data, "_LIMITERS", {})
+    return calls
+
+
+def test_clients_are_shared_per_exchange_and_options(loads):
+    client = market_data.get_exchange("binance")
+
+    assert market_data.get_exchange("Binance") is client
+    assert market_data.get_exchange("binance", {"timeout": 5000}) is not client
+    assert market_data.get_exchange("kraken") is not client
+
+
+def test_markets_load_once_then_refresh_after_the_ttl(loads, monkeypatch):
+    market_data.get_exchange("binance")
+    market_data.get_exchange("binance")
+    assert loads == [("binance", False)]
+
+    monkeypatch.setattr(market_data, "MARKETS_TTL", 0)
+    market_data.get_exchange("binance")
+    assert loads == [("binance", False), ("binance", True)]
+
+
+def test_unknown_exchanges_are_rejected(loads):
+    with pytest.raises(ValueError):
+        market_data.get_exchange("not-an-exchange")
+
+
+def test_clients_of_one_exchange_share_a_limiter(loads):
+    a = market_data.get_exchange("binance")
+    b = market_data.get_exchange("binance", {"timeout": 5000})
+
+    assert market_data.get_rate_limiter(a) is market_data.get_rate_limiter(b)
+
+
+def test_rate_limiter_queues_concurrent_callers():
+    limiter = market_data.RateLimiter(50)
+    done = []
+
+    def call():
+        limiter.wait()
+        done.append(time.monotonic())
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    # Four slots 50 ms apart: the last one can't start before 150 ms
+    assert max(done) - start >= 0.15
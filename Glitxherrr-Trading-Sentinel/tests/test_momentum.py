@@ -0,0 +1,125 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.indicator_state import IndicatorState, _frame_bars
+from core.momentum import (
+    _percentile_series,
+    _rolling_percentile_series,
+    bollinger_squeeze,
+    momentum_score,
+    momentum_score_1h,
+)
+
+
+# Outputs of core/momentum.py as of the baseline commit (345bc27) on the
+# frames below, generated once and frozen: {"level/tick/seed": [per cut]}
+BASELINE = json.loads((Path(__file__).parent / "data" / "momentum_baseline.json").read_text())
+
+MARKETS = ((100.0, 0.01), (2000.0, 0.01), (30000.0, 0.1), (0.5, 0.00001))
+SEEDS = range(12)
+CUTS = (200, 280, 359)
+
+
+def tick_frame(seed: int, level: float = 100.0, tick: float = 0.01, bars: int = 360) -> pd.DataFrame:
+    # Prices on a tick grid with flat stretches, so bandwidths tie often
+    rng = np.random.default_rng(seed)
+    close = np.round(level + np.cumsum(rng.integers(-3, 4, bars)) * tick, 6)
+    close = np.where(rng.random(bars) < 0.3, np.roll(close, 1), close)
+
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=bars, freq="1h"),
+        "open": close,
+        "high": close + tick,
+        "low": close - tick,
+        "close": close,
+        "volume": rng.integers(1, 5, bars).astype(float),
+    })
+
+
+def outputs(df: pd.DataFrame) -> dict:
+    bb = bollinger_squeeze(df, squeeze_lookback=140)
+    return {
+        "bollinger_squeeze": {
+            "bb_width": bb["bb_width"],
+            "squeeze_percentile": bb["squeeze_percentile"],
+            "squeeze_bars": [i for i, s in enumerate(bb["squeeze_series"]) if s],
+        },
+        "momentum_score": momentum_score(df),
+        "momentum_score_1h": momentum_score_1h(df),
+    }
+
+
+@pytest.mark.parametrize("level,tick", MARKETS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_matches_the_frozen_baseline(level, tick, seed):
+    df = tick_frame(seed, level, tick)
+    expected = BASELINE[f"{level}/{tick}/{seed}"]
+
+    for cut, want in zip(CUTS, expected):
+        assert outputs(df.iloc[:cut + 1]) == want, cut
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_indicator_state_matches_the_engines(seed):
+    df = tick_frame(seed)
+    fast, slow = IndicatorState("fast"), IndicatorState("slow")
+
+    for i, bar in enumerate(_frame_bars(df)):
+        # A forming version of the bar first; the final one replaces it
+        forming = (bar[0], bar[1], bar[2] * 1.01, bar[3], bar[4] * 1.01, bar[5])
+        for b in (forming, bar):
+            fast.update(b)
+            slow.update(b)
+
+        if i >= 100 and i % 10 == 0:
+            frame = df.iloc[:i + 1]
+            assert fast.result() == momentum_score_1h(frame), i
+            assert slow.result() == momentum_score(frame), i
+
+
+def bandwidth(df: pd.DataFrame) -> np.ndarray:
+    close = df["close"]
+    ma = close.rolling(20).mean()
+    std = close.rolling(20).std(ddof=0)
+    return ((ma + 2 * std - (ma - 2 * std)) / ma).to_numpy()
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_percentile_series_matches_the_loop(seed):
+    bw = bandwidth(tick_frame(seed))
+    hist = pd.Series(bw).shift(1).tail(120).dropna().to_numpy()
+
+    # The baseline's per-bar comparison against the whole history
+    expected = [float((hist < x).mean() * 100) if not np.isnan(x) else 100 for x in bw]
+
+    assert _percentile_series(bw, hist).tolist() == expected
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_rolling_percentile_ranks_each_bar_against_its_own_window(seed):
+    df = tick_frame(seed)
+    bw = bandwidth(df)
+    lookback = 60
+
+    percentiles = _rolling_percentile_series(bw, lookback)
+    squeeze = bollinger_squeeze(df, squeeze_lookback=lookback, rolling=True)
+    fixed = bollinger_squeeze(df, squeeze_lookback=lookback)
+
+    for i, x in enumerate(bw):
+        hist = bw[max(i - lookback, 0):i]
+        hist = hist[~np.isnan(hist)]
+
+        if len(hist) < 30 or np.isnan(x):
+            want = 100.0
+        else:
+            want = float((hist < x).mean() * 100)
+
+        assert percentiles[i] == want, i
+        assert squeeze["squeeze_series"][i] == (want <= 15.0), i
+
+    # The latest bar's window is the fixed mode's history
+    assert squeeze["squeeze_percentile"] == fixed["squeeze_percentile"]
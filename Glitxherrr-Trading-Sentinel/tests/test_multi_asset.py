@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+import core.multi_asset as multi_asset
+
+
+SYMBOLS = ["BTC/USDT", "PAXG/USDT"]
+
+
+@pytest.fixture
+def fetchers(monkeypatch):
+    # Every candle fetch of both symbols has to be running at the same
+    # time to get past the barrier
+    barrier = threading.Barrier(len(SYMBOLS) * len(multi_asset.TIMEFRAMES), timeout=5)
+    calls = []
+
+    def get_candles(exchange, symbol, tf, limit):
+        calls.append((symbol, tf))
+        barrier.wait()
+        return f"{symbol} {tf}"
+
+    def derivatives_calls(symbol, period):
+        def fail():
+            raise ConnectionError("down")
+
+        return [
+            ("funding", {"fundingBps": None}, lambda: {"fundingBps": 1.0, "period": period}),
+            ("open_interest", {"openInterest": None}, fail),
+        ]
+
+    monkeypatch.setattr(multi_asset, "get_candles", get_candles)
+    monkeypatch.setattr(multi_asset, "derivatives_calls", derivatives_calls)
+    return calls
+
+
+def test_fetches_every_timeframe_of_every_symbol_at_once(fetchers):
+    inputs = multi_asset.fetch_asset_inputs("binance", SYMBOLS + ["BTC/USDT"])
+
+    assert list(inputs) == SYMBOLS
+    assert len(fetchers) == 6
+
+    for symbol in SYMBOLS:
+        for tf in multi_asset.TIMEFRAMES:
+            assert inputs[symbol][tf] == f"{symbol} {tf}"
+
+
+def test_derivatives_errors_are_folded_into_the_snapshot(fetchers):
+    inputs = multi_asset.fetch_asset_inputs("binance", SYMBOLS)
+
+    assert inputs["BTC/USDT"]["derivatives"] == {
+        "funding": {"fundingBps": 1.0, "period": multi_asset.LSR_PERIOD},
+        "open_interest": {"openInterest": None, "error": "down"},
+    }
+
+
+def test_candle_errors_propagate(monkeypatch):
+    def get_candles(exchange, symbol, tf, limit):
+        raise ConnectionError(f"{symbol} {tf}")
+
+    monkeypatch.setattr(multi_asset, "get_candles", get_candles)
+    monkeypatch.setattr(multi_asset, "derivatives_calls", lambda symbol, period: [])
+
+    with pytest.raises(ConnectionError):
+        multi_asset.fetch_asset_inputs("binance", SYMBOLS)
@@ -0,0 +1,38 @@
+import pytest
+
+import data.news as news
+from data.cache import invalidate
+
+
+ITEMS = {"Data": [{"title": "BTC  up\n", "source": "x", "url": "u", "published_on": 0}]}
+
+
+@pytest.fixture(autouse=True)
+def clean(monkeypatch):
+    monkeypatch.setattr(news, "_last_good", [])
+    invalidate()
+    yield
+    invalidate()
+
+
+def test_last_good_list_survives_an_expired_cache(monkeypatch):
+    monkeypatch.setattr(news, "get_json", lambda url: ITEMS)
+    first = news.fetch_important_news()
+    assert [n["title"] for n in first] == ["BTC up"]
+
+    def down(url):
+        raise ConnectionError("upstream down")
+
+    # Past the stale window the cache has nothing left to serve
+    invalidate()
+    monkeypatch.setattr(news, "get_json", down)
+
+    assert news.fetch_important_news() == first
+
+
+def test_nothing_fetched_yet_gives_an_empty_list(monkeypatch):
+    def down(url):
+        raise ConnectionError("upstream down")
+
+    monkeypatch.setattr(news, "get_json", down)
+    assert news.fetch_important_news() == []
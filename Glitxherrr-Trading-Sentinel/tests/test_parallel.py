@@ -0,0 +1,86 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import parallel
+from core.multi_asset import TIMEFRAMES, build_asset_plan
+from core.scanner import scan_row
+
+
+SNAPSHOT = {
+    "funding": {"fundingBps": 1.0},
+    "open_interest": {"openInterest": 5.0},
+    "long_short_ratio": {"longShortRatio": 1.1},
+}
+
+
+def frame(period_ms: int, bars: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ts = 1_700_000_000_000 // period_ms * period_ms + np.arange(bars) * period_ms
+    close = 100 + np.cumsum(rng.standard_normal(bars))
+
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(ts, unit="ms"),
+        "open": close,
+        "high": close + rng.random(bars),
+        "low": close - rng.random(bars),
+        "close": close,
+        "volume": rng.random(bars) * 10 + 1,
+    })
+
+
+def unlinked(name: str, timeout: float = 5.0) -> bool:
+    # The block is closed from the future's done callback, which may run
+    # just after result() returns
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            shared_memory.SharedMemory(name=name).close()
+        except FileNotFoundError:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def asset_inputs(seed: int) -> dict:
+    return {
+        "15m": frame(900_000, 400, seed),
+        "1h": frame(3_600_000, 400, seed + 100),
+        "4h": frame(14_400_000, 400, seed + 200),
+        "derivatives": SNAPSHOT,
+    }
+
+
+@pytest.fixture(scope="module")
+def pool():
+    yield parallel.get_process_pool(2)
+    parallel.shutdown_process_pool()
+
+
+def test_worker_plans_match_the_in_process_plans(pool, monkeypatch):
+    blocks = []
+    share = parallel.share_frames
+
+    def recording_share(frames):
+        block = share(frames)
+        blocks.append(block.handle)
+        return block
+
+    monkeypatch.setattr(parallel, "share_frames", recording_share)
+
+    inputs = {f"SYM{i}/USDT": asset_inputs(i) for i in range(3)}
+    jobs = {symbol: parallel.submit_analysis(symbol, data, 2) for symbol, data in inputs.items()}
+
+    for symbol, job in jobs.items():
+        record = job.result(timeout=60)
+        assert record.to_dict() == build_asset_plan(symbol, inputs[symbol])
+        assert scan_row(symbol, record) == scan_row(symbol, build_asset_plan(symbol, inputs[symbol]))
+
+    # Every block only holds its own symbol's frames, and is gone once
+    # its task finished
+    for handle in blocks:
+        assert len(handle["index"]) == len(TIMEFRAMES)
+        assert unlinked(handle["ts"]) and unlinked(handle["ohlcv"])
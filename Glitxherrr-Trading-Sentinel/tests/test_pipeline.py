@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+pytest.importorskip("feedparser")
+
+import core.pipeline as pipeline
+from core.graph import ComputeGraph
+from core.multi_asset import build_asset_plan
+from core.pipeline import MarketPipeline, _asset_nodes
+
+
+SYMBOL = "BTC/USDT"
+
+SNAPSHOT = {
+    "funding": {"fundingBps": 1.0},
+    "open_interest": {"openInterest": 5.0},
+    "long_short_ratio": {"longShortRatio": 1.1},
+}
+
+
+def frame(period_ms: int, bars: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ts = 1_700_000_000_000 // period_ms * period_ms + np.arange(bars) * period_ms
+    close = 100 + np.cumsum(rng.standard_normal(bars))
+
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(ts, unit="ms"),
+        "open": close,
+        "high": close + rng.random(bars),
+        "low": close - rng.random(bars),
+        "close": close,
+        "volume": rng.random(bars) * 10 + 1,
+    })
+
+
+def move_last_bar(df: pd.DataFrame, factor: float) -> pd.DataFrame:
+    # The forming candle ticks: same timestamp, new high / close
+    out = df.copy()
+    out.loc[out.index[-1], ["high", "close"]] = out["high"].iloc[-1] * factor
+    return out
+
+
+def asset_inputs(seed: int) -> dict:
+    return {
+        "15m": frame(900_000, 400, seed),
+        "1h": frame(3_600_000, 400, seed + 100),
+        "4h": frame(14_400_000, 400, seed + 200),
+        "derivatives": SNAPSHOT,
+    }
+
+
+def feed(graph: ComputeGraph, inputs: dict) -> list:
+    return graph.update({
+        f"{SYMBOL}:15m": inputs["15m"],
+        f"{SYMBOL}:1h": inputs["1h"],
+        f"{SYMBOL}:4h": inputs["4h"],
+        f"{SYMBOL}:snapshot": inputs["derivatives"],
+    })
+
+
+@pytest.fixture
+def graph():
+    g = ComputeGraph()
+    _asset_nodes(g, SYMBOL)
+    return g
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_graph_plan_matches_build_asset_plan(graph, seed):
+    inputs = asset_inputs(seed)
+    feed(graph, inputs)
+    assert graph.get(f"{SYMBOL}:plan") == build_asset_plan(SYMBOL, inputs)
+
+    # A moving forming candle re-runs the HTF layers, like a fresh build
+    moved = {**inputs, "1h": move_last_bar(inputs["1h"], 1.05), "4h": move_last_bar(inputs["4h"], 1.05)}
+    feed(graph, moved)
+
+    assert graph.get(f"{SYMBOL}:plan") == build_asset_plan(SYMBOL, moved)
+    assert {f"{SYMBOL}:context", f"{SYMBOL}:structure"} <= set(graph.recomputed)
+
+
+def test_a_15m_tick_skips_the_htf_layers(graph):
+    inputs = asset_inputs(0)
+    feed(graph, inputs)
+    graph.get(f"{SYMBOL}:plan")
+
+    ticked = {**inputs, "15m": move_last_bar(inputs["15m"], 1.001)}
+    assert feed(graph, ticked) == [f"{SYMBOL}:15m"]
+
+    assert graph.get(f"{SYMBOL}:plan") == build_asset_plan(SYMBOL, ticked)
+    assert graph.recomputed[:1] == [f"{SYMBOL}:price"]
+    assert not {f"{SYMBOL}:context", f"{SYMBOL}:structure", f"{SYMBOL}:momentum_fast"} & set(graph.recomputed)
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    # Stage stand-ins that count calls; no inputs, so the graph isn't fed
+    calls = []
+
+    def stage(name, value):
+        def run(*args):
+            calls.append(name)
+            return value
+        return run
+
+    monkeypatch.setattr(pipeline, "macro_stage", stage("macro", {"dxy": None, "dxy_structure": None, "error": None}))
+    monkeypatch.setattr(pipeline, "news_stage", stage("news", {"btc_news": [], "gold_news": [], "errors": {}}))
+    monkeypatch.setattr(pipeline, "inputs_stage", stage("inputs", {"inputs": None, "error": "offline"}))
+    return calls
+
+
+def test_reruns_inside_the_ttl_reuse_the_result(stages):
+    p = MarketPipeline("binance", "BTC/USDT", "PAXG/USDT", ttl=60)
+
+    first = p.run()
+    assert p.run() is first
+    assert sorted(stages) == ["inputs", "macro", "news"]
+
+    assert p.run(force=True) is not first
+    assert len(stages) == 6
+
+
+def test_an_expired_result_is_rebuilt(stages):
+    p = MarketPipeline("binance", "BTC/USDT", "PAXG/USDT", ttl=0)
+
+    p.run()
+    p.run()
+    assert len(stages) == 6
+
+
+def test_sessions_share_one_pipeline(monkeypatch):
+    monkeypatch.setattr(pipeline, "_PIPELINES", {})
+
+    p = pipeline.get_pipeline("Binance", "BTC/USDT", "PAXG/USDT")
+    assert pipeline.get_pipeline("binance", "BTC/USDT", "PAXG/USDT") is p
+    assert pipeline.get_pipeline("binance", "ETH/USDT", "PAXG/USDT") is not p
@@ -0,0 +1,67 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.multi_asset import build_asset_plan, finish_plan
+from core.momentum import momentum_score, momentum_score_1h
+from core.records import TradePlan
+from core.trade_planner import plan_context, plan_from_context
+
+
+SNAPSHOTS = [
+    {
+        "funding": {"fundingRate": 0.0001, "fundingBps": 1.0, "nextFundingTime": 123, "markPrice": 100.5},
+        "open_interest": {"openInterest": 5.0},
+        "long_short_ratio": {"longShortRatio": 1.1, "longAccount": 0.52, "shortAccount": 0.48},
+    },
+    {
+        "funding": {"fundingBps": None, "error": "timeout"},
+        "open_interest": {"openInterest": None, "error": "timeout"},
+        "long_short_ratio": {"longShortRatio": None},
+    },
+]
+
+
+def frame(period_ms: int, bars: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ts = 1_700_000_000_000 // period_ms * period_ms + np.arange(bars) * period_ms
+    close = 100 + np.cumsum(rng.standard_normal(bars))
+
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(ts, unit="ms"),
+        "open": close,
+        "high": close + rng.random(bars),
+        "low": close - rng.random(bars),
+        "close": close,
+        "volume": rng.random(bars) * 10 + 1,
+    })
+
+
+def asset_inputs(seed: int, snapshot: dict) -> dict:
+    return {
+        "15m": frame(900_000, 400, seed),
+        "1h": frame(3_600_000, 400, seed + 100),
+        "4h": frame(14_400_000, 400, seed + 200),
+        "derivatives": snapshot,
+    }
+
+
+@pytest.mark.parametrize("snapshot", SNAPSHOTS)
+@pytest.mark.parametrize("seed", range(4))
+def test_build_asset_plan_round_trip(seed, snapshot):
+    plan = build_asset_plan("BTC/USDT", asset_inputs(seed, snapshot))
+    record = TradePlan.from_dict(plan)
+
+    assert record.to_dict() == plan
+    assert pickle.loads(pickle.dumps(record)) == record
+
+
+def test_plan_without_derivatives_round_trip():
+    # The backtest builds plans without a snapshot
+    inputs = asset_inputs(0, None)
+    plan = plan_from_context("BTC/USDT", 101.0, plan_context(inputs["1h"], inputs["4h"]), {})
+    plan = finish_plan(plan, momentum_score_1h(inputs["1h"]), momentum_score(inputs["4h"]), None)
+
+    assert TradePlan.from_dict(plan).to_dict() == plan
@@ -0,0 +1,108 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.multi_asset as multi_asset
+from core import scanner
+from core.multi_asset import build_asset_plan, score_plan
+
+
+SYMBOLS = ["AAA/USDT", "BBB/USDT", "CCC/USDT", "DDD/USDT"]
+
+PERIODS = {"15m": 900_000, "1h": 3_600_000, "4h": 14_400_000}
+
+SNAPSHOT = {
+    "funding": {"fundingBps": 1.0},
+    "open_interest": {"openInterest": 5.0},
+    "long_short_ratio": {"longShortRatio": 1.1},
+}
+
+
+def frame(symbol: str, tf: str, bars: int = 400) -> pd.DataFrame:
+    seed = SYMBOLS.index(symbol) * 10 + list(PERIODS).index(tf)
+    rng = np.random.default_rng(seed)
+    period = PERIODS[tf]
+    ts = 1_700_000_000_000 // period * period + np.arange(bars) * period
+    close = 100 + np.cumsum(rng.standard_normal(bars))
+
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(ts, unit="ms"),
+        "open": close,
+        "high": close + rng.random(bars),
+        "low": close - rng.random(bars),
+        "close": close,
+        "volume": rng.random(bars) * 10 + 1,
+    })
+
+
+def inputs(symbol: str) -> dict:
+    return {**{tf: frame(symbol, tf) for tf in PERIODS}, "derivatives": SNAPSHOT}
+
+
+@pytest.fixture
+def market(monkeypatch):
+    """
+    Candles for SYMBOLS; `broken` symbols fail, `held` ones wait for `release`.
+    """
+    state = {"broken": set(), "held": set(), "release": threading.Event()}
+
+    def get_candles(exchange, symbol, tf, limit):
+        if symbol in state["broken"]:
+            raise ConnectionError(f"{symbol} down")
+        if symbol in state["held"]:
+            state["release"].wait(5)
+        return frame(symbol, tf)
+
+    def derivatives_calls(symbol, period):
+        return [(key, {}, lambda value=value: value) for key, value in SNAPSHOT.items()]
+
+    monkeypatch.setattr(multi_asset, "get_candles", get_candles)
+    monkeypatch.setattr(multi_asset, "derivatives_calls", derivatives_calls)
+
+    yield state
+    state["release"].set()
+
+
+def test_scan_ranks_every_symbol(market):
+    market["broken"] = {"CCC/USDT"}
+
+    rows = scanner.scan_watchlist("binance", SYMBOLS + ["AAA/USDT"], workers=4)
+
+    assert sorted(r["symbol"] for r in rows) == SYMBOLS
+    assert rows[-1]["symbol"] == "CCC/USDT"
+    assert rows[-1]["error"] == "CCC/USDT down"
+
+    scored = rows[:-1]
+    assert [r["score"] for r in scored] == sorted((r["score"] for r in scored), reverse=True)
+
+    for row in scored:
+        plan = build_asset_plan(row["symbol"], inputs(row["symbol"]))
+        assert row["score"] == score_plan(plan)
+        assert row["plan"].to_dict() == plan
+
+
+def test_rows_stream_in_as_symbols_finish(market):
+    market["held"] = {"AAA/USDT"}
+    seen = []
+
+    def on_row(row, rows):
+        seen.append(row["symbol"])
+        if len(rows) == len(SYMBOLS) - 1:
+            market["release"].set()
+
+    scanner.scan_watchlist("binance", SYMBOLS, workers=8, on_row=on_row)
+
+    assert sorted(seen[:-1]) == SYMBOLS[1:]
+    assert seen[-1] == "AAA/USDT"
+
+
+def test_rank_rows_puts_failures_last():
+    rows = [
+        {"symbol": "B", "score": None},
+        {"symbol": "A", "score": 1.0},
+        {"symbol": "C", "score": 3.0},
+        {"symbol": "D", "score": 1.0},
+    ]
+    assert [r["symbol"] for r in scanner.rank_rows(rows)] == ["C", "A", "D", "B"]
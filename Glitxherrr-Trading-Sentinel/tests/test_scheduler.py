@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+pytest.importorskip("yfinance")
+pytest.importorskip("feedparser")
+
+import core.scheduler as scheduler
+
+
+class CountingPipeline:
+    def __init__(self):
+        self.runs = 0
+
+    def run(self, force=False):
+        self.runs += 1
+        return {"run": self.runs}
+
+
+@pytest.fixture
+def market(monkeypatch):
+    monkeypatch.setattr(scheduler, "get_pipeline", lambda *args: CountingPipeline())
+
+    s = scheduler.MarketScheduler("binance", "BTC/USDT", "PAXG/USDT")
+    yield s
+    s.stop()
+    s._thread.join(5)
+
+
+def test_refresh_during_a_pass_waits_for_the_next_one(market):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def job():
+        calls.append(market._requested)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+
+    market._jobs = {"job": job}
+    market.start()
+    started.wait(5)
+
+    # The first pass is already running its job when the refresh comes in
+    generation = market.request_refresh()
+    release.set()
+
+    snapshot = market.wait_for(refresh=generation, timeout=5)
+
+    assert snapshot.refresh >= generation
+    assert snapshot.version >= 2
+    assert calls[-1] == generation
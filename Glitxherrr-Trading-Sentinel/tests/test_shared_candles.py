@@ -0,0 +1,71 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.shared_candles import detach_all, share_frames, shared_arrays, shared_frame
+
+
+def frame(period_ms: int, bars: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ts = 1_700_000_000_000 // period_ms * period_ms + np.arange(bars) * period_ms
+    close = 100 + np.cumsum(rng.standard_normal(bars))
+
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(ts, unit="ms"),
+        "open": close,
+        "high": close + rng.random(bars),
+        "low": close - rng.random(bars),
+        "close": close,
+        "volume": rng.random(bars) * 10 + 1,
+    })
+
+
+FRAMES = {
+    ("BTC/USDT", "1h"): frame(3_600_000, 400, 0),
+    ("BTC/USDT", "4h"): frame(14_400_000, 250, 1),
+    ("ETH/USDT", "1h"): frame(3_600_000, 10, 2),
+}
+
+
+@pytest.fixture
+def block():
+    shared = share_frames(FRAMES)
+    yield shared
+    detach_all()
+    shared.close()
+
+
+def test_frames_come_back_unchanged(block):
+    for (symbol, tf), df in FRAMES.items():
+        out = shared_frame(block.handle, symbol, tf)
+
+        assert out["timestamp"].tolist() == df["timestamp"].tolist()
+        pd.testing.assert_frame_equal(out.drop(columns="timestamp"), df.drop(columns="timestamp"))
+
+
+def test_readers_get_read_only_views_of_the_block(block):
+    ts, ohlcv = shared_arrays(block.handle, "BTC/USDT", "4h")
+    df = shared_frame(block.handle, "BTC/USDT", "4h")
+
+    assert ohlcv.shape == (5, 250)
+    assert not ts.flags.writeable and not ohlcv.flags.writeable
+    assert np.shares_memory(df["close"].to_numpy(), ohlcv)
+
+
+def test_handle_for_limits_the_index(block):
+    handle = block.handle_for([("ETH/USDT", "1h")])
+
+    assert list(handle["index"]) == [("ETH/USDT", "1h")]
+    assert shared_frame(handle, "ETH/USDT", "1h")["close"].tolist() == FRAMES[("ETH/USDT", "1h")]["close"].tolist()
+
+
+def test_close_unlinks_the_segments():
+    shared = share_frames(FRAMES)
+    names = [shared.handle["ts"], shared.handle["ohlcv"]]
+    shared.close()
+
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
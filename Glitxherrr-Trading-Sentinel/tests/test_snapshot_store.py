@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+import core.snapshot_store as snapshot_store
+from core.snapshot_store import SnapshotJournal
+
+
+@pytest.fixture
+def journal(monkeypatch, tmp_path):
+    j = SnapshotJournal(tmp_path / "journal")
+
+    monkeypatch.setattr(snapshot_store, "_JOURNAL", j)
+    monkeypatch.setattr(snapshot_store, "SNAPSHOT_FILE", tmp_path / "snapshot_memory.json")
+
+    yield j
+    j.close()
+
+
+def save(n: int, start: int = 0):
+    for i in range(start, start + n):
+        snapshot_store.save_snapshot({"i": i})
+
+
+def test_load_returns_the_latest(journal):
+    save(5)
+    assert snapshot_store.load_snapshot()["state"] == {"i": 4}
+
+
+def test_load_after_rotate(journal):
+    save(100)
+    journal.rotate()
+
+    assert snapshot_store.load_snapshot()["state"] == {"i": 99}
+
+    save(1, start=100)
+    assert snapshot_store.load_snapshot()["state"] == {"i": 100}
+
+
+def test_load_after_compact(journal):
+    save(3)
+    journal.rotate()
+    save(3, start=3)
+    journal.compact(keep_segments=1)
+
+    assert [s["seq"] for s in journal.load_index()] == [2]
+    assert snapshot_store.load_snapshot()["state"] == {"i": 5}
+    assert [p["state"]["i"] for p in snapshot_store.read_snapshots()] == [3, 4, 5]
+
+
+def test_load_from_a_reopened_journal_after_rotate(journal):
+    save(10)
+    journal.rotate()
+    journal.close()
+
+    reopened = SnapshotJournal(journal.root)
+    assert reopened.tail()["state"] == {"i": 9}
+
+
+def test_torn_last_line_is_skipped(journal):
+    save(3)
+    journal.close()
+
+    with open(journal.root / "snap-000001.jsonl", "ab") as f:
+        f.write(b'{"ts": 1, "state": {"i"')
+
+    reopened = SnapshotJournal(journal.root)
+    assert reopened.tail()["state"] == {"i": 2}
+
+    reopened.append({"i": 3})
+    assert [p["state"]["i"] for p in reopened.read()] == [0, 1, 2, 3]
+    reopened.close()
+
+
+def test_legacy_file_when_the_journal_is_empty(journal):
+    snapshot_store.SNAPSHOT_FILE.write_text(json.dumps({"state": {"legacy": True}}))
+    assert snapshot_store.load_snapshot() == {"state": {"legacy": True}}
+
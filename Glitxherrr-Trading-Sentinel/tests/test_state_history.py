@@ -0,0 +1,103 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+from core.state_history import FrozenDict, StateHistory, freeze, thaw
+
+
+STATE = {
+    "btc": {"structure": {"trend": "Uptrend"}, "levels": [1.0, 2.0]},
+    "paxg": {"structure": {"trend": "Neutral"}},
+}
+
+
+def test_frozen_states_reject_mutation():
+    state = freeze(STATE)
+
+    with pytest.raises(TypeError):
+        state["btc"] = {}
+    with pytest.raises(TypeError):
+        state["btc"]["structure"].update(trend="Downtrend")
+    with pytest.raises(TypeError):
+        state.pop("paxg")
+
+    assert state["btc"]["levels"] == (1.0, 2.0)
+
+
+def test_frozen_states_read_like_plain_dicts():
+    state = freeze(STATE)
+
+    assert isinstance(state, dict)
+    assert thaw(state) == STATE
+    assert json.loads(json.dumps(state)) == STATE
+    assert pickle.loads(pickle.dumps(state)) == state
+
+
+def test_freeze_reuses_frozen_parts():
+    state = freeze(STATE)
+    again = freeze({"btc": state["btc"], "paxg": state["paxg"]})
+
+    assert freeze(state) is state
+    assert again["btc"] is state["btc"]
+    assert again["btc"]["levels"] is state["btc"]["levels"]
+
+
+def test_copies_are_free():
+    state = freeze(STATE)
+    assert copy.copy(state) is state
+    assert copy.deepcopy(state) is state
+
+
+def test_set_in_shares_the_untouched_subtrees():
+    state = freeze(STATE)
+    moved = state.set_in(("btc", "structure", "trend"), "Downtrend")
+
+    assert moved["btc"]["structure"]["trend"] == "Downtrend"
+    assert state["btc"]["structure"]["trend"] == "Uptrend"
+
+    assert moved["paxg"] is state["paxg"]
+    assert moved["btc"]["levels"] is state["btc"]["levels"]
+    assert moved["btc"] is not state["btc"]
+
+
+def test_history_skips_repeats_and_keeps_the_last_n():
+    history = StateHistory(size=3)
+    state = freeze(STATE)
+
+    assert history.push(state, timestamp=1)
+    assert not history.push(state, timestamp=2)
+    assert not history.push(thaw(state), timestamp=3)     # equal, not identical
+
+    for ts, trend in enumerate(("Downtrend", "Neutral", "Uptrend"), start=4):
+        state = state.set_in(("btc", "structure", "trend"), trend)
+        history.push(state, timestamp=ts)
+
+    assert len(history) == 3
+    assert [ts for ts, _ in history.entries()] == [4, 5, 6]
+    assert history.latest() is state
+
+
+def test_history_entries_share_subtrees():
+    history = StateHistory()
+    state = freeze(STATE)
+
+    history.push(state)
+    history.push(state.set_in(("btc", "structure", "trend"), "Downtrend"))
+
+    (_, first), (_, second) = history.entries()
+    assert second["paxg"] is first["paxg"]
+
+
+def test_history_series_and_changes():
+    history = StateHistory()
+    state = freeze(STATE)
+
+    for ts, (trend, price) in enumerate([("Uptrend", 1), ("Uptrend", 2), ("Downtrend", 3)]):
+        state = state.set_in(("btc", "structure", "trend"), trend).set("price", price)
+        history.push(state, timestamp=ts)
+
+    path = ("btc", "structure", "trend")
+    assert history.series(path) == [(0, "Uptrend"), (1, "Uptrend"), (2, "Downtrend")]
+    assert history.changes(path) == [(0, "Uptrend"), (2, "Downtrend")]
@@ -0,0 +1,327 @@
+import asyncio
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+import data.candle_archive as candle_archive
+import data.candle_store as candle_store
+import data.derivatives as derivatives
+import data.stream as stream
+from data.cache import invalidate
+
+
+H = 3_600_000
+END = int(time.time() * 1000) // H * H - 5 * H    # newest bar REST has (closed)
+LIMIT = 50
+
+
+# ============================================================
+# Local servers
+# ============================================================
+
+class RestStub:
+    """
+    fetch_ohlcv_rows() stand-in serving 1h bars up to `end`. Requests
+    block while `gate` is cleared.
+    """
+
+    def __init__(self):
+        self.end = END
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, exchange_name, symbol, timeframe, limit=500, since=None):
+        self.calls.append(since)
+        self.gate.wait(5)
+
+        start = since if since is not None else self.end - (limit - 1) * H
+        return [[ts, 1.0, 2.0, 0.5, 1.5, 10.0] for ts in range(start, self.end + 1, H)][:limit]
+
+
+class StreamServer:
+    """
+    websockets server on a background loop. Each kline connection runs
+    the next coroutine from `scripts` (or just stays open); mark-price
+    connections get one markPriceUpdate.
+    """
+
+    def __init__(self):
+        self.scripts = []
+        self.paths = []
+        self.loop = asyncio.new_event_loop()
+
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self.thread.start()
+        ready.wait(5)
+
+    def _run(self, ready):
+        async def listen():
+            return await websockets.serve(self._handler, "127.0.0.1", 0)
+
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(listen())
+        self.port = self.server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+
+    async def _handler(self, ws):
+        path = ws.request.path
+        self.paths.append(path)
+
+        if "markPrice" in path:
+            await ws.send(json.dumps({
+                "stream": "btcusdt@markPrice@1s",
+                "data": {"e": "markPriceUpdate", "s": "BTCUSDT", "p": "100.5", "r": "0.0001", "T": 123},
+            }))
+        elif self.scripts:
+            await self.scripts.pop(0)(ws)
+            return
+
+        await ws.wait_closed()
+
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/stream"
+
+    def close(self):
+        async def shutdown():
+            self.server.close()
+            await self.server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+def kline(ts: int, close: float, closed: bool = False) -> str:
+    return json.dumps({
+        "stream": "btcusdt@kline_1h",
+        "data": {
+            "e": "kline",
+            "s": "BTCUSDT",
+            "k": {
+                "t": ts, "s": "BTCUSDT", "i": "1h",
+                "o": "1", "h": "3", "l": "0.5", "c": str(close), "v": "11",
+                "x": closed,
+            },
+        },
+    })
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return
+        time.sleep(0.02)
+    raise AssertionError("condition not reached in time")
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+@pytest.fixture
+def rest(monkeypatch, tmp_path):
+    stub = RestStub()
+
+    monkeypatch.setattr(candle_store, "fetch_ohlcv_rows", stub)
+    monkeypatch.setattr(candle_store, "ARCHIVE_CLOSED_BARS", True)
+    monkeypatch.setattr(candle_store, "_ARCHIVED", {})
+    monkeypatch.setattr(candle_archive, "ARCHIVE_DIR", tmp_path)
+    monkeypatch.setattr(stream, "RECONNECT_BASE", 0.05)
+
+    yield stub
+
+    stub.gate.set()
+    candle_store.clear_candles()
+    invalidate()
+
+
+@pytest.fixture
+def server():
+    srv = StreamServer()
+    yield srv
+    srv.close()
+
+
+@pytest.fixture
+def start_stream(server):
+    streams = []
+
+    def start(mark_price: bool = False):
+        s = stream.MarketStream(
+            "binance", ["BTC/USDT"], ("1h",),
+            limit=LIMIT,
+            mark_price=mark_price,
+            open_interest=False,
+            kline_url=server.url(),
+            mark_url=server.url(),
+        ).start()
+        streams.append(s)
+        return s
+
+    yield start
+
+    for s in streams:
+        s.stop()
+
+
+def frame():
+    return candle_store.get_candles("binance", "BTC/USDT", "1h", limit=LIMIT)
+
+
+def is_live() -> bool:
+    return ("binance", "BTC/USDT", "1h") in candle_store._LIVE
+
+
+def last_bar():
+    df = frame()
+    ts = int(df["timestamp"].iloc[-1].value // 1_000_000)
+    return ts, float(df["close"].iloc[-1])
+
+
+# ============================================================
+# Tests
+# ============================================================
+
+def test_klines_merge_into_the_store(rest, server, start_stream):
+    async def script(ws):
+        await ws.send(kline(END, 2.5))                    # forming update of the last bar
+        await ws.send(kline(END + H, 2.6))                # next bar opens
+        await ws.send(kline(END + H, 2.7, closed=True))   # ... and closes
+        await ws.send(kline(END + 2 * H, 3.0))
+        await ws.wait_closed()
+
+    server.scripts.append(script)
+    start_stream()
+
+    wait_for(lambda: is_live() and last_bar()[0] == END + 2 * H)
+
+    df = frame()
+    assert len(df) == LIMIT
+    assert df["close"].iloc[-3:].tolist() == [2.5, 2.7, 3.0]
+    assert np.all(np.diff(df["timestamp"].to_numpy().astype("datetime64[ms]").astype(np.int64)) == H)
+
+    # Only the connect-time backfill went over REST
+    assert rest.calls == [None]
+
+    # The closed bar was archived with its final values
+    ts, ohlcv = candle_archive.read_arrays("binance", "BTC/USDT", "1h")
+    assert int(ts[-1]) == END + H
+    assert ohlcv[3, -1] == 2.7
+
+
+def test_reconnect_backfills_missed_bars(rest, server, start_stream):
+    async def drop(ws):
+        await asyncio.to_thread(wait_for, is_live)
+        rest.end = END + 2 * H     # bars arrive while disconnected
+        await ws.close()
+
+    server.scripts.append(drop)
+    s = start_stream()
+
+    wait_for(lambda: len(server.paths) >= 2 and is_live() and last_bar()[0] == END + 2 * H)
+
+    assert s.reconnects >= 1
+    assert rest.calls[:2] == [None, END]
+
+
+def test_gap_backfill_does_not_block_the_socket(rest, server, start_stream):
+    go = threading.Event()
+
+    async def gap(ws):
+        await asyncio.to_thread(go.wait, 5)
+        await ws.send(kline(END + 3 * H, 4.0))
+        await ws.send(kline(END + 3 * H, 4.5))
+        await ws.wait_closed()
+
+    server.scripts.append(gap)
+    s = start_stream()
+    wait_for(is_live)
+
+    rest.end = END + 3 * H
+    rest.gate.clear()
+    go.set()
+
+    # Both bars are read while the REST catch-up is still blocked
+    wait_for(lambda: len(rest.calls) == 2)
+    wait_for(lambda: len(s._catching_up.get(("BTC/USDT", "1h"), ())) == 2)
+
+    rest.gate.set()
+
+    wait_for(lambda: last_bar() == (END + 3 * H, 4.5))
+    assert rest.calls == [None, END]
+    assert s._catching_up == {}
+
+
+def test_mark_price_publishes_funding(rest, server, start_stream, monkeypatch):
+    monkeypatch.setattr(derivatives, "_fetch_funding_rate", lambda symbol: {"fundingBps": None, "error": "rest"})
+
+    start_stream(mark_price=True)
+
+    wait_for(lambda: derivatives.get_funding_rate("BTC/USDT").get("markPrice") == 100.5)
+
+    assert derivatives.get_funding_rate("BTC/USDT") == {
+        "fundingRate": 0.0001,
+        "fundingBps": 1.0,
+        "nextFundingTime": 123,
+        "markPrice": 100.5,
+    }
+
+
+def test_a_held_store_lock_does_not_block_the_loop(rest, server, start_stream):
+    go = threading.Event()
+
+    async def script(ws):
+        await asyncio.to_thread(go.wait, 5)
+        await ws.send(kline(END + H, 2.6))
+        await ws.wait_closed()
+
+    server.scripts.append(script)
+    s = start_stream()
+    wait_for(is_live)
+
+    lock = candle_store._key_lock(candle_store._key("binance", "BTC/USDT", "1h"))
+    with lock:
+        go.set()
+        wait_for(lambda: s.last_message is not None)
+
+        # The bar is waiting on the lock, but the loop still runs
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), s._loop).result(1)
+        assert last_bar()[0] == END
+
+    wait_for(lambda: last_bar() == (END + H, 2.6))
+
+
+def test_stop_stream_stops_and_forgets_it(monkeypatch):
+    class Stub:
+        def __init__(self, exchange, symbols, timeframes):
+            self.stopped = False
+
+        def start(self):
+            return self
+
+        def stop(self):
+            self.stopped = True
+
+    monkeypatch.setattr(stream, "MarketStream", Stub)
+    monkeypatch.setattr(stream, "_STREAMS", {})
+
+    s = stream.start_stream("Binance", ["BTC/USDT", "ETH/USDT"])
+    assert stream.start_stream("binance", ["BTC/USDT", "ETH/USDT"]) is s
+
+    stream.stop_stream("binance", ["ETH/USDT"])
+    assert not s.stopped
+
+    stream.stop_stream("binance", ["BTC/USDT", "ETH/USDT"])
+    assert s.stopped
+    assert stream._STREAMS == {}
+
+    stream.stop_stream("binance", ["BTC/USDT", "ETH/USDT"])   # already stopped
@@ -0,0 +1,73 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.structure import detect_swings, last_swing_levels, swing_points, trend_bias
+
+
+# Outputs of core/structure.py as of the baseline commit (345bc27) on the
+# frames below, generated once and frozen: {"level/tick/seed": {...}}
+BASELINE = json.loads((Path(__file__).parent / "data" / "swings_baseline.json").read_text())
+
+MARKETS = ((100.0, 0.01), (30000.0, 0.1), (0.5, 0.00001))
+SEEDS = range(8)
+WINDOWS = ((3, 3), (2, 5), (1, 1))
+CUTS = (7, 150, 599)
+
+
+def tick_frame(seed: int, level: float = 100.0, tick: float = 0.01, bars: int = 600) -> pd.DataFrame:
+    # Highs / lows on a tick grid with flat stretches, so neighbours tie often
+    rng = np.random.default_rng(seed)
+    close = np.round(level + np.cumsum(rng.integers(-3, 4, bars)) * tick, 6)
+    close = np.where(rng.random(bars) < 0.3, np.roll(close, 1), close)
+
+    return pd.DataFrame({
+        "open": close,
+        "high": np.round(close + rng.integers(0, 3, bars) * tick, 6),
+        "low": np.round(close - rng.integers(0, 3, bars) * tick, 6),
+        "close": close,
+        "volume": rng.integers(1, 5, bars).astype(float),
+    })
+
+
+def outputs(df: pd.DataFrame) -> dict:
+    out = {}
+    for left, right in WINDOWS:
+        sdf = detect_swings(df, left, right)
+        out[f"{left}/{right}"] = {
+            "swing_high": np.flatnonzero(sdf["swing_high"]).tolist(),
+            "swing_low": np.flatnonzero(sdf["swing_low"]).tolist(),
+        }
+    out["trend_bias"] = trend_bias(df)
+    out["last_swing_levels"] = list(last_swing_levels(df))
+    return out
+
+
+@pytest.mark.parametrize("level,tick", MARKETS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_matches_the_frozen_baseline(level, tick, seed):
+    df = tick_frame(seed, level, tick)
+    expected = BASELINE[f"{level}/{tick}/{seed}"]
+
+    for cut, want in zip(CUTS, expected):
+        assert outputs(df.iloc[:cut + 1]) == want, cut
+
+
+def test_detect_swings_keeps_the_frame():
+    df = tick_frame(0)
+    sdf = detect_swings(df)
+
+    pd.testing.assert_frame_equal(sdf[df.columns], df)
+    assert list(sdf.columns) == [*df.columns, "swing_high", "swing_low"]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_precomputed_swings_give_the_same_answers(seed):
+    df = tick_frame(seed)
+    swings = swing_points(df)
+
+    assert trend_bias(df, swings) == trend_bias(df)
+    assert last_swing_levels(df, swings) == last_swing_levels(df)
@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.structure_engine import detect_pivots, detect_structure_state
+
+
+# Outputs of core/structure_engine.py as of the baseline commit (345bc27)
+# on the frames below, generated once and frozen: {"level/tick/seed": [per cut]}
+BASELINE = json.loads((Path(__file__).parent / "data" / "pivots_baseline.json").read_text())
+
+MARKETS = ((100.0, 0.01), (30000.0, 0.1), (0.5, 0.00001))
+SEEDS = range(8)
+WINDOWS = (5, 2)
+LOOKBACKS = (80, 30)
+CUTS = (10, 150, 599)
+
+
+def tick_frame(seed: int, level: float = 100.0, tick: float = 0.01, bars: int = 600) -> pd.DataFrame:
+    # Highs / lows on a tick grid with flat stretches, so window extremes tie;
+    # odd seeds carry a few missing highs / lows
+    rng = np.random.default_rng(seed)
+    close = np.round(level + np.cumsum(rng.integers(-3, 4, bars)) * tick, 6)
+    close = np.where(rng.random(bars) < 0.3, np.roll(close, 1), close)
+
+    high = np.round(close + rng.integers(0, 3, bars) * tick, 6)
+    low = np.round(close - rng.integers(0, 3, bars) * tick, 6)
+
+    if seed % 2:
+        high[rng.integers(0, bars, 4)] = np.nan
+        low[rng.integers(0, bars, 4)] = np.nan
+
+    return pd.DataFrame({
+        "open": close,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": rng.integers(1, 5, bars).astype(float),
+    })
+
+
+def outputs(df: pd.DataFrame) -> dict:
+    out = {}
+    for window in WINDOWS:
+        pivots = detect_pivots(df, window)
+        out[f"pivots/{window}"] = {
+            "high": np.flatnonzero(pivots == 1).tolist(),
+            "low": np.flatnonzero(pivots == 2).tolist(),
+        }
+    for lookback in LOOKBACKS:
+        out[f"structure/{lookback}"] = detect_structure_state(df, lookback)
+    return out
+
+
+@pytest.mark.parametrize("level,tick", MARKETS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_matches_the_frozen_baseline(level, tick, seed):
+    df = tick_frame(seed, level, tick)
+    expected = BASELINE[f"{level}/{tick}/{seed}"]
+
+    for cut, want in zip(CUTS, expected):
+        assert outputs(df.iloc[:cut + 1]) == want, cut
+
+
+def test_detect_pivots_keeps_the_index():
+    df = tick_frame(0).iloc[100:200]
+    assert detect_pivots(df).index.equals(df.index)
+
+
+def test_detect_structure_state_leaves_the_frame_alone():
+    df = tick_frame(0)
+    before = df.copy()
+
+    detect_structure_state(df)
+    pd.testing.assert_frame_equal(df, before)
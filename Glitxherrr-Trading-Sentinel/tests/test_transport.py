@@ -0,0 +1,156 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import data.transport as transport
+
+
+# ============================================================
+# Local server
+# ============================================================
+
+class Server:
+    """
+    HTTP server on a background thread. Each request takes the next
+    status from `statuses` (200 once they run out) and answers {"n": i}.
+    """
+
+    def __init__(self):
+        self.statuses = []
+        self.hits = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                status = server.statuses.pop(0) if server.statuses else 200
+                body = json.dumps({"n": server.hits}).encode()
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        )
+        self.thread.start()
+
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/data"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join(5)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(transport, "BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(transport, "_hosts", {})
+
+    srv = Server()
+    yield srv
+    srv.close()
+
+
+def closed_port_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/data"
+
+
+# ============================================================
+# Tests
+# ============================================================
+
+def test_retries_server_errors(server):
+    server.statuses = [503, 429]
+
+    assert transport.get_json(server.url()) == {"n": 3}
+    assert server.hits == 3
+
+
+def test_client_errors_are_not_retried(server):
+    server.statuses = [404]
+
+    with pytest.raises(requests.HTTPError) as e:
+        transport.get(server.url())
+
+    assert e.value.response.status_code == 404
+    assert server.hits == 1
+
+
+def test_retries_run_out(server):
+    server.statuses = [500] * 3
+
+    with pytest.raises(requests.HTTPError) as e:
+        transport.get(server.url())
+
+    assert e.value.response.status_code == 500
+    assert server.hits == 3
+
+
+def test_connection_errors_are_retried(server):
+    with pytest.raises(requests.ConnectionError):
+        transport.get(closed_port_url(), retries=1)
+
+
+def test_breaker_opens_after_repeated_failures(server):
+    server.statuses = [503] * transport.BREAKER_THRESHOLD
+
+    for _ in range(transport.BREAKER_THRESHOLD):
+        with pytest.raises(requests.HTTPError):
+            transport.get(server.url(), retries=0)
+
+    with pytest.raises(transport.CircuitOpenError):
+        transport.get(server.url())
+
+    assert server.hits == transport.BREAKER_THRESHOLD
+
+
+def test_breaker_lets_a_trial_through_after_the_cooldown(server, monkeypatch):
+    monkeypatch.setattr(transport, "BREAKER_COOLDOWN", 0)
+    server.statuses = [503] * transport.BREAKER_THRESHOLD
+
+    for _ in range(transport.BREAKER_THRESHOLD):
+        with pytest.raises(requests.HTTPError):
+            transport.get(server.url(), retries=0)
+
+    # The trial succeeds and closes the breaker again
+    assert transport.get_json(server.url()) == {"n": transport.BREAKER_THRESHOLD + 1}
+
+    state = transport._hosts[server.url().split("/")[2]]
+    assert state["failures"] == 0
+    assert state["opened_at"] is None
+
+
+def test_client_errors_do_not_trip_the_breaker(server):
+    server.statuses = [404] * (transport.BREAKER_THRESHOLD + 1)
+
+    for _ in range(transport.BREAKER_THRESHOLD + 1):
+        with pytest.raises(requests.HTTPError):
+            transport.get(server.url())
+
+    assert transport.get_json(server.url())["n"] == transport.BREAKER_THRESHOLD + 2
+
+
+def test_an_exhausted_budget_times_out(server):
+    with pytest.raises(requests.Timeout):
+        transport.get(server.url(), budget=0)
+
+    assert server.hits == 0
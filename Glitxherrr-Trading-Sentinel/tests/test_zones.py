@@ -0,0 +1,55 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.structure import swing_points
+from core.zones import sr_zones
+
+
+# Outputs of core/zones.py as of the baseline commit (345bc27) on the
+# frames below, generated once and frozen: {"level/tick/seed": [per cut]}
+BASELINE = json.loads((Path(__file__).parent / "data" / "zones_baseline.json").read_text())
+
+MARKETS = ((100.0, 0.01), (30000.0, 0.1), (0.5, 0.00001))
+SEEDS = range(8)
+LOOKBACKS = (20, 200, 1000)
+CUTS = (150, 599)
+
+
+def tick_frame(seed: int, level: float = 100.0, tick: float = 0.01, bars: int = 600) -> pd.DataFrame:
+    # Highs / lows on a tick grid with flat stretches, so bars sit on zone edges
+    rng = np.random.default_rng(seed)
+    close = np.round(level + np.cumsum(rng.integers(-3, 4, bars)) * tick, 6)
+    close = np.where(rng.random(bars) < 0.3, np.roll(close, 1), close)
+
+    return pd.DataFrame({
+        "open": close,
+        "high": np.round(close + rng.integers(0, 3, bars) * tick, 6),
+        "low": np.round(close - rng.integers(0, 3, bars) * tick, 6),
+        "close": close,
+        "volume": rng.integers(1, 50, bars).astype(float),
+    })
+
+
+def outputs(df: pd.DataFrame) -> dict:
+    return {str(lookback): sr_zones(df, lookback) for lookback in LOOKBACKS}
+
+
+@pytest.mark.parametrize("level,tick", MARKETS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_matches_the_frozen_baseline(level, tick, seed):
+    df = tick_frame(seed, level, tick)
+    expected = BASELINE[f"{level}/{tick}/{seed}"]
+
+    for cut, want in zip(CUTS, expected):
+        assert outputs(df.iloc[:cut + 1]) == want, cut
+
+
+@pytest.mark.parametrize("lookback", LOOKBACKS)
+@pytest.mark.parametrize("seed", range(4))
+def test_upstream_swings_give_the_same_zones(seed, lookback):
+    df = tick_frame(seed)
+    assert sr_zones(df, lookback, swings=swing_points(df)) == sr_zones(df, lookback)